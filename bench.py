@@ -0,0 +1,285 @@
+"""Micro-benchmarks for the CCRIS / Experian converter.
+
+    python bench.py            # run every benchmark
+    python bench.py clean      # run selected ones by name
+
+Each benchmark prints its timings and checks the fast path gives the same
+answer as the straightforward one it replaces.
+"""
+import io
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import ccris_clean
+import ccris_export
+import ccris_render
+import ccris_search
+
+
+def best_of(func, repeat=3):
+    """Fastest wall time of func() over repeat runs, in seconds"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def sample_preview(rows=20000, cols=8, seed=0):
+    """Preview-like DataFrame: report text, empty cells and Experian headers/footers"""
+    rng = np.random.default_rng(seed)
+    vocabulary = np.array([
+        "CREDIT CARD", "HOUSING LOAN", "1,234.56", "0", "AFFIN BANK BERHAD", "MAYBANK",
+        "Outstanding Balance", "12/2024", "Page 3 of 7", "COMMERCIAL CONFIDENTIAL",
+        "Order ID : 1234567", "Kuala Lumpur", "", None, "Personal Loan", "Facility",
+        "Experian Information Services (Malaysia) Sdn. Bhd.", "Status: Active"
+    ], dtype=object)
+    weights = np.array([8, 8, 10, 2, 6, 6, 6, 6, 0.2, 0.2, 0.2, 0.2, 4, 4, 6, 6, 0.2, 6])
+    cells = rng.choice(vocabulary, size=(rows, cols), p=weights / weights.sum())
+    return pd.DataFrame(cells)
+
+
+def bench_clean():
+    """Row filter of clean_table_data: per-cell loop vs vectorized mask"""
+    df = sample_preview()
+
+    def loop_mask():
+        # The original iterrows() / is_header_footer() scan
+        return np.array([
+            any(ccris_clean.is_header_footer(cell) for cell in row)
+            for _, row in df.iterrows()
+        ])
+
+    def vector_mask():
+        return ccris_clean.header_footer_mask(df).any(axis=1)
+
+    assert np.array_equal(loop_mask(), vector_mask()), "vectorized mask differs from is_header_footer"
+
+    loop_time = best_of(loop_mask, repeat=1)
+    vector_time = best_of(vector_mask)
+    print(f"clean: {df.shape[0]} rows x {df.shape[1]} cols")
+    print(f"  per-cell loop  {loop_time * 1000:9.1f} ms")
+    print(f"  vectorized     {vector_time * 1000:9.1f} ms  ({loop_time / vector_time:.0f}x faster)")
+
+
+def sample_database(rows=50000, seed=0):
+    """Database-like DataFrame: text fields as build_database produces them"""
+    rng = np.random.default_rng(seed)
+    columns = {
+        "File_Name": [f"report_{n:05d}.pdf" for n in rng.integers(0, rows // 3 + 1, rows)],
+        "Subject_Name": rng.choice(["AHMAD BIN ALI", "TAN MEI LING", "RAJ KUMAR", "-"], rows),
+        "i_SCORE": rng.integers(300, 900, rows).astype(str),
+        "Risk_Grade": rng.integers(1, 11, rows).astype(str),
+        "Key_Contributing_Factor": rng.choice([
+            "Number of credit applications | Utilisation of revolving credit", "-",
+            "Length of credit history"], rows),
+    }
+    for n in range(30):
+        columns[f"Field_{n:02d}"] = rng.choice(["-", "0", "1,234.56", "YES", "NO", "12-03-2020"], rows)
+    return pd.DataFrame(columns)
+
+
+def bench_export():
+    """export_database in every format: write time and file size"""
+    database_df = sample_database()
+    print(f"export: {len(database_df)} rows x {len(database_df.columns)} cols")
+    with tempfile.TemporaryDirectory() as folder:
+        for fmt, (label, ext) in ccris_export.DATABASE_FORMATS.items():
+            out_path = Path(folder) / f"bench{ext}"
+            try:
+                elapsed = best_of(lambda: ccris_export.write_database(database_df, out_path, fmt), repeat=1)
+            except RuntimeError as e:
+                print(f"  {label:28s} skipped: {e}")
+                continue
+            size_mb = os.path.getsize(out_path) / (1024 * 1024)
+            print(f"  {label:28s} {elapsed * 1000:9.1f} ms  {size_mb:7.2f} MB")
+            os.remove(out_path)
+
+
+def sample_document(pages=6):
+    """In-memory report-like PDF: A4 pages of ruled table rows"""
+    import fitz
+
+    doc = fitz.open()
+    for page_no in range(pages):
+        page = doc.new_page(width=595, height=842)
+        page.insert_text((40, 50), f"CCRIS REPORT  Page {page_no + 1} of {pages}", fontsize=14)
+        for row in range(45):
+            y = 80 + row * 16
+            page.draw_line((40, y), (555, y), width=0.5)
+            page.insert_text((44, y + 12), f"{row:3d}  HOUSING LOAN  AFFIN BANK BERHAD  1,234.56  12/2024",
+                             fontsize=9)
+    return doc
+
+
+class DocumentStandIn:
+    """The two DocumentSession attributes the render functions use"""
+
+    def __init__(self, fitz_doc):
+        self.fitz_doc = fitz_doc
+        self.fitz_lock = threading.RLock()
+
+
+def bench_render():
+    """Page rendering: PPM encode/decode per page vs pooled pixmap copied straight into PIL"""
+    import fitz
+    from PIL import Image, ImageChops
+
+    session = DocumentStandIn(sample_document())
+    pages = range(len(session.fitz_doc))
+    zoom = ccris_render.DEFAULT_ZOOM
+
+    def ppm_render(page_no):
+        # The original render_page(): fresh pixmap, PPM bytes, PIL decode
+        pix = session.fitz_doc[page_no].get_pixmap(matrix=fitz.Matrix(zoom, zoom))
+        image = Image.open(io.BytesIO(pix.tobytes("ppm")))
+        image.load()
+        return image
+
+    def pooled_render(page_no):
+        return ccris_render.render_page(session, page_no, zoom)
+
+    for page_no in pages:
+        assert not ImageChops.difference(ppm_render(page_no), pooled_render(page_no)).getbbox(), \
+            "pooled render differs from get_pixmap"
+
+    width, height = pooled_render(0).size
+    print(f"render: {len(pages)} pages at {zoom}x ({width} x {height} px)")
+    for label, render in (("PPM round trip", ppm_render), ("pooled pixmap", pooled_render)):
+        elapsed = best_of(lambda: [render(page_no) for page_no in pages])
+        # Pixmaps created per pass (tracemalloc would miss them: MuPDF allocates in C)
+        pixmaps_before = ccris_render.pixmap_pool.allocated
+        for page_no in pages:
+            render(page_no)
+        pixmaps = ccris_render.pixmap_pool.allocated - pixmaps_before if render is pooled_render else len(pages)
+        print(f"  {label:16s} {elapsed / len(pages) * 1000:7.1f} ms/page  {pixmaps:3d} pixmaps allocated")
+
+
+def sample_page_texts(files=400, pages=8, seed=0):
+    """Report-like page texts: {path: [text per page]}"""
+    rng = np.random.default_rng(seed)
+    vocabulary = np.array([
+        "CREDIT CARD", "HOUSING LOAN", "1,234.56", "AFFIN BANK BERHAD", "MAYBANK", "Outstanding Balance",
+        "12/2024", "Personal Loan", "Facility", "Status: Active", "Kuala Lumpur", "Legal Action", "Hire Purchase",
+        "Special Attention Account", "CIMB BANK BERHAD", "Overdraft", "Limit", "Instalment"
+    ])
+    corpus = {}
+    for file_no in range(files):
+        texts = []
+        for _ in range(pages):
+            words = rng.choice(vocabulary, size=300)
+            ic_number = f"{rng.integers(500101, 991231)}-{rng.integers(1, 15):02d}-{rng.integers(0, 9999):04d}"
+            texts.append(f"Name: SUBJECT {file_no}\nIC No: {ic_number}\n" + "\n".join(words))
+        corpus[f"report_{file_no:04d}.pdf"] = texts
+    return corpus
+
+
+def bench_search():
+    """Full-text search: regex scan of every page vs the inverted index"""
+    corpus = sample_page_texts()
+    index = ccris_search.FullTextIndex()
+    build_time = best_of(lambda: [index.add_document(path, texts) for path, texts in corpus.items()], repeat=1)
+    queries = ["affin bank", "special attention", "legal", "cimb bank berhad", "subject 123", "hire purch"]
+
+    def scan(query):
+        # Straightforward search: the same phrase rule applied to every page's text
+        words = ccris_search.tokenize(query)
+        pattern = re.compile(r"(?<![a-z0-9])" + r"[^a-z0-9]+".join(map(re.escape, words)), re.IGNORECASE)
+        return [(path, page_no) for path, texts in corpus.items()
+                for page_no, text in enumerate(texts) if pattern.search(text)]
+
+    for query in queries:
+        hits, total = index.search(query, limit=None)
+        assert [(hit.path, hit.page_no) for hit in hits] == scan(query), f"index differs from scan for {query!r}"
+
+    page_count = sum(len(texts) for texts in corpus.values())
+    print(f"search: {len(corpus)} files, {page_count} pages, {len(index.postings)} distinct words "
+          f"(index built in {build_time * 1000:.0f} ms)")
+    scan_time = best_of(lambda: [scan(query) for query in queries], repeat=1) / len(queries)
+    index_time = best_of(lambda: [index.search(query) for query in queries]) / len(queries)
+    print(f"  regex scan     {scan_time * 1000:9.2f} ms/query")
+    print(f"  inverted index {index_time * 1000:9.2f} ms/query  ({scan_time / index_time:.0f}x faster)")
+
+
+# Run in a fresh interpreter so nothing is imported yet; prints one JSON line
+STARTUP_SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+{imports}
+result = {{"import": time.perf_counter() - started, "window": None}}
+if {open_window}:
+    try:
+        app = main.PDFtoExcelApp()
+        app.update()  # Window mapped and drawn
+        result["window"] = time.perf_counter() - started
+        app.destroy()
+    except Exception as e:  # tkinter.TclError without a display
+        result["window_error"] = str(e).splitlines()[0]
+result["heavy"] = [name for name in {heavy!r} if name in sys.modules]
+print(json.dumps(result))
+"""
+
+# What main.py imported before any window appeared, before imports were deferred
+EAGER_IMPORTS = ("customtkinter, pandas, pdfplumber, fitz, numpy, PIL.ImageTk, ccris_engine, ccris_cache, "
+                 "ccris_clean, ccris_database, ccris_export, ccris_grid, ccris_render")
+HEAVY_MODULES = ("pandas", "numpy", "pdfplumber", "pymupdf", "xlsxwriter", "ccris_engine")
+
+
+def time_startup(imports, open_window=False, repeat=3):
+    """Fastest of repeat fresh-interpreter start-ups: the script's result dict"""
+    code = STARTUP_SCRIPT.format(imports=imports, open_window=open_window, heavy=HEAVY_MODULES)
+    runs = []
+    for _ in range(repeat):
+        completed = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                                   cwd=Path(__file__).resolve().parent, check=True)
+        runs.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+    return min(runs, key=lambda run: run["import"])
+
+
+def bench_startup():
+    """GUI start-up: eager imports vs main.py's deferred ones, and time to the first window"""
+    eager = time_startup(f"import {EAGER_IMPORTS}")
+    deferred = time_startup("import main", open_window=True)
+    print("startup: fresh interpreter per run")
+    print(f"  eager imports    {eager['import'] * 1000:9.1f} ms")
+    print(f"  import main      {deferred['import'] * 1000:9.1f} ms  "
+          f"({eager['import'] / deferred['import']:.0f}x faster)")
+    if deferred["window"] is not None:
+        print(f"  first window     {deferred['window'] * 1000:9.1f} ms")
+    else:
+        print(f"  first window     skipped: {deferred.get('window_error', 'no display')}")
+    print(f"  heavy modules loaded at startup: {', '.join(deferred['heavy']) or 'none'}")
+
+
+BENCHMARKS = {
+    "clean": bench_clean,
+    "export": bench_export,
+    "render": bench_render,
+    "search": bench_search,
+    "startup": bench_startup,
+}
+
+
+def main(argv=None):
+    names = (argv if argv is not None else sys.argv[1:]) or list(BENCHMARKS)
+    for name in names:
+        if name not in BENCHMARKS:
+            print(f"Unknown benchmark {name!r}; choose from {', '.join(BENCHMARKS)}")
+            return 1
+        BENCHMARKS[name]()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,200 @@
+"""Headless command line for the CCRIS / Experian PDF to Excel converter.
+
+    python -m ccris extract --template sel.json --workers 12 in_dir out_dir
+    python -m ccris extract --database in_dir out_dir
+
+Without --template every table on every page is extracted (same as
+"Auto Extract All Tables"); with a template saved from the GUI
+("Save Template") the saved selection areas are applied (same as
+"Batch Process All"). Each PDF becomes <name>.xlsx in out_dir and
+--database also builds and exports the combined database.
+
+Progress goes to stdout as one JSON object per line. Everything else the
+extractors print is sent to stderr so stdout stays machine-readable.
+Nothing here imports Tk, so it runs on servers without a display.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+import ccris_cache
+import ccris_database
+import ccris_engine
+import ccris_export
+
+
+class ProgressWriter:
+    """Write one JSON progress event per line"""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.started = time.perf_counter()
+
+    def emit(self, event, **fields):
+        record = {"event": event, "elapsed": round(time.perf_counter() - self.started, 3)}
+        record.update(fields)
+        self.stream.write(json.dumps(record) + "\n")
+        self.stream.flush()
+
+
+def run_extract(args, progress):
+    in_dir = Path(args.in_dir)
+    out_dir = Path(args.out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    files = sorted(str(f) for f in in_dir.glob("*.pdf"))
+    if not files:
+        progress.emit("error", message=f"No PDF files found in {in_dir}")
+        return 1
+
+    if args.template:
+        func = ccris_engine.extract_file_with_selections
+        kwargs = {
+            "selections": ccris_engine.load_selection_template(args.template),
+            "header_crop": 80,
+            "footer_crop": 80
+        }
+        mode = "template"
+    else:
+        func = ccris_engine.auto_extract_file
+        kwargs = {"header_crop": 90, "footer_crop": 90}
+        mode = "auto"
+
+    engine = ccris_engine.ExtractionEngine(args.workers)
+    cache = None if args.no_cache else ccris_cache.extraction_cache()
+    progress.emit("start", mode=mode, files=len(files), workers=min(engine.workers, len(files)),
+                  in_dir=str(in_dir), out_dir=str(out_dir))
+
+    previews = {}
+    failed_files = []
+    iscore_sources = {"hint": 0, "search": 0, "scan": 0, "missing": 0}
+    extract_started = time.perf_counter()
+
+    for done, (file_idx, result) in enumerate(engine.map_files(func, files, cache=cache, **kwargs), 1):
+        file_name = result["file_name"]
+        output = None
+
+        if result["error"]:
+            status = "error"
+            failed_files.append(f"{file_name} (error: {result['error']})")
+        elif result["rows"]:
+            status = "cached" if result.get("cached") else "ok"
+            df = pd.DataFrame(result["rows"])
+            previews[file_name] = df
+            output = out_dir / f"{Path(file_name).stem}.xlsx"
+            try:
+                ccris_export.write_extracted_workbook(df, output)
+            except Exception as e:
+                status = "error"
+                output = None
+                failed_files.append(f"{file_name} (error: {e})")
+        else:
+            status = "empty"
+            failed_files.append(f"{file_name} (no tables found)")
+
+        # How the i-SCORE locator answered (cached results skip the lookup)
+        if not result.get("cached") and not result["error"]:
+            iscore_sources[result.get("iscore_source") or "missing"] += 1
+
+        elapsed = time.perf_counter() - extract_started
+        remaining = len(files) - done
+        progress.emit(
+            "file",
+            file=file_name,
+            status=status,
+            done=done,
+            total=len(files),
+            rows=len(result["rows"]) if result["rows"] else 0,
+            iscore=result.get("iscore"),
+            risk_grade=result.get("risk_grade"),
+            output=str(output) if output else None,
+            files_per_sec=round(done / elapsed, 3) if elapsed > 0 else None,
+            eta_sec=round(elapsed / done * remaining, 1) if done else None
+        )
+
+    extract_elapsed = time.perf_counter() - extract_started
+    lookups = sum(iscore_sources.values())
+    summary = {
+        "files": len(files),
+        "successful": len(previews),
+        "failed": failed_files,
+        "extract_sec": round(extract_elapsed, 3),
+        "files_per_sec": round(len(files) / extract_elapsed, 3) if extract_elapsed > 0 else None,
+        "cache_hits": cache.hits if cache else 0,
+        "iscore_locator": dict(
+            iscore_sources,
+            hint_hit_rate=round(iscore_sources["hint"] / lookups, 3) if lookups else None
+        )
+    }
+
+    if args.database:
+        # Keep the database in input-file order regardless of completion order
+        ordered_previews = {
+            Path(f).name: previews[Path(f).name] for f in files if Path(f).name in previews
+        }
+        progress.emit("database_start", files=len(ordered_previews))
+        build_started = time.perf_counter()
+        database_df, successful, failed = ccris_database.build_database(ordered_previews, workers=args.workers)
+        database_path = None
+        if not database_df.empty:
+            database_path = ccris_export.export_database(database_df, out_dir, args.database_format)
+        progress.emit(
+            "database",
+            successful=successful,
+            failed=failed,
+            records=len(database_df),
+            output=str(database_path) if database_path else None,
+            build_sec=round(time.perf_counter() - build_started, 3)
+        )
+
+    progress.emit("summary", **summary)
+    return 0 if previews else 1
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m ccris", description=__doc__.splitlines()[0])
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    extract = subparsers.add_parser("extract", help="Extract tables from every PDF in a folder")
+    extract.add_argument("in_dir", help="Folder containing the PDF reports")
+    extract.add_argument("out_dir", help="Folder for the Excel output")
+    extract.add_argument("--template", help="Selection template JSON saved from the GUI (omit to auto-extract)")
+    extract.add_argument("--workers", type=int, default=None,
+                         help="Worker processes (default: CCRIS_WORKERS or CPU count)")
+    extract.add_argument("--database", action="store_true", help="Also build and export the combined database")
+    extract.add_argument("--database-format", choices=list(ccris_export.DATABASE_FORMATS), default="xlsx",
+                         help="File format for --database (default: xlsx)")
+    extract.add_argument("--no-cache", action="store_true", help="Ignore the on-disk extraction cache")
+    extract.set_defaults(handler=run_extract)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    # Keep a private handle on stdout for JSON, then point fd 1 at stderr so prints
+    # from the extractors (and their worker processes) cannot interleave with it
+    json_stream = os.fdopen(os.dup(sys.stdout.fileno()), "w", encoding="utf-8")
+    sys.stdout.flush()
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+
+    progress = ProgressWriter(json_stream)
+    try:
+        return args.handler(args, progress)
+    except Exception as e:
+        progress.emit("error", message=str(e))
+        return 1
+    finally:
+        json_stream.flush()
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
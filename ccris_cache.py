@@ -0,0 +1,163 @@
+"""Persistent on-disk caches for the CCRIS / Experian PDF to Excel converter.
+
+Entries live in a small SQLite file under ~/.ccris_cache (override with the
+CCRIS_CACHE_DIR environment variable) and are evicted least-recently-used
+once the store grows past its size budget.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+
+def cache_dir():
+    """Folder holding all CCRIS caches"""
+    folder = Path(os.environ.get("CCRIS_CACHE_DIR") or (Path.home() / ".ccris_cache"))
+    folder.mkdir(parents=True, exist_ok=True)
+    return folder
+
+
+def file_sha256(path, chunk_size=1024 * 1024):
+    """SHA-256 of a file's bytes (content address for cache keys)"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def make_key(*parts):
+    """Stable key from JSON-serialisable parts"""
+    payload = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ExtractionCache:
+    """Size-bounded LRU of JSON values keyed by content hash, stored in SQLite"""
+
+    def __init__(self, path=None, max_bytes=None):
+        self.path = str(path or (cache_dir() / "extraction_cache.sqlite3"))
+        if max_bytes is None:
+            max_bytes = int(os.environ.get("CCRIS_CACHE_MAX_MB", "512")) * 1024 * 1024
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "size INTEGER NOT NULL, last_access REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def _dumps(self, value):
+        # Stored form of a value
+        return json.dumps(value, separators=(",", ":"))
+
+    def _loads(self, stored):
+        return json.loads(stored)
+
+    def get(self, key):
+        """Return the cached value for key, or None"""
+        with self._lock:
+            conn = self._connect()
+            try:
+                row = conn.execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    self.misses += 1
+                    return None
+                conn.execute("UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), key))
+                conn.commit()
+            finally:
+                conn.close()
+
+        self.hits += 1
+        return self._loads(row[0])
+
+    def put(self, key, value):
+        """Store value (must be JSON-serialisable) and evict old entries if over budget"""
+        text = self._dumps(value)
+        with self._lock:
+            conn = self._connect()
+            try:
+                conn.execute(
+                    "INSERT OR REPLACE INTO entries (key, value, size, last_access) VALUES (?, ?, ?, ?)",
+                    (key, text, len(text), time.time())
+                )
+                self._evict(conn)
+                conn.commit()
+            finally:
+                conn.close()
+
+    def _evict(self, conn):
+        # Drop least recently used entries until back under 90% of the budget
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        target = self.max_bytes * 0.9
+        for key, size in conn.execute("SELECT key, size FROM entries ORDER BY last_access").fetchall():
+            if total <= target:
+                break
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            total -= size
+
+    def clear(self):
+        """Remove every entry"""
+        with self._lock:
+            conn = self._connect()
+            try:
+                conn.execute("DELETE FROM entries")
+                conn.commit()
+            finally:
+                conn.close()
+
+
+class ThumbnailCache(ExtractionCache):
+    """Size-bounded LRU of PNG page thumbnails (bytes), stored next to the extraction cache"""
+
+    def __init__(self, path=None, max_bytes=None):
+        if max_bytes is None:
+            max_bytes = int(os.environ.get("CCRIS_THUMBNAIL_CACHE_MB", "64")) * 1024 * 1024
+        super().__init__(path or (cache_dir() / "thumbnail_cache.sqlite3"), max_bytes)
+
+    def _dumps(self, value):
+        return sqlite3.Binary(value)
+
+    def _loads(self, stored):
+        return bytes(stored)
+
+
+_extraction_cache = None
+_thumbnail_cache = None
+
+
+def extraction_cache():
+    """Shared ExtractionCache for this process (None if the cache folder is unusable)"""
+    global _extraction_cache
+    if _extraction_cache is None:
+        try:
+            _extraction_cache = ExtractionCache()
+        except (OSError, sqlite3.Error) as e:
+            print(f"Extraction cache disabled: {e}")
+            return None
+    return _extraction_cache
+
+
+def thumbnail_cache():
+    """Shared ThumbnailCache for this process (None if the cache folder is unusable)"""
+    global _thumbnail_cache
+    if _thumbnail_cache is None:
+        try:
+            _thumbnail_cache = ThumbnailCache()
+        except (OSError, sqlite3.Error) as e:
+            print(f"Thumbnail cache disabled: {e}")
+            return None
+    return _thumbnail_cache
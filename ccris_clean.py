@@ -0,0 +1,115 @@
+"""Header/footer cleaning for extracted Experian tables.
+
+is_header_footer() checks one cell; header_footer_mask() answers the same
+question for a whole DataFrame at once with pandas string operations, so
+cleaning a large preview costs one pass over its distinct cell texts.
+"""
+import re
+
+import numpy as np
+import pandas as pd
+
+# Exact footer patterns
+FOOTER_KEYWORDS = (
+    'commercial confidential',
+    'experian information services (malaysia) sdn. bhd.',
+    'is certified to iso/iec',
+    'cert. no: ism',
+    'notice: the information provided by experian',
+    'we do not guarantee the accuracy',
+    'while we have used our best endeavours',
+    'the information furnished is strictly confidential',
+    'experian shall not be liable',
+    'customer service division at:',
+    'suite 16.02, level 16',
+    'centrepoint south mid valley city',
+    'lingkaran syed putra',
+    'kuala lumpur',
+    '+60326151111',
+    'page',
+    'of 7'
+)
+
+# Exact header patterns
+HEADER_KEYWORDS = (
+    'strictly confidential',
+    'order id',
+    'credittrack by experian',
+    'order date',
+    'effective date',
+    'user name',
+    'check/track by experian'
+)
+
+# Every keyword in one alternation so each cell is scanned once
+KEYWORD_PATTERN = re.compile("|".join(re.escape(k) for k in FOOTER_KEYWORDS + HEADER_KEYWORDS))
+PAGE_NUMBER_PATTERN = r'^page\s+\d+\s+of\s+\d+$'
+ORDER_ID_PATTERN = r'.*order\s+id\s*:\s*\d+.*'
+
+
+def is_header_footer(text):
+    """Check if text is part of header or footer (empty cells count as well)"""
+    if not text or pd.isna(text):
+        return True
+
+    text_str = str(text).strip()
+    text_lower = text_str.lower()
+
+    # Check footer and header patterns
+    if KEYWORD_PATTERN.search(text_lower):
+        return True
+
+    # Check if text is mostly the disclaimer
+    if len(text_str) > 200 and 'experian' in text_lower:
+        return True
+
+    # Check if it's just a page number pattern
+    if re.match(PAGE_NUMBER_PATTERN, text_lower):
+        return True
+
+    # Check for Order ID pattern
+    if re.match(ORDER_ID_PATTERN, text_lower):
+        return True
+
+    return False
+
+
+def header_footer_mask(df):
+    """Boolean array (same shape as df) of the cells is_header_footer() would flag"""
+    values = df.to_numpy(dtype=object)
+    if values.size == 0:
+        return np.zeros(values.shape, dtype=bool)
+    flat = values.ravel()
+
+    # Empty cells: None / NaN, blank strings and other falsy values such as 0
+    empty = pd.isna(flat) | (flat == "") | (flat == 0)
+
+    # Match each distinct text once and broadcast back to the cells
+    codes, uniques = pd.factorize(pd.Series(flat[~empty]).astype(str))
+    stripped = pd.Series(uniques, dtype=object).str.strip()
+    lowered = stripped.str.lower()
+    flagged = (
+        lowered.str.contains(KEYWORD_PATTERN, regex=True)
+        | ((stripped.str.len() > 200) & lowered.str.contains('experian', regex=False))
+        | lowered.str.match(PAGE_NUMBER_PATTERN)
+        | lowered.str.match(ORDER_ID_PATTERN)
+    ).to_numpy(dtype=bool)
+
+    mask = empty.copy()
+    mask[~empty] = flagged[codes]
+    return mask.reshape(values.shape)
+
+
+def clean_table_data(df):
+    """Remove header/footer rows from dataframe"""
+    if df.empty:
+        return df
+
+    # Remove rows where ANY column contains header/footer text
+    rows_to_keep = ~header_footer_mask(df).any(axis=1)
+    df_cleaned = df[rows_to_keep].reset_index(drop=True)
+
+    # Remove columns that are all empty or None
+    df_cleaned = df_cleaned.dropna(axis=1, how='all')
+
+    return df_cleaned
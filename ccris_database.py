@@ -0,0 +1,1132 @@
+"""Database builder for the CCRIS / Experian PDF to Excel converter.
+
+Turns each file's preview DataFrame into database rows without any Tk
+dependency, so the same code serves the GUI and the command line.
+"""
+import re
+from bisect import bisect_left, bisect_right
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+import pandas as pd
+
+import ccris_cache
+from ccris_engine import default_worker_count, error_message, risk_grade_from_score
+
+
+# Section header markers: name -> test on (stripped cell text, upper-cased text)
+SECTION_MARKERS = {
+    "particulars": lambda text, upper: "PARTICULARS OF THE SUBJECT PROVIDED BY YOU" in upper,
+    "summary_credit_information": lambda text, upper: "SUMMARY CREDIT INFORMATION" in upper,
+    "credit_score": lambda text, upper: "CREDIT SCORE" in upper,
+    "key_statistics": lambda text, upper: "KEY STATISTICS" in upper,
+    "shareholding_interest": lambda text, upper: (
+        "SHAREHOLDING INTEREST" in upper or ("INTEREST IN COMPANY" in upper and "BUSINESS" in upper)
+    ),
+    "ccris_entity": lambda text, upper: "CCRIS ENTITY SELECTED BY YOU" in upper,
+    "summary_credit_report": lambda text, upper: "SUMMARY CREDIT REPORT" in upper,
+    "subject_status": lambda text, upper: "Subject Status" in text,
+    "potential_liabilities": lambda text, upper: "SUMMARY OF POTENTIAL" in upper and "CURRENT LIABILITIES" in upper,
+    "legal_suits": lambda text, upper: "LEGAL SUITS" in upper,
+    "bankruptcy_action": lambda text, upper: "BANKRUPTCY ACTION" in upper,
+    "nlci": lambda text, upper: "NON-BANK LENDER CREDIT INFORMATION" in upper and "NLCI" in upper,
+    "written_off": lambda text, upper: "WRITTEN-OFF ACCOUNT" in upper,
+    "trade_credit_reference": lambda text, upper: "TRADE / CREDIT REFERENCE" in upper and "(CR)" in upper,
+}
+
+
+class ReportIndex:
+    """One pass over a preview table (see table_payload) so field lookups do not rescan it
+
+    cells holds every cell as stripped text ("" for empty) and sections
+    maps each SECTION_MARKERS name to the rows containing that header, so
+    finding a section is a dictionary hit and label lookups only scan the
+    rows under it (repeat lookups are memoized).
+    """
+
+    def __init__(self, rows):
+        self.raw = rows
+        self.cells = [[cell.strip() if cell is not None else "" for cell in row] for row in rows]
+        self.num_rows = len(self.cells)
+        self.sections = {name: [] for name in SECTION_MARKERS}
+        self._values = {}
+
+        for row_idx, row in enumerate(self.cells):
+            for text in row:
+                if not text:
+                    continue
+                upper = text.upper()
+                for name, matches in SECTION_MARKERS.items():
+                    rows = self.sections[name]
+                    if (not rows or rows[-1] != row_idx) and matches(text, upper):
+                        rows.append(row_idx)
+
+    def start(self, name):
+        """First row holding the section header, or None"""
+        rows = self.sections[name]
+        return rows[0] if rows else None
+
+    def row_text(self, row_idx):
+        """Non-empty cells of a row joined with spaces"""
+        return " ".join(cell.strip() for cell in self.raw[row_idx] if cell is not None)
+
+    def find_value(self, name, label_text, span):
+        """Value right of the first cell containing label_text within span rows after the section header"""
+        key = (name, label_text, span)
+        if key not in self._values:
+            self._values[key] = self._find_value(name, label_text.lower(), span)
+        return self._values[key]
+
+    def _find_value(self, name, label, span):
+        start = self.start(name)
+        if start is None:
+            return ""
+        for search_idx in range(start + 1, min(start + span, self.num_rows)):
+            row_data = self.cells[search_idx]
+            for col_idx, cell_str in enumerate(row_data):
+                if label in cell_str.lower():
+                    # Found the label, get value from next column
+                    if col_idx + 1 < len(row_data):
+                        return row_data[col_idx + 1]
+        return ""
+
+
+def table_payload(df):
+    """Compact, cheaply pickled form of a preview: row tuples of cell text with None for empty cells"""
+    values = df.to_numpy(dtype=object)
+    missing = pd.isna(values)
+    return [
+        tuple(None if is_missing else str(cell) for cell, is_missing in zip(row, missing_row))
+        for row, missing_row in zip(values.tolist(), missing.tolist())
+    ]
+
+
+def extract_database_row(df, file_name):
+    """Extract data from PARTICULARS, SUMMARY CREDIT INFORMATION, CREDIT SCORE, SHAREHOLDING INTEREST, CCRIS ENTITY, SUBJECT STATUS, and KEY STATISTICS tables"""
+    return extract_report_rows(table_payload(df), file_name)
+
+
+def extract_report_rows(rows, file_name):
+    """extract_database_row() for a table_payload() (runs in a worker process)"""
+    try:
+        base_row_data = {}
+        index = ReportIndex(rows)
+        cells = index.cells
+        num_rows = index.num_rows
+        
+        # Helper function to find value in PARTICULARS table
+        def find_particulars_value(label_text):
+            """Find value from PARTICULARS OF THE SUBJECT PROVIDED BY YOU table"""
+            return index.find_value("particulars", label_text, 10)  # Search next 10 rows
+        
+        # Helper function to find value in SUMMARY CREDIT INFORMATION table
+        def find_summary_credit_value(label_text):
+            """Find value from SUMMARY CREDIT INFORMATION table"""
+            return index.find_value("summary_credit_information", label_text, 15)  # Search next 15 rows
+        
+        # Helper function to find value in CREDIT SCORE table
+        def find_credit_score_value(label_text):
+            """Find value from CREDIT SCORE table"""
+            idx = index.start("credit_score")
+            if idx is None:
+                return ""
+            
+            # Look for the specific label in the rows following the header
+            for search_idx in range(idx + 1, min(idx + 20, num_rows)):  # Search next 20 rows
+                search_row = cells[search_idx]
+                for col_idx, cell_str in enumerate(search_row):
+                    
+                    # Special handling for i-SCORE - look for numbers
+                    if "i-score" in label_text.lower():
+                        if "i-score" in cell_str.lower() or re.search(r'\bi-?score\b', cell_str, re.IGNORECASE):
+                            # Found i-SCORE label, get value from next column or same cell
+                            if col_idx + 1 < len(search_row):
+                                return search_row[col_idx + 1]
+                            # Try to extract number from same cell
+                            numbers = re.findall(r'\d+', cell_str)
+                            return numbers[0] if numbers else ""
+                    
+                    # Special handling for Key Contributing Factors - look for bullet points
+                    elif "contributing" in label_text.lower():
+                        if "contributing" in cell_str.lower() or "factor" in cell_str.lower():
+                            # Found contributing factors, collect all text from this and following rows
+                            factors_text = ""
+                            # Check current cell first
+                            if col_idx + 1 < len(search_row):
+                                factors_text += search_row[col_idx + 1]
+                            
+                            # Define section headers that indicate end of contributing factors
+                            section_headers = [
+                                "SHAREHOLDING INTEREST", "INTEREST IN COMPANY", 
+                                "SUMMARY CREDIT INFORMATION", "KEY STATISTICS",
+                                "PARTICULARS", "CREDIT REPORT", "NOTE:"
+                            ]
+                            
+                            # Check following rows for more factors
+                            for factor_idx in range(search_idx + 1, min(search_idx + 10, num_rows)):
+                                # Check if we've hit a new section header
+                                row_text = index.row_text(factor_idx)
+                                if any(header in row_text.upper() for header in section_headers):
+                                    break  # Stop collecting factors
+                                
+                                for factor_str in cells[factor_idx]:
+                                    # Look for bullet points or continuation text
+                                    if "•" in factor_str or (len(factor_str) > 10 and not any(keyword in factor_str.lower() for keyword in ["summary", "particular", "experian", "page", "note:", "shareholding"])):
+                                        if factors_text:
+                                            factors_text += " " + factor_str
+                                        else:
+                                            factors_text = factor_str
+                            
+                            return factors_text.strip()
+                    
+                    # Regular label matching
+                    elif label_text.lower() in cell_str.lower():
+                        # Found the label, get value from next column
+                        if col_idx + 1 < len(search_row):
+                            return search_row[col_idx + 1]
+            
+            return ""
+        
+        # Helper function to extract KEY STATISTICS Earliest/Latest Approved Facilities
+        def find_key_statistics_facilities():
+            """Find Earliest and Latest 3 Approved Facilities from KEY STATISTICS table"""
+            earliest_facility = {"type": "-", "date": "-"}
+            latest_facilities = []
+            key_stats_start = index.start("key_statistics")
+            
+            # Slide down from the header until a window yields a facility
+            for idx in range(key_stats_start, num_rows) if key_stats_start is not None else ():
+                # Look for Earliest and Latest facilities in the following rows
+                for search_idx in range(idx + 1, min(idx + 20, num_rows)):
+                    row_data = cells[search_idx]
+                    
+                    # Check for "Earliest Approved Facilites"
+                    for col_idx, cell_str in enumerate(row_data):
+                        if "Earliest Approved" in cell_str and "Facility Type" in cell_str:
+                            # Found Earliest row, get facility type and date from next columns
+                            if col_idx + 1 < len(row_data):
+                                earliest_facility["type"] = row_data[col_idx + 1]
+                            if col_idx + 2 < len(row_data):
+                                earliest_facility["date"] = row_data[col_idx + 2]
+                            break
+                        
+                        # Check for "Latest 3 Approved Facilites"
+                        elif "Latest 3 Approved" in cell_str or "Latest Approved" in cell_str:
+                            # Found Latest 3 header row, get first facility from same row
+                            if col_idx + 1 < len(row_data) and col_idx + 2 < len(row_data):
+                                facility_type = row_data[col_idx + 1]
+                                facility_date = row_data[col_idx + 2]
+                                if facility_type:
+                                    latest_facilities.append({"type": facility_type, "date": facility_date})
+                            
+                            # Continue looking for the remaining 2 facilities in next rows
+                            for next_idx in range(search_idx + 1, min(search_idx + 5, num_rows)):
+                                next_row_data = cells[next_idx]
+                                
+                                # Look for rows with facility type and date (should be in first few columns after blank)
+                                # Structure: [blank] | FACILITY TYPE | DATE
+                                for nc_idx in range(len(next_row_data) - 1):
+                                    if next_row_data[nc_idx] and next_row_data[nc_idx + 1]:
+                                        # Check if this looks like a facility type (all caps, has words)
+                                        if len(next_row_data[nc_idx]) > 5 and next_row_data[nc_idx].isupper():
+                                            facility_type = next_row_data[nc_idx]
+                                            facility_date = next_row_data[nc_idx + 1]
+                                            
+                                            # Validate date format (DD-MM-YYYY)
+                                            if re.match(r'\d{2}-\d{2}-\d{4}', facility_date):
+                                                latest_facilities.append({"type": facility_type, "date": facility_date})
+                                                break
+                                
+                                # Stop if we have 3 latest facilities
+                                if len(latest_facilities) >= 3:
+                                    break
+                            break
+                
+                # Stop after processing KEY STATISTICS section
+                if earliest_facility["type"] != "-" or len(latest_facilities) > 0:
+                    break
+            
+            # Ensure we have exactly 3 latest facilities (pad with empty if needed)
+            while len(latest_facilities) < 3:
+                latest_facilities.append({"type": "-", "date": "-"})
+            
+            # Only take first 3 if more were found
+            latest_facilities = latest_facilities[:3]
+            
+            return earliest_facility, latest_facilities
+        
+        # Helper function to extract SHAREHOLDING INTEREST data
+        def find_shareholding_interests():
+            """Find all business interests from SHAREHOLDING INTEREST table"""
+            interests = []
+            idx = index.start("shareholding_interest")
+            
+            # Look for the column header row (No, Name, Position, etc.)
+            for header_idx in range(idx + 1, min(idx + 10, num_rows)) if idx is not None else ():
+                header_text = "".join(cells[header_idx])
+                
+                # Check if this row contains the column headers
+                if ("No" in header_text and "Name" in header_text and "Position" in header_text and 
+                    "Appointed" in header_text):
+                    
+                    # Now look for data rows after the header
+                    for data_idx in range(header_idx + 1, min(header_idx + 50, num_rows)):
+                        row_data = cells[data_idx]
+                        
+                        # Check if this is a valid data row (starts with number)
+                        if (len(row_data) > 0 and row_data[0].isdigit() and
+                            len([x for x in row_data if x]) >= 4):  # At least 4 non-empty columns
+                            
+                            # Parse according to actual table structure:
+                            # No | Name | Position | Appointed | Business Expiry Date | Shareholding | % | Remark | Last Updated by Experian
+                            interest_data = {
+                                'No': row_data[0] if len(row_data) > 0 else "-",
+                                'Name': row_data[1] if len(row_data) > 1 else "-",
+                                'Position': row_data[2] if len(row_data) > 2 else "-",
+                                'Appointed': row_data[3] if len(row_data) > 3 else "-",
+                                'Business_Expiry_Date': row_data[4] if len(row_data) > 4 else "-",
+                                'Shareholding': row_data[5] if len(row_data) > 5 else "-",
+                                'Percentage': row_data[6] if len(row_data) > 6 else "-",
+                                'Remark': row_data[7] if len(row_data) > 7 else "-",
+                                'Last_Updated_by_Experian': row_data[8] if len(row_data) > 8 else "-"
+                            }
+                            
+                            # Clean and format data - replace empty with "-"
+                            for key, value in interest_data.items():
+                                if not value:
+                                    interest_data[key] = "-"
+                                else:
+                                    # Clean extra spaces and newlines
+                                    interest_data[key] = re.sub(r'\s+', ' ', value)
+                            
+                            interests.append(interest_data)
+                    break  # Found headers, processed data
+            
+            if not interests:
+                # Return empty interest to maintain structure
+                interests.append({
+                    'No': "-",
+                    'Name': "-",
+                    'Position': "-",
+                    'Appointed': "-",
+                    'Business_Expiry_Date': "-",
+                    'Shareholding': "-",
+                    'Percentage': "-",
+                    'Remark': "-",
+                    'Last_Updated_by_Experian': "-"
+                })
+            
+            return interests
+        
+        # Helper function to extract CCRIS ENTITY data
+        def find_ccris_entity_key():
+            """Find CCRIS Entity Key from CCRIS ENTITY SELECTED BY YOU table"""
+            idx = index.start("ccris_entity")
+            
+            # Look for CCRIS Entity Key in the following rows
+            for search_idx in range(idx + 1, min(idx + 20, num_rows)) if idx is not None else ():
+                search_row = cells[search_idx]
+                for col_idx, cell_str in enumerate(search_row):
+                    if "CCRIS Entity Key" in cell_str:
+                        # Found the label, get value from next column
+                        if col_idx + 1 < len(search_row):
+                            return search_row[col_idx + 1] or "-"
+            
+            return "-"
+        
+        # Helper function to extract SUMMARY CREDIT REPORT data
+        def find_summary_credit_data():
+            """Find data from SUMMARY CREDIT REPORT table with custom field naming"""
+            result = {
+                'A_App_No_Application': "-",
+                'A_App_Ttl_Amnt': "-", 
+                'B_Pend_No_Application': "-",
+                'B_Pend_Ttl_Amnt': "-"
+            }
+            idx = index.start("summary_credit_report")
+            
+            # Look for the specific rows in the following rows
+            for search_idx in range(idx + 1, min(idx + 20, num_rows)) if idx is not None else ():
+                row_data = cells[search_idx]
+                
+                # Check for "A. Approved for past 12 months" row
+                for col_idx, cell_str in enumerate(row_data):
+                    if "A. Approved for past 12 months" in cell_str:
+                        # Found A row, extract No. of Applications and Total Amount
+                        if col_idx + 1 < len(row_data):
+                            result['A_App_No_Application'] = row_data[col_idx + 1]
+                        if col_idx + 2 < len(row_data):
+                            result['A_App_Ttl_Amnt'] = row_data[col_idx + 2]
+                        break
+                        
+                    elif "B. Pending" in cell_str:
+                        # Found B row, extract No. of Applications and Total Amount  
+                        if col_idx + 1 < len(row_data):
+                            result['B_Pend_No_Application'] = row_data[col_idx + 1]
+                        if col_idx + 2 < len(row_data):
+                            result['B_Pend_Ttl_Amnt'] = row_data[col_idx + 2]
+                        break
+            
+            # Clean results - replace empty with "-"
+            for key, value in result.items():
+                if not value:
+                    result[key] = "-"
+            
+            return result
+
+        # Helper function to extract Subject Status data
+        def find_warning_remark():
+            """Find Warning Remark from Subject Status table"""
+            idx = index.start("subject_status")
+            
+            # Look for Warning Remark in the following rows
+            for search_idx in range(idx + 1, min(idx + 10, num_rows)) if idx is not None else ():
+                search_row = cells[search_idx]
+                for col_idx, cell_str in enumerate(search_row):
+                    if "Warning Remark" in cell_str:
+                        # Found the label, get value from next column
+                        if col_idx + 1 < len(search_row):
+                            return search_row[col_idx + 1] or "-"
+            
+            return "-"
+        
+        # Helper function to extract SUMMARY OF POTENTIAL & CURRENT LIABILITIES data
+        def find_potential_liabilities_data():
+            """Find data from SUMMARY OF POTENTIAL & CURRENT LIABILITIES table with hybrid structure"""
+            result = {
+                'AsBorr_Outstanding_RM': "-",
+                'AsBorr_Total_Limit_RM': "-",
+                'AsBorr_FEC_Limit_RM': "-",
+                'Legal_Action_Taken': "-",
+                'Special_Attention_Account': "-"
+            }
+            idx = index.start("potential_liabilities")
+            
+            # Look for the specific rows in the following rows
+            for search_idx in range(idx + 1, min(idx + 30, num_rows)) if idx is not None else ():
+                row_data = cells[search_idx]
+                
+                # Check for "As Borrower" row (row-based data with 3 values)
+                for col_idx, cell_str in enumerate(row_data):
+                    if "As Borrower" in cell_str:
+                        # Found As Borrower row, extract the 3 numeric values
+                        if col_idx + 1 < len(row_data):
+                            result['AsBorr_Outstanding_RM'] = row_data[col_idx + 1]
+                        if col_idx + 2 < len(row_data):
+                            result['AsBorr_Total_Limit_RM'] = row_data[col_idx + 2]
+                        if col_idx + 3 < len(row_data):
+                            result['AsBorr_FEC_Limit_RM'] = row_data[col_idx + 3]
+                        break
+                        
+                    elif "Legal Action Taken" in cell_str:
+                        # Found Legal Action Taken, extract value from next column
+                        if col_idx + 1 < len(row_data):
+                            result['Legal_Action_Taken'] = row_data[col_idx + 1]
+                        break
+                        
+                    elif "Special Attention Account" in cell_str:
+                        # Found Special Attention Account, extract value from next column
+                        if col_idx + 1 < len(row_data):
+                            result['Special_Attention_Account'] = row_data[col_idx + 1]
+                        break
+            
+            # Clean results - replace empty with "-"
+            for key, value in result.items():
+                if not value:
+                    result[key] = "-"
+            
+            return result
+        
+        # Helper function to extract Legal Suits and Bankruptcy data
+        def find_legal_suits_bankruptcy_data():
+            """Find data from Legal Suits and Bankruptcy tables where totals are in headers"""
+            result = {
+                'Legal_Suits_Defendant': "-",
+                'Legal_Suits_Plaintiff': "-",
+                'Bankruptcy_Action': "-"
+            }
+            
+            # Only rows carrying one of these headers can contribute
+            header_rows = sorted(set(index.sections["legal_suits"]) | set(index.sections["bankruptcy_action"]))
+            for idx in header_rows:
+                for cell_str in cells[idx]:
+                    
+                    # Check for "LEGAL SUITS - SUBJECT AS DEFENDANT Total: X"
+                    if "LEGAL SUITS" in cell_str.upper() and "SUBJECT AS DEFENDANT" in cell_str.upper() and "TOTAL" in cell_str.upper():
+                        # Extract number from "Total: 0" pattern
+                        match = re.search(r'Total:\s*(\d+)', cell_str, re.IGNORECASE)
+                        if match:
+                            result['Legal_Suits_Defendant'] = match.group(1)
+                    
+                    # Check for "LEGAL SUITS - SUBJECT AS PLAINTIFF Total: X"
+                    elif "LEGAL SUITS" in cell_str.upper() and "SUBJECT AS PLAINTIFF" in cell_str.upper() and "TOTAL" in cell_str.upper():
+                        # Extract number from "Total: 0" pattern
+                        match = re.search(r'Total:\s*(\d+)', cell_str, re.IGNORECASE)
+                        if match:
+                            result['Legal_Suits_Plaintiff'] = match.group(1)
+                    
+                    # Check for "BANKRUPTCY ACTION" header
+                    elif "BANKRUPTCY ACTION" in cell_str.upper():
+                        # Look for "Total: X" in the following rows
+                        for search_idx in range(idx + 1, min(idx + 5, num_rows)):
+                            for search_str in cells[search_idx]:
+                                if "Total:" in search_str or "Total :" in search_str:
+                                    # Extract number from "Total: 0" pattern
+                                    match = re.search(r'Total:\s*(\d+)', search_str, re.IGNORECASE)
+                                    if match:
+                                        result['Bankruptcy_Action'] = match.group(1)
+                                        break
+                            
+                            if result['Bankruptcy_Action'] != "-":
+                                break
+            
+            return result
+        
+        # Helper function to extract KEY STATISTICS data
+        def find_key_statistics_data():
+            """Find data from KEY STATISTICS table"""
+            result = {
+                'SF_No_of_Facilities': "-",
+                'SF_Total_Outstanding_Balance_RM': "-",
+                'SF_Total_Outstanding_Balance_Against_Total_Limit': "-",
+                'SF_Highest_No_of_Installments_Arrears_Last_12_months': "-",
+                'UF_No_of_Facilities': "-",
+                'UF_Total_Outstanding_Balance_RM': "-",
+                'UF_Total_Outstanding_Balance_Against_Total_Limit': "-",
+                'UF_Highest_No_of_Installments_Arrears_Last_12_months': "-",
+                'CC_Average_Utilisation_Last_6_months': "-",
+                'ORC_Average_Utilisation_Last_6_months': "-",
+                'CHC_Min_Utilisation_Last_12_months_RM': "-",
+                'CHC_Max_Utilisation_Last_12_months_RM': "-",
+                'NHEF_No_of_Accounts': "-",
+                'LL_No_of_Accounts': "-",
+                'FL_No_of_Accounts': "-"
+            }
+            key_stats_rows = set(index.sections["key_statistics"])
+            key_stats_start_idx = index.start("key_statistics")
+            
+            # Track which section we're in
+            current_section = None
+            
+            for idx in range(key_stats_start_idx, num_rows) if key_stats_start_idx is not None else ():
+                # A repeated KEY STATISTICS header restarts the row budget
+                if idx in key_stats_rows:
+                    key_stats_start_idx = idx
+                
+                row_data = cells[idx]
+                
+                # Identify section headers
+                for col_idx, cell_str in enumerate(row_data):
+                    if "Secured Facilities" in cell_str:
+                        current_section = "SF"
+                    elif "Unsecured Facilities" in cell_str:
+                        current_section = "UF"
+                    elif cell_str == "Credit Card":
+                        current_section = "CC"
+                    elif "Other Revolving Credits" in cell_str:
+                        current_section = "ORC"
+                    elif "Charge Card" in cell_str:
+                        current_section = "CHC"
+                    elif "National Higher Educational Financing" in cell_str:
+                        current_section = "NHEF"
+                    elif "Local Lenders" in cell_str:
+                        current_section = "LL"
+                    elif "Foreign Lenders" in cell_str:
+                        current_section = "FL"
+                    
+                    # Extract data based on current section
+                    if current_section == "SF":
+                        if "No. of Facilities" in cell_str and col_idx + 1 < len(row_data):
+                            result['SF_No_of_Facilities'] = row_data[col_idx + 1]
+                        elif "Total Outstanding Balance (RM)" in cell_str and col_idx + 1 < len(row_data):
+                            result['SF_Total_Outstanding_Balance_RM'] = row_data[col_idx + 1]
+                        elif "Total Outstanding Balance Against Total Limit" in cell_str and col_idx + 1 < len(row_data):
+                            result['SF_Total_Outstanding_Balance_Against_Total_Limit'] = row_data[col_idx + 1]
+                        elif "Highest No. of Installments Arrears Last 12 months" in cell_str and col_idx + 1 < len(row_data):
+                            result['SF_Highest_No_of_Installments_Arrears_Last_12_months'] = row_data[col_idx + 1]
+                    
+                    elif current_section == "UF":
+                        if "No. of Facilities" in cell_str and col_idx + 1 < len(row_data):
+                            result['UF_No_of_Facilities'] = row_data[col_idx + 1]
+                        elif "Total Outstanding Balance (RM)" in cell_str and col_idx + 1 < len(row_data):
+                            result['UF_Total_Outstanding_Balance_RM'] = row_data[col_idx + 1]
+                        elif "Total Outstanding Balance Against Total Limit" in cell_str and col_idx + 1 < len(row_data):
+                            result['UF_Total_Outstanding_Balance_Against_Total_Limit'] = row_data[col_idx + 1]
+                        elif "Highest No. of Installments Arrears Last 12 months" in cell_str and col_idx + 1 < len(row_data):
+                            result['UF_Highest_No_of_Installments_Arrears_Last_12_months'] = row_data[col_idx + 1]
+                    
+                    elif current_section == "CC":
+                        if "Average Utilisation Last 6 months" in cell_str and col_idx + 1 < len(row_data):
+                            result['CC_Average_Utilisation_Last_6_months'] = row_data[col_idx + 1]
+                    
+                    elif current_section == "ORC":
+                        if "Average Utilisation Last 6 months" in cell_str and col_idx + 1 < len(row_data):
+                            result['ORC_Average_Utilisation_Last_6_months'] = row_data[col_idx + 1]
+                    
+                    elif current_section == "CHC":
+                        if "Min Utilisation Last 12 months (RM)" in cell_str and col_idx + 1 < len(row_data):
+                            result['CHC_Min_Utilisation_Last_12_months_RM'] = row_data[col_idx + 1]
+                        elif "Max Utilisation Last 12 months (RM)" in cell_str and col_idx + 1 < len(row_data):
+                            result['CHC_Max_Utilisation_Last_12_months_RM'] = row_data[col_idx + 1]
+                    
+                    elif current_section == "NHEF":
+                        if "No. of Accounts" in cell_str and col_idx + 1 < len(row_data):
+                            result['NHEF_No_of_Accounts'] = row_data[col_idx + 1]
+                    
+                    elif current_section == "LL":
+                        if "No. of Accounts" in cell_str and col_idx + 1 < len(row_data):
+                            result['LL_No_of_Accounts'] = row_data[col_idx + 1]
+                    
+                    elif current_section == "FL":
+                        if "No. of Accounts" in cell_str and col_idx + 1 < len(row_data):
+                            result['FL_No_of_Accounts'] = row_data[col_idx + 1]
+                
+                # Stop after sufficient rows (typically within 40-50 rows from start)
+                if idx > key_stats_start_idx + 50:
+                    break
+            
+            # Clean results - replace empty with "-"
+            for key, value in result.items():
+                if not value:
+                    result[key] = "-"
+            
+            return result
+        
+        # Helper function to extract TRADE / CREDIT REFERENCE data (can have multiple records)
+        def find_trade_credit_reference_data():
+            """Find all data from TRADE / CREDIT REFERENCE (CR) table - returns list of records"""
+            trade_records = []  # Store multiple trade/credit reference records
+            current_record = {}
+            trade_rows = set(index.sections["trade_credit_reference"])
+            trade_start_idx = index.start("trade_credit_reference")
+            
+            # Mapping of label patterns to result keys
+            label_mapping = {
+                'Subject Name': 'TCR_Subject_Name',
+                'Creditor\'s Name': 'TCR_Creditors_Name',
+                'Creditor\'s Contact': 'TCR_Creditors_Contact',
+                'Ref No': 'TCR_Ref_No',
+                'Industry': 'TCR_Industry',
+                'Solicitor\'s Name': 'TCR_Solicitors_Name',
+                'Guarantor / Owner': 'TCR_Guarantor_Owner',
+                'Subject ID': 'TCR_Subject_ID',
+                'Amount Due': 'TCR_Amount_Due',
+                'Aging Days': 'TCR_Aging_Days',
+                'Debt Type': 'TCR_Debt_Type',
+                'Document/Status Date': 'TCR_Document_Status_Date',
+                'Solicitor\'s Contact': 'TCR_Solicitors_Contact',
+                'Remark': 'TCR_Remark'
+            }
+            
+            for idx in range(trade_start_idx, num_rows) if trade_start_idx is not None else ():
+                # A repeated table header restarts the row budget
+                if idx in trade_rows:
+                    trade_start_idx = idx
+                
+                # Extract label-value pairs from the table
+                row_data = cells[idx]
+                
+                # Check if this row starts a new record (contains 'Creditor's Name')
+                has_creditor_name = False
+                for col_idx, cell_str in enumerate(row_data):
+                    if cell_str == "Creditor's Name" and col_idx + 1 < len(row_data):
+                        if row_data[col_idx + 1]:
+                            # Save previous record if it exists
+                            if current_record and current_record.get('TCR_Creditors_Name', '-') != '-':
+                                trade_records.append(current_record)
+                            # Start new record
+                            current_record = {key: "-" for key in label_mapping.values()}
+                            has_creditor_name = True
+                            break
+                
+                # Extract all fields in current row (labels are exact cell texts)
+                for col_idx, cell_str in enumerate(row_data):
+                    result_key = label_mapping.get(cell_str)
+                    if result_key and col_idx + 1 < len(row_data):
+                        value = row_data[col_idx + 1]
+                        if value:
+                            if current_record or has_creditor_name:
+                                if not current_record:
+                                    current_record = {key: "-" for key in label_mapping.values()}
+                                current_record[result_key] = value
+                
+                # Stop after finding enough data rows
+                if idx > trade_start_idx + 30:
+                    break
+            
+            # Add last record if exists
+            if current_record and current_record.get('TCR_Creditors_Name', '-') != '-':
+                trade_records.append(current_record)
+            
+            # If no records found, return empty list (will use default "-" in row generation)
+            return trade_records
+        
+        # Helper function to extract NON-BANK LENDER CREDIT INFORMATION data
+        def find_nlci_data():
+            """Find data from NON-BANK LENDER CREDIT INFORMATION (NLCI) table only"""
+            result = {
+                'Ttl_Limit': "-",
+                'Ttl_Outstanding': "-",
+                'Conduct_Highest_Value': "-"
+            }
+            
+            conduct_values = []  # Store all conduct values to find highest
+            
+            # Find the exact boundaries of NLCI table: it ends before the first WRITTEN-OFF
+            # ACCOUNT at or after its header and starts at the last NLCI header before that
+            nlci_rows = index.sections["nlci"]
+            if not nlci_rows:
+                return result
+            
+            written_off_rows = index.sections["written_off"]
+            end_pos = bisect_left(written_off_rows, nlci_rows[0])
+            if end_pos < len(written_off_rows):
+                nlci_end_idx = written_off_rows[end_pos]
+                nlci_start_idx = nlci_rows[bisect_right(nlci_rows, nlci_end_idx) - 1]
+            else:
+                # Set end boundary if not found
+                nlci_start_idx = nlci_rows[-1]
+                nlci_end_idx = min(nlci_start_idx + 50, num_rows)
+            
+            # Now extract data only from within NLCI table boundaries
+            for search_idx in range(nlci_start_idx + 1, min(nlci_end_idx, num_rows)):
+                row_data = cells[search_idx]
+                
+                # Check for "TOTAL" row to extract Ttl_Limit and Ttl_Outstanding
+                # The row structure is: TOTAL  1,198.00  [empty cells]  TOTAL  675.28
+                total_count = 0
+                for col_idx, cell_str in enumerate(row_data):
+                    if cell_str.upper() == "TOTAL":
+                        total_count += 1
+                        
+                        # First TOTAL - get Ttl_Limit (next numeric value)
+                        if total_count == 1:
+                            for offset in range(1, min(10, len(row_data) - col_idx)):
+                                val = row_data[col_idx + offset].replace(',', '').strip()
+                                if val and re.match(r'^\d+\.?\d*$', val):
+                                    result['Ttl_Limit'] = row_data[col_idx + offset]
+                                    break
+                        
+                        # Second TOTAL - get Ttl_Outstanding (next numeric value)
+                        elif total_count == 2:
+                            for offset in range(1, min(10, len(row_data) - col_idx)):
+                                val = row_data[col_idx + offset].replace(',', '').strip()
+                                if val and re.match(r'^\d+\.?\d*$', val):
+                                    result['Ttl_Outstanding'] = row_data[col_idx + offset]
+                                    break
+                            break  # Found both totals, exit loop
+                
+                # Collect all numeric values from "Conduct of Account" columns within NLCI section
+                # Look for rows that contain BNPL (Buy Now Pay Later) to confirm it's NLCI data
+                row_upper = [cell_str.upper() for cell_str in row_data]
+                is_nlci_row = any("BNPL" in cell_upper for cell_upper in row_upper)
+                
+                if is_nlci_row or any("OUTSTANDING CREDIT" in cell_upper for cell_upper in row_upper):
+                    # These appear in the right side of the table (after many columns)
+                    for col_idx, cell_str in enumerate(row_data):
+                        # Skip first few columns (No, date, capacity, etc.)
+                        if col_idx > 10:  # Conduct columns are typically after column 10
+                            val = cell_str.replace(',', '').strip()
+                            # Check if it's a small integer (conduct values are typically 0-9)
+                            if val and re.match(r'^\d+$', val):
+                                num_val = int(val)
+                                if 0 <= num_val <= 99:  # Reasonable range for conduct values
+                                    conduct_values.append(num_val)
+            
+            # Find highest conduct value
+            if conduct_values:
+                highest = max(conduct_values)
+                result['Conduct_Highest_Value'] = str(highest)
+            
+            return result
+
+        # Extract base data from all tables (common to all rows)
+        base_row_data['Subject_Name'] = find_particulars_value("Name Of Subject")
+        base_row_data['IC_PP_No'] = find_particulars_value("IC / PP No") 
+        base_row_data['New_IC_No'] = find_particulars_value("New IC No")
+        base_row_data['Your_Ref_No'] = find_particulars_value("Your Ref. No")
+        base_row_data['Nationality'] = find_particulars_value("Nationality")
+        
+        # Extract SUMMARY CREDIT REPORT data with custom field naming
+        summary_credit_data = find_summary_credit_data()
+        base_row_data['A_App_No_Application'] = summary_credit_data['A_App_No_Application']
+        base_row_data['A_App_Ttl_Amnt'] = summary_credit_data['A_App_Ttl_Amnt']
+        base_row_data['B_Pend_No_Application'] = summary_credit_data['B_Pend_No_Application']
+        base_row_data['B_Pend_Ttl_Amnt'] = summary_credit_data['B_Pend_Ttl_Amnt']
+        
+        # Extract SUMMARY OF POTENTIAL & CURRENT LIABILITIES data with hybrid structure
+        potential_liabilities_data = find_potential_liabilities_data()
+        base_row_data['AsBorr_Outstanding_RM'] = potential_liabilities_data['AsBorr_Outstanding_RM']
+        base_row_data['AsBorr_Total_Limit_RM'] = potential_liabilities_data['AsBorr_Total_Limit_RM']
+        base_row_data['AsBorr_FEC_Limit_RM'] = potential_liabilities_data['AsBorr_FEC_Limit_RM']
+        base_row_data['Legal_Action_Taken'] = potential_liabilities_data['Legal_Action_Taken']
+        base_row_data['Special_Attention_Account'] = potential_liabilities_data['Special_Attention_Account']
+        
+        # Extract Legal Suits and Bankruptcy data (totals in headers)
+        legal_suits_bankruptcy_data = find_legal_suits_bankruptcy_data()
+        base_row_data['Legal_Suits_Defendant'] = legal_suits_bankruptcy_data['Legal_Suits_Defendant']
+        base_row_data['Legal_Suits_Plaintiff'] = legal_suits_bankruptcy_data['Legal_Suits_Plaintiff']
+        base_row_data['Bankruptcy_Action'] = legal_suits_bankruptcy_data['Bankruptcy_Action']
+        
+        # Extract NON-BANK LENDER CREDIT INFORMATION data
+        nlci_data = find_nlci_data()
+        base_row_data['Ttl_Limit'] = nlci_data['Ttl_Limit']
+        base_row_data['Ttl_Outstanding'] = nlci_data['Ttl_Outstanding']
+        base_row_data['Conduct_Highest_Value'] = nlci_data['Conduct_Highest_Value']
+        
+        # Extract KEY STATISTICS data
+        key_stats_data = find_key_statistics_data()
+        base_row_data['SF_No_of_Facilities'] = key_stats_data['SF_No_of_Facilities']
+        base_row_data['SF_Total_Outstanding_Balance_RM'] = key_stats_data['SF_Total_Outstanding_Balance_RM']
+        base_row_data['SF_Total_Outstanding_Balance_Against_Total_Limit'] = key_stats_data['SF_Total_Outstanding_Balance_Against_Total_Limit']
+        base_row_data['SF_Highest_No_of_Installments_Arrears_Last_12_months'] = key_stats_data['SF_Highest_No_of_Installments_Arrears_Last_12_months']
+        base_row_data['UF_No_of_Facilities'] = key_stats_data['UF_No_of_Facilities']
+        base_row_data['UF_Total_Outstanding_Balance_RM'] = key_stats_data['UF_Total_Outstanding_Balance_RM']
+        base_row_data['UF_Total_Outstanding_Balance_Against_Total_Limit'] = key_stats_data['UF_Total_Outstanding_Balance_Against_Total_Limit']
+        base_row_data['UF_Highest_No_of_Installments_Arrears_Last_12_months'] = key_stats_data['UF_Highest_No_of_Installments_Arrears_Last_12_months']
+        base_row_data['CC_Average_Utilisation_Last_6_months'] = key_stats_data['CC_Average_Utilisation_Last_6_months']
+        base_row_data['ORC_Average_Utilisation_Last_6_months'] = key_stats_data['ORC_Average_Utilisation_Last_6_months']
+        base_row_data['CHC_Min_Utilisation_Last_12_months_RM'] = key_stats_data['CHC_Min_Utilisation_Last_12_months_RM']
+        base_row_data['CHC_Max_Utilisation_Last_12_months_RM'] = key_stats_data['CHC_Max_Utilisation_Last_12_months_RM']
+        base_row_data['NHEF_No_of_Accounts'] = key_stats_data['NHEF_No_of_Accounts']
+        base_row_data['LL_No_of_Accounts'] = key_stats_data['LL_No_of_Accounts']
+        base_row_data['FL_No_of_Accounts'] = key_stats_data['FL_No_of_Accounts']
+        
+        # Extract TRADE / CREDIT REFERENCE data (can be multiple records)
+        trade_credit_records = find_trade_credit_reference_data()
+        
+        # Keep the remaining SUMMARY CREDIT INFORMATION fields (if they still exist in the PDF)
+        base_row_data['Legal_Action_Banking'] = find_summary_credit_value("Legal Action taken (from Banking)")
+        base_row_data['Existing_Facilities'] = find_summary_credit_value("Existing No. of Facility (from Banking)")
+        base_row_data['Bankruptcy_Record'] = find_summary_credit_value("Bankruptcy Record")
+        base_row_data['Legal_Suits'] = find_summary_credit_value("Legal Suits")
+        base_row_data['Trade_Credit_Reference'] = find_summary_credit_value("Trade / Credit Reference")
+        base_row_data['Total_Enquiries_12m'] = find_summary_credit_value("Total Enquiries for Last 12 months")
+        base_row_data['Total_Companies_Interest'] = find_summary_credit_value("Total Companies/Businesses Interest")
+        
+        # Extract i-SCORE and calculate Risk Grade
+        iscore_str = find_credit_score_value("i-SCORE")
+        
+        # Clean and extract numeric value from i-SCORE
+        iscore_clean = ""
+        iscore_num = 0
+        if iscore_str:
+            # Remove any non-numeric characters and extract numbers
+            numbers = re.findall(r'\d+', str(iscore_str))
+            if numbers:
+                iscore_clean = numbers[0]  # Take first number found
+                try:
+                    iscore_num = int(iscore_clean)
+                except:
+                    iscore_num = 0
+            else:
+                pass
+        
+        # Calculate risk grade
+        risk_grade = ""
+        if iscore_num > 0:
+            risk_grade_num = risk_grade_from_score(iscore_num)
+            risk_grade = str(risk_grade_num) if risk_grade_num else ""
+        else:
+            pass
+        
+        base_row_data['i_SCORE'] = iscore_clean if iscore_clean else iscore_str
+        base_row_data['Risk_Grade'] = risk_grade
+        
+        # Extract CCRIS ENTITY data
+        base_row_data['CCRIS_Entity_Key'] = find_ccris_entity_key()
+        
+        # Extract Subject Status data
+        base_row_data['Warning_Remark'] = find_warning_remark()
+        
+        # Extract Key Contributing Factors
+        contributing_factors_raw = find_credit_score_value("Key Contributing Factors")
+        
+        # Process contributing factors
+        contributing_factors = []
+        if contributing_factors_raw and len(contributing_factors_raw.strip()) > 0:
+            clean_text = contributing_factors_raw.strip()
+            
+            if "•" in clean_text:
+                # Split by bullet points
+                parts = clean_text.split("•")
+                for part in parts:
+                    cleaned_part = part.strip()
+                    if cleaned_part and len(cleaned_part) > 3:
+                        cleaned_part = re.sub(r'^[\s\-\*•]+', '', cleaned_part)
+                        cleaned_part = re.sub(r'[\s\-\*•]+$', '', cleaned_part)
+                        if cleaned_part:
+                            contributing_factors.append(cleaned_part)
+            else:
+                # Single factor
+                contributing_factors.append(clean_text)
+        
+        if not contributing_factors:
+            contributing_factors.append("")  # Empty factor to maintain structure
+        
+        
+        # Extract SHAREHOLDING INTEREST data
+        shareholding_interests = find_shareholding_interests()
+        
+        # Extract KEY STATISTICS Earliest/Latest Approved Facilities
+        earliest_facility, latest_facilities = find_key_statistics_facilities()
+        
+        # Determine row count: Use MAXIMUM of three tables
+        # 1. Shareholding Interests (can be multiple)
+        # 2. Trade/Credit Reference (can be multiple)
+        # 3. Latest Facilities (up to 3)
+        shareholding_count = len(shareholding_interests)
+        trade_credit_count = len(trade_credit_records)
+        latest_facilities_count = len(latest_facilities)
+        
+        max_row_count = max(shareholding_count, trade_credit_count, latest_facilities_count)
+        
+        
+        # Combine contributing factors into single string (not multiplying)
+        factors_combined = " | ".join(contributing_factors) if contributing_factors else "-"
+        
+        # Create rows based on maximum count
+        result_rows = []
+        
+        for row_idx in range(max_row_count):
+            row_data = base_row_data.copy()
+            
+            # Add contributing factor data (same for all rows)
+            row_data['Key_Contributing_Factor'] = factors_combined
+            
+            # Add shareholding interest data (cycle through if not enough)
+            if shareholding_count > 0:
+                interest = shareholding_interests[row_idx % shareholding_count]
+            else:
+                interest = {'No': "-", 'Name': "-", 'Position': "-", 'Appointed': "-",
+                           'Business_Expiry_Date': "-", 'Shareholding': "-", 'Percentage': "-",
+                           'Remark': "-", 'Last_Updated_by_Experian': "-"}
+            
+            row_data['No'] = interest['No']
+            row_data['Name'] = interest['Name']
+            row_data['Position'] = interest['Position']
+            row_data['Appointed'] = interest['Appointed']
+            row_data['Business_Expiry_Date'] = interest['Business_Expiry_Date']
+            row_data['Shareholding'] = interest['Shareholding']
+            row_data['Percentage'] = interest['Percentage']
+            row_data['Remark'] = interest['Remark']
+            row_data['Last_Updated_by_Experian'] = interest['Last_Updated_by_Experian']
+            
+            # Add Trade/Credit Reference data (cycle through if not enough)
+            if trade_credit_count > 0:
+                tcr = trade_credit_records[row_idx % trade_credit_count]
+            else:
+                tcr = {'TCR_Subject_Name': "-", 'TCR_Creditors_Name': "-", 'TCR_Creditors_Contact': "-",
+                      'TCR_Ref_No': "-", 'TCR_Industry': "-", 'TCR_Solicitors_Name': "-",
+                      'TCR_Guarantor_Owner': "-", 'TCR_Subject_ID': "-", 'TCR_Amount_Due': "-",
+                      'TCR_Aging_Days': "-", 'TCR_Debt_Type': "-", 'TCR_Document_Status_Date': "-",
+                      'TCR_Solicitors_Contact': "-", 'TCR_Remark': "-"}
+            
+            row_data['TCR_Subject_Name'] = tcr['TCR_Subject_Name']
+            row_data['TCR_Creditors_Name'] = tcr['TCR_Creditors_Name']
+            row_data['TCR_Creditors_Contact'] = tcr['TCR_Creditors_Contact']
+            row_data['TCR_Ref_No'] = tcr['TCR_Ref_No']
+            row_data['TCR_Industry'] = tcr['TCR_Industry']
+            row_data['TCR_Solicitors_Name'] = tcr['TCR_Solicitors_Name']
+            row_data['TCR_Guarantor_Owner'] = tcr['TCR_Guarantor_Owner']
+            row_data['TCR_Subject_ID'] = tcr['TCR_Subject_ID']
+            row_data['TCR_Amount_Due'] = tcr['TCR_Amount_Due']
+            row_data['TCR_Aging_Days'] = tcr['TCR_Aging_Days']
+            row_data['TCR_Debt_Type'] = tcr['TCR_Debt_Type']
+            row_data['TCR_Document_Status_Date'] = tcr['TCR_Document_Status_Date']
+            row_data['TCR_Solicitors_Contact'] = tcr['TCR_Solicitors_Contact']
+            row_data['TCR_Remark'] = tcr['TCR_Remark']
+            
+            # Add KEY STATISTICS Earliest Approved Facility (same for all rows)
+            row_data['EAF_Facility_Type'] = earliest_facility['type']
+            row_data['EAF_Date_Approved'] = earliest_facility['date']
+            
+            # Add KEY STATISTICS Latest Approved Facility (cycle through if not enough)
+            if latest_facilities_count > 0:
+                latest_facility = latest_facilities[row_idx % latest_facilities_count]
+            else:
+                latest_facility = {'type': "-", 'date': "-"}
+            
+            row_data['LAF_Facility_Type'] = latest_facility['type']
+            row_data['LAF_Date_Approved'] = latest_facility['date']
+            
+            result_rows.append(row_data)
+            
+        
+        return result_rows
+        
+    except Exception as e:
+        print(f"Error extracting data from {file_name}: {e}")
+        return None
+
+
+def _extract_shard(shard):
+    # Worker side of build_database: [(file_name, payload)] -> [(file_name, rows)]
+    return [(file_name, extract_report_rows(payload, file_name)) for file_name, payload in shard]
+
+
+def _failed_shard(shard, error):
+    # Rows for a shard whose worker failed: None for each file, counted as a failed extraction
+    file_names = [file_name for file_name, _ in shard]
+    print(f"⚠️  Extraction failed for {', '.join(file_names)}: {error_message(error)}")
+    return [(file_name, None) for file_name in file_names]
+
+
+def _run_shards(shards, workers):
+    # Yield (shard index, [(file_name, rows)]) as shards finish, on a fresh pool after a worker dies
+    queued = list(range(len(shards)))[::-1]  # Popped from the end
+    pool = ProcessPoolExecutor(max_workers=workers)
+    pool_used = False  # Anything submitted to the current pool yet
+    broken = False  # A worker died; the pool takes no more work
+    try:
+        futures = {}
+        while queued or futures:
+            if broken and not futures:
+                # Everything that was in flight has been reported; carry on with a fresh pool
+                pool.shutdown(wait=True, cancel_futures=True)
+                pool = ProcessPoolExecutor(max_workers=workers)
+                pool_used = broken = False
+
+            # One shard per worker in flight, so a crash only takes down shards that had started
+            while not broken and queued and len(futures) < workers:
+                shard_idx = queued.pop()
+                try:
+                    futures[pool.submit(_extract_shard, shards[shard_idx])] = shard_idx
+                except BrokenProcessPool as e:
+                    if pool_used:
+                        queued.append(shard_idx)  # Not started yet - run it on the next pool
+                        broken = True
+                    else:
+                        # Even a fresh pool cannot take work; report the shard instead of retrying forever
+                        yield shard_idx, _failed_shard(shards[shard_idx], e)
+                    continue
+                pool_used = True
+
+            if not futures:
+                continue
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                shard_idx = futures.pop(future)
+                try:
+                    shard_rows = future.result()
+                except Exception as e:
+                    # Worker crashed (e.g. out of memory) or the shard could not be sent to it
+                    broken = broken or isinstance(e, BrokenProcessPool)
+                    shard_rows = _failed_shard(shards[shard_idx], e)
+                yield shard_idx, shard_rows
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def extract_files(items, workers=None):
+    """Yield (file_name, rows) for [(file_name, payload)] in input order
+
+    Files are sharded across a process pool; a single worker (or file)
+    runs inline. If a worker dies, the files of the shards that were
+    running yield None rows (failed extractions) and the remaining shards
+    carry on in a fresh pool.
+    """
+    workers = min(workers or default_worker_count(), len(items))
+    if workers <= 1:
+        for file_name, payload in items:
+            yield file_name, extract_report_rows(payload, file_name)
+        return
+
+    # A few shards per worker keeps them all busy without a round trip per file
+    shard_size = max(1, min(25, -(-len(items) // (workers * 4))))
+    shards = [items[start:start + shard_size] for start in range(0, len(items), shard_size)]
+
+    finished = {}  # Shards that finished ahead of an earlier one: {shard index: rows}
+    next_shard = 0
+    for shard_idx, shard_rows in _run_shards(shards, workers):
+        finished[shard_idx] = shard_rows
+        while next_shard in finished:
+            yield from finished.pop(next_shard)
+            next_shard += 1
+
+
+def build_database(file_previews, progress=None, workers=None, row_cache=None, dirty=None):
+    """Build the combined database from {file_name: preview DataFrame}
+
+    Files are extracted in parallel (see extract_files) and merged back
+    in file_previews order. progress, if given, is called with
+    (file_idx, total_files, file_name) as each file is merged.
+
+    row_cache ({file_name: (preview hash, rows)}) makes rebuilds
+    incremental: it is updated in place, and a file is only re-extracted
+    when its preview hash changed. With dirty (the files whose previews
+    changed since the last build), cached files outside it are reused
+    without even being hashed. Returns (database_df,
+    successful_extractions, failed_extractions).
+    """
+    all_files = list(file_previews.keys())
+    print(f"🏗️  Building 7-table database from {len(all_files)} files...")
+    database_rows = []
+    successful_extractions = 0
+    failed_extractions = 0
+    total_files = len(all_files)
+
+    if row_cache is None:
+        row_cache = {}
+    for file_name in list(row_cache):
+        if file_name not in file_previews or file_previews[file_name].empty:
+            del row_cache[file_name]  # File no longer loaded or cleared
+
+    jobs = []
+    hashes = {}
+    for file_name, df in file_previews.items():
+        if df.empty or (dirty is not None and file_name not in dirty and file_name in row_cache):
+            continue
+        payload = table_payload(df)
+        hashes[file_name] = ccris_cache.make_key(payload)
+        cached = row_cache.get(file_name)
+        if cached is None or cached[0] != hashes[file_name]:
+            jobs.append((file_name, payload))
+
+    if row_cache:
+        print(f"♻️  Re-extracting {len(jobs)} changed files, reusing {len(all_files) - len(jobs)} unchanged")
+    results = extract_files(jobs, workers)
+    pending = {file_name for file_name, _ in jobs}
+
+    for file_idx, file_name in enumerate(all_files):
+        if progress:
+            progress(file_idx, total_files, file_name)
+
+        print(f"\n📄 Processing file {file_idx + 1}/{total_files}: {file_name}")
+        df = file_previews[file_name]
+        if df.empty:
+            failed_extractions += 1
+            continue
+
+        # Rows extracted for this file (can be multiple rows), spliced in from the cache if unchanged
+        if file_name in pending:
+            _, extracted_rows = next(results)
+            # A failed file is not cached so the next build extracts it again
+            if extracted_rows is not None:
+                row_cache[file_name] = (hashes[file_name], extracted_rows)
+        else:
+            extracted_rows = row_cache[file_name][1]
+
+        if extracted_rows and isinstance(extracted_rows, list):
+            # Multiple rows returned (multiple contributing factors)
+            valid_rows = [row for row in extracted_rows if row and any(row.values())]
+            if valid_rows:
+                # File_Name first so every record can be traced (and indexed) by its source PDF
+                database_rows.extend({'File_Name': file_name, **row} for row in valid_rows)
+                successful_extractions += 1
+                # Debug: Show sample of extracted data
+                sample_row = valid_rows[0]
+                print(f"   📋 Sample data: i-SCORE={sample_row.get('i_SCORE', 'N/A')}, Risk_Grade={sample_row.get('Risk_Grade', 'N/A')}")
+                print(f"   📋 Contributing Factor: {sample_row.get('Key_Contributing_Factor', 'N/A')[:50]}...")
+            else:
+                failed_extractions += 1
+        else:
+            failed_extractions += 1
+
+    # Create database DataFrame
+    if database_rows:
+        database_df = pd.DataFrame(database_rows)
+    else:
+        database_df = pd.DataFrame()
+
+    return database_df, successful_extractions, failed_extractions
@@ -0,0 +1,983 @@
+"""PDF extraction engine for the CCRIS / Experian PDF to Excel converter.
+
+Nothing in here touches Tk, so these functions can run inside worker
+processes while PDFtoExcelApp only collects the results.
+"""
+import gc
+import inspect
+import io
+import json
+import os
+import re
+import threading
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+import fitz  # PyMuPDF
+import pandas as pd
+import pdfplumber
+import psutil
+
+import ccris_cache
+
+# Bump whenever extraction output changes so cached results are not reused
+EXTRACTOR_VERSION = 1
+
+
+def default_pages_per_chunk():
+    """Smallest page range a long report is split into (CCRIS_PAGES_PER_CHUNK env var, else 8)"""
+    try:
+        return max(1, int(os.environ.get("CCRIS_PAGES_PER_CHUNK", "8")))
+    except ValueError:
+        return 8
+
+
+def default_memory_budget():
+    """Memory budget in bytes for a batch (CCRIS_MEMORY_MB env var, else half of physical RAM)"""
+    configured = os.environ.get("CCRIS_MEMORY_MB")
+    if configured:
+        try:
+            return max(64, int(configured)) * 1024 * 1024
+        except ValueError:
+            pass
+    return psutil.virtual_memory().total // 2
+
+
+def memory_in_use():
+    """Resident memory of this process plus its worker processes, in bytes"""
+    process = psutil.Process()
+    total = process.memory_info().rss
+    for child in process.children(recursive=True):
+        try:
+            total += child.memory_info().rss
+        except psutil.Error:
+            continue  # Worker exited between listing and reading
+    return total
+
+
+def _run_task(func, args, kwargs, worker_budget):
+    # Worker-side wrapper: drop cached documents once this worker outgrows its share
+    try:
+        return func(*args, **kwargs)
+    finally:
+        if psutil.Process().memory_info().rss > worker_budget:
+            document_cache.clear()
+            gc.collect()
+
+
+def page_count(pdf_path):
+    """Number of pages in a PDF (0 if it cannot be opened)"""
+    try:
+        with fitz.open(pdf_path) as doc:
+            return doc.page_count
+    except Exception:
+        return 0
+
+
+def default_worker_count():
+    """Number of worker processes to use (CCRIS_WORKERS env var, else CPU count)"""
+    configured = os.environ.get("CCRIS_WORKERS")
+    if configured:
+        try:
+            return max(1, int(configured))
+        except ValueError:
+            pass
+    return os.cpu_count() or 1
+
+
+class DocumentSession:
+    """One PDF read into memory once, with PyMuPDF and pdfplumber views over the same bytes
+
+    Both views are opened lazily on first use. Neither library is thread-safe,
+    so hold fitz_lock / plumber_lock while using the matching view.
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+        with open(self.path, "rb") as f:
+            self.data = f.read()
+        self.fitz_lock = threading.RLock()
+        self.plumber_lock = threading.RLock()
+        self.users = 0  # Number of callers currently holding this session
+        self.evicted = False
+        self._fitz_doc = None
+        self._plumber_pdf = None
+
+    @property
+    def fitz_doc(self):
+        """PyMuPDF document over the shared buffer"""
+        if self._fitz_doc is None:
+            self._fitz_doc = fitz.open(stream=self.data, filetype="pdf")
+        return self._fitz_doc
+
+    @property
+    def plumber(self):
+        """pdfplumber PDF over the shared buffer (parsed pages are kept for reuse)"""
+        if self._plumber_pdf is None:
+            self._plumber_pdf = pdfplumber.open(io.BytesIO(self.data))
+        return self._plumber_pdf
+
+    def close(self):
+        """Close both views and drop the buffer"""
+        with self.fitz_lock:
+            if self._fitz_doc is not None:
+                self._fitz_doc.close()
+                self._fitz_doc = None
+        with self.plumber_lock:
+            if self._plumber_pdf is not None:
+                self._plumber_pdf.close()
+                self._plumber_pdf = None
+        self.data = None
+
+
+class DocumentCache:
+    """Bounded LRU of DocumentSessions keyed by (path, mtime, size)
+
+    A session evicted while still in use is only closed when its last
+    user releases it.
+    """
+
+    def __init__(self, max_documents=4):
+        self.max_documents = max_documents
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _key(self, path):
+        path = os.path.abspath(str(path))
+        stat = os.stat(path)
+        return (path, stat.st_mtime_ns, stat.st_size)
+
+    def acquire(self, path):
+        """Return the session for path (opening it on a miss) and mark it in use"""
+        key = self._key(path)
+        to_close = []
+
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is not None:
+                self._sessions.move_to_end(key)
+            else:
+                # Drop stale entries for the same file (it changed on disk)
+                for stale_key in [k for k in self._sessions if k[0] == key[0]]:
+                    to_close.append(self._evict(stale_key))
+                session = DocumentSession(key[0])
+                self._sessions[key] = session
+                while len(self._sessions) > self.max_documents:
+                    to_close.append(self._evict(next(iter(self._sessions))))
+            session.users += 1
+
+        for old in to_close:
+            if old is not None:
+                old.close()
+        return session
+
+    def release(self, session):
+        """Mark one use of session as finished"""
+        with self._lock:
+            session.users -= 1
+            close_now = session.evicted and session.users <= 0
+        if close_now:
+            session.close()
+
+    def _evict(self, key):
+        # Called with self._lock held; returns the session if it can be closed right away
+        session = self._sessions.pop(key)
+        session.evicted = True
+        return session if session.users <= 0 else None
+
+    def clear(self):
+        """Evict every session"""
+        with self._lock:
+            to_close = [self._evict(key) for key in list(self._sessions)]
+        for session in to_close:
+            if session is not None:
+                session.close()
+
+
+document_cache = DocumentCache()
+
+
+@contextmanager
+def open_document(path):
+    """Context manager yielding the cached DocumentSession for path"""
+    session = document_cache.acquire(path)
+    try:
+        yield session
+    finally:
+        document_cache.release(session)
+
+
+def risk_grade_from_score(score):
+    """Convert i-SCORE to Risk Grade based on the official ranges"""
+    if score < 360:
+        return 1
+    elif 361 <= score <= 420:
+        return 2
+    elif 421 <= score <= 460:
+        return 3
+    elif 461 <= score <= 540:
+        return 4
+    elif 541 <= score <= 580:
+        return 5
+    elif 581 <= score <= 620:
+        return 6
+    elif 621 <= score <= 660:
+        return 7
+    elif 661 <= score <= 700:
+        return 8
+    elif 701 <= score <= 740:
+        return 9
+    elif score > 741:
+        return 10
+    else:
+        return None
+
+
+def extract_iscore_and_risk_grade(pdf_path):
+    """Extract i-SCORE and calculate risk grade from PDF"""
+    score, risk_grade, _ = locate_iscore(pdf_path)
+    return score, risk_grade
+
+
+def locate_iscore(pdf_path):
+    """Return (score, risk_grade, source) for a PDF; source says how iscore_locator found it"""
+    try:
+        with open_document(pdf_path) as session, session.fitz_lock:
+            return iscore_locator.locate(session.fitz_doc)
+    except Exception as e:
+        print(f"Error extracting risk grade from {pdf_path}: {e}")
+        return None, None, None
+
+
+def _read_iscore_near(page, label_bbox):
+    """Read the score printed next to an i-SCORE label, or None"""
+    search_rect = fitz.Rect(
+        label_bbox[0] - 50, label_bbox[1] - 20,
+        label_bbox[0] + 200, label_bbox[1] + 50
+    )
+
+    # Extract text in this region
+    region_text = page.get_textbox(search_rect)
+
+    # Find the score number
+    score_match = re.search(r'i-SCORE[^\d]*(\d{3,4})', region_text, re.IGNORECASE)
+    if score_match:
+        score = int(score_match.group(1))
+        return score, risk_grade_from_score(score)
+
+    # Alternative pattern - look for numbers near i-SCORE
+    numbers = re.findall(r'\b(\d{3,4})\b', region_text)
+    for num_str in numbers:
+        num = int(num_str)
+        if 300 <= num <= 900:  # Valid score range
+            return num, risk_grade_from_score(num)
+
+    return None
+
+
+class IScoreLocator:
+    """Find the i-SCORE, probing where earlier reports of the same layout had it first
+
+    Lookup order: the remembered page and region for this layout, then a
+    text search of every page (starting at the remembered page), then the
+    original span-by-span scan. Counters record which step answered:
+    hint_hits, search_hits, full_scans, plus misses when nothing was found.
+    """
+
+    def __init__(self):
+        self.hints = {}  # layout signature -> (page index, label bbox)
+        self.hint_hits = 0
+        self.search_hits = 0
+        self.full_scans = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _signature(doc):
+        # Reports from the same generator share page size and producer
+        rect = doc[0].rect
+        meta = doc.metadata or {}
+        return (round(rect.width), round(rect.height), meta.get("producer") or "", meta.get("creator") or "")
+
+    def _probe(self, page, clip=None):
+        # Text-layer search for the label; returns (score, risk_grade, label bbox), False or None
+        hits = page.search_for("i-SCORE", clip=clip)
+        for rect in hits:
+            found = _read_iscore_near(page, rect)
+            if found:
+                return found + (tuple(rect),)
+        return False if hits else None
+
+    def _count(self, counter, signature=None, page_num=None, bbox=None):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+            if signature is not None:
+                self.hints[signature] = (page_num, bbox)
+
+    def locate(self, doc):
+        """Return (score, risk_grade, source) with source "hint", "search", "scan" or None"""
+        if doc.page_count == 0:
+            self._count("misses")
+            return None, None, None
+
+        signature = self._signature(doc)
+        with self._lock:
+            hint = self.hints.get(signature)
+
+        start_page = 0
+        if hint and hint[0] < doc.page_count:
+            start_page, bbox = hint
+            found = self._probe(doc[start_page], clip=fitz.Rect(bbox) + (-60, -40, 60, 40))
+            if found:
+                self._count("hint_hits", signature, start_page, found[2])
+                return found[0], found[1], "hint"
+
+        # Search every page's text layer, remembered page first
+        label_seen = False
+        for page_num in list(range(start_page, doc.page_count)) + list(range(start_page)):
+            found = self._probe(doc[page_num])
+            if found:
+                self._count("search_hits", signature, page_num, found[2])
+                return found[0], found[1], "search"
+            label_seen = label_seen or found is False
+
+        # The label is there but no score was read from its search box - walk every span
+        if label_seen:
+            score, risk_grade = _find_iscore(doc)
+            if score is not None:
+                self._count("full_scans")
+                return score, risk_grade, "scan"
+
+        self._count("misses")
+        return None, None, None
+
+    def stats(self):
+        """Counters plus the share of lookups answered from a remembered location"""
+        with self._lock:
+            total = self.hint_hits + self.search_hits + self.full_scans + self.misses
+            return {
+                "lookups": total,
+                "hint_hits": self.hint_hits,
+                "search_hits": self.search_hits,
+                "full_scans": self.full_scans,
+                "misses": self.misses,
+                "hint_hit_rate": round(self.hint_hits / total, 3) if total else None
+            }
+
+
+iscore_locator = IScoreLocator()
+
+
+def _find_iscore(doc):
+    """Scan every span of doc for the i-SCORE label and read the score next to it"""
+    for page_num, page in enumerate(doc):
+        # Extract text to find i-SCORE
+        text_blocks = page.get_text("dict")
+
+        for block in text_blocks["blocks"]:
+            if "lines" in block:
+                for line in block["lines"]:
+                    if "spans" in line:
+                        for span in line["spans"]:
+                            text = span["text"].strip()
+
+                            # Look for i-SCORE pattern
+                            if "i-SCORE" in text or "i-score" in text.lower():
+                                found = _read_iscore_near(page, span["bbox"])
+                                if found:
+                                    return found
+
+    return None, None
+
+
+def combine_tables(tables):
+    """Join table row lists into one row list with two blank rows between tables"""
+    combined_rows = []
+    for table_idx, table in enumerate(tables):
+        combined_rows.extend(table)
+        if table_idx < len(tables) - 1:
+            num_cols = len(table[0]) if table else 1
+            combined_rows.extend([[None] * num_cols] * 2)
+    return combined_rows
+
+
+class TableRowBuilder:
+    """Grow a preview sheet table by table and build its DataFrame only when asked
+
+    Appending with pd.concat copies the whole sheet each time; here tables
+    and their two blank separator rows are kept as plain row lists and
+    to_frame() builds (and caches) the DataFrame once.
+    """
+
+    def __init__(self, df=None):
+        self.rows = []
+        self.num_cols = 0
+        self.tables = []  # {"row_start", "num_rows", "num_cols"} for each appended table
+        self.frame = None
+
+        if df is not None and not df.empty:
+            self.rows = df.values.tolist()
+            self.num_cols = df.shape[1]
+            self.frame = df
+
+    def add_table(self, table):
+        """Append one table's rows, preceded by two blank rows if the sheet is not empty"""
+        if not table:
+            return
+        width = max(len(row) for row in table)
+        if self.rows:
+            self.rows.extend([[None] * max(self.num_cols, width)] * 2)
+        self.tables.append({"row_start": len(self.rows), "num_rows": len(table), "num_cols": width})
+        self.rows.extend(table)
+        self.num_cols = max(self.num_cols, width)
+        self.frame = None
+
+    def to_frame(self):
+        """DataFrame of every row so far (built once per batch of additions)"""
+        if self.frame is None:
+            self.frame = pd.DataFrame(self.rows)
+        return self.frame
+
+
+# Same as pdfplumber's defaults, so text matches page.extract_tables()
+TABLE_SETTINGS = {
+    "vertical_strategy": "lines",
+    "horizontal_strategy": "lines",
+    "snap_tolerance": 3,
+    "join_tolerance": 3,
+}
+
+
+def _color_to_hex(color):
+    """Convert a pdfplumber colour (gray, RGB or CMYK tuple) to RRGGBB, None for white/unset"""
+    if color is None:
+        return None
+    if isinstance(color, (int, float)):
+        color = (color,)
+    try:
+        values = [float(v) for v in color]
+    except (TypeError, ValueError):
+        return None  # Pattern fills etc.
+
+    if len(values) == 1:
+        r = g = b = values[0]
+    elif len(values) == 3:
+        r, g, b = values
+    elif len(values) == 4:
+        c, m, y, k = values
+        r, g, b = (1 - c) * (1 - k), (1 - m) * (1 - k), (1 - y) * (1 - k)
+    else:
+        return None
+
+    hex_color = "".join(f"{int(round(max(0.0, min(1.0, v)) * 255)):02X}" for v in (r, g, b))
+    return None if hex_color == "FFFFFF" else hex_color
+
+
+def _is_bold_font(fontname):
+    name = (fontname or "").lower()
+    return "bold" in name or "black" in name or "heavy" in name
+
+
+def detect_tables(page, table_settings=None):
+    """Find the tables on a page in one pass and return text, cell boxes and styles together
+
+    Each table is a dict with:
+      rows  - cell text, same as page.extract_tables() would return
+      bbox  - table bounding box
+      cells - per row, the cell bounding boxes (None where a merged cell continues)
+      bold  - set of (row, col) whose text is mostly in a bold font
+      fill  - {(row, col): "RRGGBB"} background fill behind the cell
+    """
+    found = page.find_tables(table_settings or TABLE_SETTINGS)
+    if not found:
+        return []
+
+    # Visible glyphs sorted top-down so each table row can bisect its own characters
+    chars = sorted((c for c in page.chars if c["text"].strip()), key=lambda c: (c["top"] + c["bottom"]) / 2)
+    char_mids = [(c["top"] + c["bottom"]) / 2 for c in chars]
+
+    # Filled boxes big enough to be cell shading (thin rects are ruling lines)
+    fills = []
+    for rect in page.rects:
+        if rect.get("fill") and rect["width"] > 2 and rect["height"] > 2:
+            color = _color_to_hex(rect.get("non_stroking_color"))
+            if color:
+                fills.append((rect["width"] * rect["height"], rect["x0"], rect["top"], rect["x1"], rect["bottom"], color))
+    fills.sort()  # Smallest first so the tightest shading wins
+
+    results = []
+    for table in found:
+        rows = table.extract()
+        if not rows:
+            continue
+
+        cells = []
+        bold = set()
+        fill = {}
+        for row_idx, row in enumerate(table.rows):
+            cells.append(list(row.cells))
+            lo = bisect_left(char_mids, row.bbox[1])
+            hi = bisect_right(char_mids, row.bbox[3])
+            row_chars = chars[lo:hi]
+
+            for col_idx, cell in enumerate(row.cells):
+                if cell is None:
+                    continue
+                x0, top, x1, bottom = cell
+
+                in_cell = [c for c in row_chars if x0 <= (c["x0"] + c["x1"]) / 2 <= x1]
+                if in_cell and sum(_is_bold_font(c.get("fontname")) for c in in_cell) * 2 > len(in_cell):
+                    bold.add((row_idx, col_idx))
+
+                cx, cy = (x0 + x1) / 2, (top + bottom) / 2
+                for _, fx0, ftop, fx1, fbottom, color in fills:
+                    if fx0 <= cx <= fx1 and ftop <= cy <= fbottom:
+                        fill[(row_idx, col_idx)] = color
+                        break
+
+        results.append({"rows": rows, "bbox": table.bbox, "cells": cells, "bold": bold, "fill": fill})
+
+    return results
+
+
+def combine_detected_tables(tables):
+    """Combine detect_tables() output into preview rows plus a table layout
+
+    The layout records where each table landed in the combined rows and
+    its bold / filled cells in those coordinates, so the Excel export can
+    style the workbook without re-detecting tables.
+    """
+    rows = combine_tables([t["rows"] for t in tables])
+    layout = {"tables": [], "bold": set(), "fill": {}}
+
+    row_start = 0
+    for table in tables:
+        num_rows = len(table["rows"])
+        num_cols = max(len(r) for r in table["rows"])
+        layout["tables"].append({"row_start": row_start, "num_rows": num_rows, "num_cols": num_cols})
+        layout["bold"].update((row_start + r, c) for r, c in table["bold"])
+        layout["fill"].update({(row_start + r, c): color for (r, c), color in table["fill"].items()})
+        row_start += num_rows + 2  # Two blank separator rows
+
+    return rows, layout
+
+
+def project_table_layout(layout, kept_rows, kept_cols, row_shift):
+    """Map a preview table layout onto the cleaned export sheet
+
+    kept_rows: preview row index for each output row
+    kept_cols: preview column index for each output column (before shifting)
+    row_shift: {preview row: columns the row was shifted left}
+    Returns (table_ranges, bold_cells, fill_cells) in 0-based output coordinates.
+    """
+    out_row_of = {src: out for out, src in enumerate(kept_rows)}
+    out_col_of = {src: out for out, src in enumerate(kept_cols)}
+
+    def project(src_row, src_col):
+        out_row = out_row_of.get(src_row)
+        out_col = out_col_of.get(src_col)
+        if out_row is None or out_col is None:
+            return None
+        out_col -= row_shift.get(src_row, 0)
+        return (out_row, out_col) if out_col >= 0 else None
+
+    table_ranges = []
+    for table in layout["tables"]:
+        src_rows = [r for r in range(table["row_start"], table["row_start"] + table["num_rows"]) if r in out_row_of]
+        if not src_rows:
+            continue
+        shift = row_shift.get(src_rows[0], 0)
+        out_cols = [out_col_of[c] - shift for c in range(table["num_cols"]) if c in out_col_of]
+        out_cols = [c for c in out_cols if c >= 0]
+        if not out_cols:
+            continue
+        table_ranges.append({
+            'start_row': out_row_of[src_rows[0]],
+            'end_row': out_row_of[src_rows[-1]],
+            'start_col': min(out_cols),
+            'end_col': max(out_cols)
+        })
+
+    bold_cells = set(filter(None, (project(r, c) for r, c in layout["bold"])))
+    fill_cells = {}
+    for (r, c), color in layout["fill"].items():
+        cell = project(r, c)
+        if cell:
+            fill_cells[cell] = color
+
+    return table_ranges, bold_cells, fill_cells
+
+
+def error_message(error):
+    """Text for a failed file's "error" field; never empty, since callers test it for truth"""
+    # Some exceptions (pdfminer's on a password-protected PDF, for one) carry no message
+    return str(error) or type(error).__name__
+
+
+def _empty_result(pdf_path):
+    # Result dict shared by the extractors (see auto_extract_file)
+    return {
+        "path": pdf_path,
+        "file_name": Path(pdf_path).name,
+        "rows": None,
+        "layout": None,
+        "iscore": None,
+        "risk_grade": None,
+        "iscore_source": None,
+        "error": None
+    }
+
+
+def auto_extract_page_range(pdf_path, start=0, stop=None, header_crop=90, footer_crop=90):
+    """Detect the tables on pages [start, stop) of one PDF, in page order
+
+    Long reports are split into page ranges that run on separate workers;
+    the engine stitches the ranges back together in order.
+    """
+    all_tables = []
+    with open_document(pdf_path) as session, session.plumber_lock:
+        pdf = session.plumber
+
+        for page in pdf.pages[start:stop]:
+            page_height = page.height
+            cropped_page = page.crop((0, header_crop, page.width, page_height - footer_crop))
+
+            # One detection pass gives text, cell boxes and styles together
+            for table in detect_tables(cropped_page):
+                if table["rows"] and len(table["rows"]) > 0:
+                    all_tables.append(table)
+
+    return all_tables
+
+
+def auto_extract_file(pdf_path, header_crop=90, footer_crop=90):
+    """Extract all tables and the i-SCORE from one PDF (runs in a worker process)
+
+    Returns a plain dict so it pickles cheaply back to the GUI process:
+    rows is the combined row list (None when no tables were found) and
+    layout the matching table layout from combine_detected_tables().
+    """
+    result = _empty_result(pdf_path)
+
+    try:
+        result["iscore"], result["risk_grade"], result["iscore_source"] = locate_iscore(pdf_path)
+        all_tables = auto_extract_page_range(pdf_path, header_crop=header_crop, footer_crop=footer_crop)
+
+        if all_tables:
+            result["rows"], result["layout"] = combine_detected_tables(all_tables)
+    except Exception as e:
+        result["error"] = error_message(e)
+
+    return result
+
+
+def extract_file_with_selections(pdf_path, selections, header_crop=80, footer_crop=80):
+    """Extract the saved selection areas from one PDF (runs in a worker process)
+
+    selections maps page index to a list of (x1, y1, x2, y2) boxes in PDF
+    coordinates. Returns the same dict shape as auto_extract_file().
+    """
+    result = _empty_result(pdf_path)
+
+    try:
+        result["iscore"], result["risk_grade"], result["iscore_source"] = locate_iscore(pdf_path)
+
+        file_tables = []
+        with open_document(pdf_path) as session:
+            # Parse only the selected pages (pdfplumber numbers pages from 1), on a
+            # private reader over the session's bytes so nothing outlives this file
+            with pdfplumber.open(io.BytesIO(session.data), pages=[n + 1 for n in selections]) as pdf:
+                for page in pdf.pages:
+                    page_num = page.page_number - 1
+                    page_height = page.height
+
+                    # Crop page to remove header/footer
+                    cropped_page = page.crop((0, header_crop, page.width, page_height - footer_crop))
+
+                    for bbox in selections[page_num]:
+                        try:
+                            # Adjust bbox coordinates for the cropped page
+                            adjusted_bbox = (
+                                bbox[0],
+                                max(0, bbox[1] - header_crop),  # Adjust Y coordinate
+                                bbox[2],
+                                bbox[3] - header_crop
+                            )
+
+                            # Only extract if bbox is within cropped area
+                            if adjusted_bbox[1] >= 0 and adjusted_bbox[3] <= (page_height - header_crop - footer_crop):
+                                table = cropped_page.crop(adjusted_bbox).extract_table()
+                                if table:
+                                    file_tables.append(table)
+                        except Exception:
+                            continue
+
+                    # Release the page's parsed layout before moving on
+                    page.close()
+
+        if file_tables:
+            result["rows"] = combine_tables(file_tables)
+    except Exception as e:
+        result["error"] = error_message(e)
+
+    return result
+
+
+def save_selection_template(selections, path):
+    """Save {page: [bbox, ...]} selections as a JSON template (pages are 0-based)"""
+    template = {
+        "selections": {
+            str(page_num): [list(bbox) for bbox in boxes]
+            for page_num, boxes in sorted(selections.items())
+        }
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(template, f, indent=2)
+
+
+def load_selection_template(path):
+    """Load a JSON selection template back into {page: [(x1, y1, x2, y2), ...]}"""
+    with open(path, "r", encoding="utf-8") as f:
+        template = json.load(f)
+
+    selections = template.get("selections", template)
+    return {
+        int(page_num): [tuple(float(v) for v in bbox) for bbox in boxes]
+        for page_num, boxes in selections.items()
+    }
+
+
+def extraction_cache_key(func, pdf_path, kwargs):
+    """Cache key over the PDF bytes, the extraction function and all its parameters"""
+    bound = inspect.signature(func).bind(pdf_path, **kwargs)
+    bound.apply_defaults()
+    params = dict(bound.arguments)
+    params.pop(next(iter(params)))  # The path itself is replaced by the content hash
+    return ccris_cache.make_key(
+        EXTRACTOR_VERSION, func.__name__, ccris_cache.file_sha256(pdf_path), params, TABLE_SETTINGS
+    )
+
+
+def _encode_result(result):
+    # JSON form of an extraction result for the on-disk cache
+    layout = result.get("layout")
+    if layout:
+        layout = {
+            "tables": layout["tables"],
+            "bold": sorted(layout["bold"]),
+            "fill": [[r, c, color] for (r, c), color in layout["fill"].items()]
+        }
+    return {
+        "rows": result["rows"],
+        "layout": layout,
+        "iscore": result.get("iscore"),
+        "risk_grade": result.get("risk_grade")
+    }
+
+
+def _decode_result(cached, pdf_path):
+    layout = cached.get("layout")
+    if layout:
+        layout = {
+            "tables": layout["tables"],
+            "bold": {tuple(cell) for cell in layout["bold"]},
+            "fill": {(r, c): color for r, c, color in layout["fill"]}
+        }
+    return {
+        "path": pdf_path,
+        "file_name": Path(pdf_path).name,
+        "rows": cached["rows"],
+        "layout": layout,
+        "iscore": cached.get("iscore"),
+        "risk_grade": cached.get("risk_grade"),
+        "error": None,
+        "cached": True
+    }
+
+
+class ExtractionEngine:
+    """Fan a per-file extraction function out over a pool of worker processes"""
+
+    def __init__(self, workers=None, pages_per_chunk=None, memory_budget=None):
+        self.workers = workers or default_worker_count()
+        self.pages_per_chunk = pages_per_chunk or default_pages_per_chunk()
+        self.memory_budget = memory_budget or default_memory_budget()
+        self.throttled = 0  # Times new work was held back because of the memory budget
+
+    def map_files(self, func, files, cache=None, **kwargs):
+        """Yield (index, result) for each file as soon as its worker finishes
+
+        func must be a module-level function taking the PDF path first so it
+        can be pickled to the workers. A single worker (or a single file)
+        runs inline without starting a pool. With a cache, files whose bytes
+        and parameters match an earlier run are answered straight from it
+        and only the rest are extracted. Closing the generator early cancels
+        files that have not started yet. With auto_extract_file, reports
+        longer than pages_per_chunk are split into page ranges across the
+        workers so one huge file does not hold up the end of the batch.
+        While the pool is over memory_budget (CCRIS_MEMORY_MB) only one file
+        runs at a time until memory drops again.
+        """
+        pending = list(range(len(files)))
+        keys = {}
+
+        if cache is not None:
+            pending = []
+            for idx, path in enumerate(files):
+                try:
+                    key = extraction_cache_key(func, path, kwargs)
+                except OSError:
+                    pending.append(idx)  # Unreadable file - let the extractor report it
+                    continue
+                cached = cache.get(key)
+                if cached is not None:
+                    yield idx, _decode_result(cached, path)
+                else:
+                    keys[idx] = key
+                    pending.append(idx)
+
+        for sub_idx, result in self._run(func, [files[idx] for idx in pending], **kwargs):
+            idx = pending[sub_idx]
+            # Only clean results are cached: a failure should be retried next run, not replayed
+            if idx in keys and result.get("error") is None:
+                try:
+                    cache.put(keys[idx], _encode_result(result))
+                except Exception as e:
+                    print(f"Could not cache result for {files[idx]}: {e}")
+            yield idx, result
+
+    def _page_chunks(self, func, path):
+        # Page ranges for one file, or None to extract it as a whole
+        if func is not auto_extract_file or self.workers <= 1:
+            return None
+        pages = page_count(path)
+        if pages <= self.pages_per_chunk:
+            return None
+        size = max(self.pages_per_chunk, -(-pages // self.workers))
+        return [(start, min(start + size, pages)) for start in range(0, pages, size)]
+
+    def _run(self, func, files, **kwargs):
+        if not files:
+            return
+
+        chunks = {idx: self._page_chunks(func, path) for idx, path in enumerate(files)}
+        task_count = sum(len(c) + 1 if c else 1 for c in chunks.values())
+
+        if self.workers <= 1 or task_count <= 1:
+            for idx, path in enumerate(files):
+                yield idx, func(path, **kwargs)
+            return
+
+        # Longest reports first so their page ranges are not left for the end
+        tasks = []
+        parts = {}
+        for idx in sorted(chunks, key=lambda i: -len(chunks[i] or ())):
+            path = files[idx]
+            if not chunks[idx]:
+                tasks.append(((idx, None), func, (path,), kwargs))
+                continue
+
+            parts[idx] = {"iscore": None, "tables": [None] * len(chunks[idx]),
+                          "left": len(chunks[idx]) + 1, "error": None}
+            tasks.append(((idx, "iscore"), locate_iscore, (path,), {}))
+            for part, (start, stop) in enumerate(chunks[idx]):
+                tasks.append(((idx, part), auto_extract_page_range, (path, start, stop), kwargs))
+        tasks.reverse()  # Popped from the end
+
+        max_workers = min(self.workers, task_count)
+        worker_budget = self.memory_budget // (max_workers + 1)
+
+        def settle(key, outcome, error=None):
+            # Record one finished (or failed) task; returns the (idx, result) it completes, if any
+            idx, part = key
+            if part is None:
+                return idx, (self._crashed(files[idx], error) if error is not None else outcome)
+
+            state = parts[idx]
+            if error is not None:
+                state["error"] = state["error"] or error_message(error)
+            elif part == "iscore":
+                state["iscore"] = outcome
+            else:
+                state["tables"][part] = outcome
+            state["left"] -= 1
+            return (idx, self._stitch(files[idx], state)) if state["left"] == 0 else None
+
+        pool = ProcessPoolExecutor(max_workers=max_workers)
+        pool_used = False  # Anything submitted to the current pool yet
+        broken = False  # A worker died; the pool takes no more work
+        try:
+            futures = {}
+            while tasks or futures:
+                if broken and not futures:
+                    # Everything that was in flight has been reported; carry on with a fresh pool
+                    pool.shutdown(wait=True, cancel_futures=True)
+                    pool = ProcessPoolExecutor(max_workers=max_workers)
+                    pool_used = broken = False
+
+                # Keep every worker busy unless the batch is over its memory budget
+                limit = max_workers
+                if tasks and len(futures) < max_workers and memory_in_use() > self.memory_budget:
+                    limit = 1
+                    self.throttled += 1
+                while not broken and tasks and len(futures) < limit:
+                    key, task_func, args, task_kwargs = tasks.pop()
+                    try:
+                        future = pool.submit(_run_task, task_func, args, task_kwargs, worker_budget)
+                    except BrokenProcessPool as e:
+                        if pool_used:
+                            # Not started yet - run it on the next pool
+                            tasks.append((key, task_func, args, task_kwargs))
+                            broken = True
+                        else:
+                            # Even a fresh pool cannot take work; report the task instead of retrying forever
+                            finished = settle(key, None, e)
+                            if finished:
+                                yield finished
+                        continue
+                    futures[future] = key
+                    pool_used = True
+
+                if not futures:
+                    continue
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    key = futures.pop(future)
+                    try:
+                        outcome, error = future.result(), None
+                    except BrokenProcessPool as e:
+                        # Worker crashed (e.g. killed): report what was in flight, keep going on a new pool
+                        outcome, error = None, e
+                        broken = True
+                    except Exception as e:
+                        outcome, error = None, e
+                    finished = settle(key, outcome, error)
+                    if finished:
+                        yield finished
+        finally:
+            # If the caller stopped early (cancelled), drop files that have not started yet
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def _crashed(self, path, error):
+        result = _empty_result(path)
+        result["error"] = error_message(error)
+        return result
+
+    def _stitch(self, path, state):
+        # Join a split report's page ranges back in page order (same as auto_extract_file)
+        result = _empty_result(path)
+        if state["iscore"]:
+            result["iscore"], result["risk_grade"], result["iscore_source"] = state["iscore"]
+
+        if state["error"]:
+            result["error"] = state["error"]
+            return result
+
+        all_tables = [table for tables in state["tables"] for table in tables]
+        if all_tables:
+            result["rows"], result["layout"] = combine_detected_tables(all_tables)
+        return result
@@ -0,0 +1,441 @@
+"""Workbook and database writers for the CCRIS / Experian PDF to Excel converter.
+
+Tk-free so the GUI and the command line write identical files.
+"""
+import sqlite3
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import xlsxwriter
+
+from ccris_engine import default_worker_count, error_message, project_table_layout
+
+# Database export formats: key -> (label shown in the GUI, file extension)
+DATABASE_FORMATS = {
+    "xlsx": ("Excel (.xlsx)", ".xlsx"),
+    "parquet": ("Parquet (.parquet)", ".parquet"),
+    "feather": ("Arrow / Feather (.feather)", ".feather"),
+    "sqlite": ("SQLite (.sqlite)", ".sqlite"),
+    "csv.gz": ("Compressed CSV (.csv.gz)", ".csv.gz"),
+}
+
+# Columns downstream jobs filter on; indexed in the SQLite export
+SQLITE_INDEXED_COLUMNS = ("File_Name", "i_SCORE", "Risk_Grade")
+
+
+# Layout tidying of the "Export to Excel" sheets
+MAX_TABLE_GAP = 3        # empty rows allowed inside one table
+MAX_SEPARATOR_ROWS = 2   # consecutive empty rows kept between tables
+
+# Styling of the "Export to Excel" workbooks
+TABLE_CELL_FORMAT = {'border': 2, 'align': 'center', 'valign': 'vcenter'}  # 2 = medium border
+MAX_COLUMN_WIDTH = 50
+
+
+def column_width(width):
+    """Width to pass to xlsxwriter so the file stores `width` as written by openpyxl
+
+    xlsxwriter adds Excel's 5 pixel cell padding (5/7 of a character) to the
+    width; the earlier openpyxl exports stored the raw value.
+    """
+    return width - 5 / 7
+
+
+def write_extracted_workbook(df, excel_path):
+    """Write one file's extracted rows to an "Extracted Data" sheet (batch output)"""
+    with pd.ExcelWriter(excel_path, engine='openpyxl') as writer:
+        df.to_excel(writer, sheet_name="Extracted Data", index=False, header=False)
+
+
+def text_lengths(values):
+    """len(str(cell)) and len(str(cell).strip()) for an object array, 0 for missing cells
+
+    Each distinct value is measured once. Returns (missing, lengths, stripped_lengths).
+    """
+    missing = pd.isna(values)
+    lengths = np.zeros(values.shape, dtype=np.int64)
+    stripped_lengths = np.zeros(values.shape, dtype=np.int64)
+    if (~missing).any():
+        codes, uniques = pd.factorize(pd.Series(values[~missing]).astype(str))
+        texts = pd.Series(uniques, dtype=object)
+        lengths[~missing] = texts.str.len().to_numpy()[codes]
+        stripped_lengths[~missing] = texts.str.strip().str.len().to_numpy()[codes]
+    return missing, lengths, stripped_lengths
+
+
+def _shift_left(values, rows, shifts):
+    # Move each row's cells left by its shift, padding the right with None
+    for row_idx, shift in zip(rows, shifts):
+        values[row_idx] = np.concatenate([values[row_idx, shift:], np.full(shift, None, dtype=object)])
+
+
+def tidy_export_frame(df):
+    """Tidy a preview for export: prune empty columns, left-align tables, drop excess blank rows
+
+    Tables are runs of non-empty rows with at most MAX_TABLE_GAP empty rows
+    between them. Columns outside every table that hold no text are dropped,
+    each table is shifted left as a unit (other rows one by one) to remove
+    leading empty columns, "COMMERCIAL CONFIDENTIAL" rows are dropped and at
+    most MAX_SEPARATOR_ROWS consecutive empty rows are kept.
+
+    Returns (df_cleaned, kept_rows, kept_cols, row_shift) where kept_rows and
+    kept_cols give the preview row/column of each output row/column and
+    row_shift maps preview rows to how far they moved left, as expected by
+    ccris_engine.project_table_layout.
+    """
+    values = df.to_numpy(dtype=object, copy=True)
+    num_rows, num_cols = values.shape
+    if not values.size:
+        return pd.DataFrame(values), list(range(num_rows)), list(range(num_cols)), {}
+    filled = text_lengths(values)[2] > 0
+    row_has_data = filled.any(axis=1)
+
+    # Table boundaries: split the data rows wherever more than MAX_TABLE_GAP empty rows separate them
+    data_rows = np.flatnonzero(row_has_data)
+    first_col = filled.argmax(axis=1)
+    last_col = num_cols - 1 - filled[:, ::-1].argmax(axis=1)
+    splits = np.flatnonzero(np.diff(data_rows) - 1 > MAX_TABLE_GAP) + 1
+    table_boundaries = [
+        (rows[0], rows[-1], first_col[rows].min(), last_col[rows].max())
+        for rows in np.split(data_rows, splits) if len(rows)
+    ]
+
+    # Keep columns that have text or fall inside a table
+    col_in_table = np.zeros(num_cols, dtype=bool)
+    for _, _, start_col, end_col in table_boundaries:
+        col_in_table[start_col:end_col + 1] = True
+    keep_col = col_in_table | filled.any(axis=0)
+    kept_cols = np.flatnonzero(keep_col) if keep_col.any() else np.arange(num_cols)
+    values = values[:, kept_cols]
+    filled = filled[:, kept_cols]
+
+    # Shift each table left by the smallest leading gap of its data rows, other rows by their own gap
+    leading_empty = filled.argmax(axis=1)
+    row_shift = np.zeros(num_rows, dtype=np.int64)
+    in_table = np.zeros(num_rows, dtype=bool)
+    for start_row, end_row, _, _ in table_boundaries:
+        table_rows = slice(start_row, end_row + 1)
+        in_table[table_rows] = True
+        row_shift[table_rows] = leading_empty[table_rows][row_has_data[table_rows]].min()
+    outside = ~in_table & row_has_data
+    row_shift[outside] = leading_empty[outside]
+    shifted_rows = np.flatnonzero(row_shift)
+    _shift_left(values, shifted_rows, row_shift[shifted_rows])
+
+    # Drop "COMMERCIAL CONFIDENTIAL" rows and runs of more than MAX_SEPARATOR_ROWS empty rows
+    confidential = np.zeros(values.shape, dtype=bool)
+    present = ~pd.isna(values)
+    if present.any():
+        texts = pd.Series(values[present]).astype(str).str.strip().str.lower()
+        confidential[present] = texts.str.contains('commercial confidential', regex=False).to_numpy()
+    candidate_rows = np.flatnonzero(~confidential.any(axis=1))
+    is_empty = ~row_has_data[candidate_rows]
+    positions = np.arange(len(candidate_rows))
+    last_data = np.maximum.accumulate(np.where(is_empty, -1, positions)) if len(positions) else positions
+    rows_to_keep = candidate_rows[~is_empty | (positions - last_data <= MAX_SEPARATOR_ROWS)]
+    kept_rows = rows_to_keep if len(rows_to_keep) else np.arange(num_rows)
+
+    df_cleaned = pd.DataFrame(values[kept_rows])
+    row_shift = {int(row_idx): int(row_shift[row_idx]) for row_idx in shifted_rows}
+    return df_cleaned, kept_rows.tolist(), kept_cols.tolist(), row_shift
+
+
+def sheet_table_ranges(filled):
+    """Boxes around runs of consecutive non-empty rows (0-based, inclusive)
+
+    filled is the boolean "cell has text" grid of the sheet. Used when a file
+    has no detected table layout.
+    """
+    table_ranges = []
+    current_table = None
+    row_has_data = filled.any(axis=1)
+    for row_idx in range(filled.shape[0]):
+        if row_has_data[row_idx]:
+            cols = np.flatnonzero(filled[row_idx])
+            if current_table is None:
+                current_table = {
+                    'start_row': row_idx,
+                    'end_row': row_idx,
+                    'start_col': int(cols[0]),
+                    'end_col': int(cols[-1])
+                }
+            else:
+                current_table['end_row'] = row_idx
+                current_table['start_col'] = min(current_table['start_col'], int(cols[0]))
+                current_table['end_col'] = max(current_table['end_col'], int(cols[-1]))
+        elif current_table is not None:
+            table_ranges.append(current_table)
+            current_table = None
+
+    if current_table is not None:
+        table_ranges.append(current_table)
+    return table_ranges
+
+
+class CellFormats:
+    """xlsxwriter formats for every (table, bold, fill colour) combination, created once each"""
+
+    def __init__(self, workbook):
+        self.workbook = workbook
+        self.formats = {(False, False, None): None}
+
+    def get(self, in_table, bold, color):
+        key = (in_table, bold, color)
+        if key not in self.formats:
+            properties = dict(TABLE_CELL_FORMAT) if in_table else {}
+            if bold:
+                properties['bold'] = True
+            if color:
+                properties.update(pattern=1, bg_color=f"#{color}")
+            self.formats[key] = self.workbook.add_format(properties)
+        return self.formats[key]
+
+
+def write_styled_workbook(df, excel_path, table_ranges=None, bold_cells=(), fill_cells=None,
+                          file_name=None, risk_grade=None):
+    """Write a cleaned preview as the "Export to Excel" workbook
+
+    Tables get medium borders and centred text, bold text and cell shading
+    carried over from the PDF are applied, columns are sized to their longest
+    text, and a "Risk Grades" sheet is added when risk_grade is given.
+    table_ranges, bold_cells and fill_cells use 0-based sheet coordinates (see
+    ccris_engine.project_table_layout); without table_ranges every run of
+    non-empty rows is boxed.
+
+    Rows are streamed with xlsxwriter's constant_memory mode, so every cell is
+    written once with its final format and memory stays flat for large sheets.
+    """
+    fill_cells = fill_cells or {}
+    values = df.to_numpy(dtype=object, copy=True)
+    num_rows, num_cols = values.shape
+
+    # NaN cannot be written to xlsx; leave those cells empty like to_excel does
+    missing, lengths, stripped_lengths = text_lengths(values)
+    values[missing] = None
+    filled = stripped_lengths > 0
+
+    if table_ranges is None:
+        table_ranges = sheet_table_ranges(filled)
+    in_table = np.zeros((num_rows, num_cols), dtype=bool)
+    for table_range in table_ranges:
+        in_table[table_range['start_row']:table_range['end_row'] + 1,
+                 table_range['start_col']:table_range['end_col'] + 1] = True
+
+    # Bold/shaded cells grouped by row, so plain rows are written in bulk
+    styled_rows = {}
+    for row_idx, col_idx in bold_cells:
+        styled_rows.setdefault(row_idx, set()).add(col_idx)
+    for row_idx, col_idx in fill_cells:
+        styled_rows.setdefault(row_idx, set()).add(col_idx)
+
+    workbook = xlsxwriter.Workbook(str(excel_path), {
+        'constant_memory': True,
+        'strings_to_formulas': False,
+        'strings_to_urls': False
+    })
+    try:
+        formats = CellFormats(workbook)
+        worksheet = workbook.add_worksheet("Extracted Data")
+
+        # Column widths from the longest text in each column (empty and 0 cells do not count)
+        truthy = ~missing & (values != "") & (values != 0)
+        lengths[~truthy] = 0
+        used = ~missing | in_table
+        for row_idx, cols in styled_rows.items():
+            used[row_idx, [c for c in cols if c < num_cols]] = True
+        used_cols = np.flatnonzero(used.any(axis=0))
+        if len(used_cols):
+            widths = np.minimum(lengths.max(axis=0) + 2, MAX_COLUMN_WIDTH)
+            for col_idx in range(used_cols[-1] + 1):
+                worksheet.set_column(col_idx, col_idx, column_width(int(widths[col_idx])))
+
+        for row_idx in range(num_rows):
+            row = values[row_idx]
+            row_in_table = in_table[row_idx]
+            styled = styled_rows.get(row_idx)
+            col_idx = 0
+            while col_idx < num_cols:
+                if styled and col_idx in styled:
+                    # Single cell with PDF styling
+                    cell_format = formats.get(bool(row_in_table[col_idx]), (row_idx, col_idx) in bold_cells,
+                                              fill_cells.get((row_idx, col_idx)))
+                    worksheet.write(row_idx, col_idx, row[col_idx], cell_format)
+                    col_idx += 1
+                    continue
+                # Run of cells sharing the table/plain format, written in one call
+                end = col_idx + 1
+                while (end < num_cols and row_in_table[end] == row_in_table[col_idx]
+                       and not (styled and end in styled)):
+                    end += 1
+                if row_in_table[col_idx]:
+                    worksheet.write_row(row_idx, col_idx, row[col_idx:end], formats.get(True, False, None))
+                else:
+                    for plain_idx in range(col_idx, end):
+                        if row[plain_idx] is not None:
+                            worksheet.write(row_idx, plain_idx, row[plain_idx])
+                col_idx = end
+
+        if risk_grade:
+            risk_sheet = workbook.add_worksheet("Risk Grades")
+            header_format = workbook.add_format(dict(
+                TABLE_CELL_FORMAT, bold=True, font_size=12, pattern=1, bg_color="#1f538d"
+            ))
+            grade_format = workbook.add_format(dict(
+                TABLE_CELL_FORMAT, bold=True, font_size=14, font_color="#FF0000", pattern=1, bg_color="#FFFF00"
+            ))
+            risk_sheet.set_column(0, 0, column_width(50))
+            risk_sheet.set_column(1, 1, column_width(15))
+            risk_sheet.write_row(0, 0, ["File Name", "Risk Grade"], header_format)
+            risk_sheet.write(1, 0, file_name)
+            risk_sheet.write(1, 1, risk_grade, grade_format)
+    finally:
+        workbook.close()
+
+
+def export_preview_workbook(df, excel_path, layout=None, file_name=None, risk_grade=None):
+    """Tidy, style and write one preview as its "Export to Excel" workbook
+
+    layout is the file's detected table layout from auto-extract (if any);
+    its borders, bold text and shading follow the cells through
+    tidy_export_frame.
+    """
+    df_cleaned, kept_rows, kept_cols, row_shift = tidy_export_frame(df)
+
+    table_ranges, bold_cells, fill_cells = None, set(), {}
+    if layout:
+        table_ranges, bold_cells, fill_cells = project_table_layout(layout, kept_rows, kept_cols, row_shift)
+
+    write_styled_workbook(
+        df_cleaned, excel_path,
+        table_ranges=table_ranges,
+        bold_cells=bold_cells,
+        fill_cells=fill_cells,
+        file_name=file_name,
+        risk_grade=risk_grade
+    )
+    return excel_path
+
+
+def _export_job(job):
+    # Worker side of export_previews: one job -> (file_name, excel_path, error)
+    file_name, df, excel_path, layout, risk_grade = job
+    try:
+        export_preview_workbook(df, excel_path, layout, file_name, risk_grade)
+        return file_name, excel_path, None
+    except Exception as e:
+        return file_name, excel_path, error_message(e)
+
+
+def export_previews(jobs, workers=None):
+    """Yield (file_name, excel_path, error) as each workbook is written
+
+    jobs is a list of (file_name, df, excel_path, layout, risk_grade). Workbooks
+    are written across a process pool with one file per worker in flight,
+    so only those previews are pickled at any time; a single worker (or
+    file) runs inline. A failing file yields its error message and the
+    export carries on; if a worker dies, the files that were being written
+    fail and the rest go to a fresh pool. Closing the generator early
+    cancels files that have not started yet.
+    """
+    workers = min(workers or default_worker_count(), len(jobs))
+    if workers <= 1:
+        for job in jobs:
+            yield _export_job(job)
+        return
+
+    queued = list(reversed(jobs))  # Popped from the end
+    pool = ProcessPoolExecutor(max_workers=workers)
+    pool_used = False  # Anything submitted to the current pool yet
+    broken = False  # A worker died; the pool takes no more work
+    try:
+        in_flight = {}  # future -> (file_name, excel_path)
+        while queued or in_flight:
+            if broken and not in_flight:
+                # Everything that was in flight has been reported; carry on with a fresh pool
+                pool.shutdown(wait=True, cancel_futures=True)
+                pool = ProcessPoolExecutor(max_workers=workers)
+                pool_used = broken = False
+
+            while not broken and queued and len(in_flight) < workers:
+                job = queued.pop()
+                try:
+                    future = pool.submit(_export_job, job)
+                except BrokenProcessPool as e:
+                    if pool_used:
+                        queued.append(job)  # Not started yet - write it with the next pool
+                        broken = True
+                    else:
+                        # Even a fresh pool cannot take work; report the file instead of retrying forever
+                        yield job[0], job[2], error_message(e)
+                    continue
+                in_flight[future] = (job[0], job[2])
+                pool_used = True
+
+            if not in_flight:
+                continue
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                file_name, excel_path = in_flight.pop(future)
+                try:
+                    yield future.result()
+                except Exception as e:
+                    # Worker process died (e.g. out of memory); report the file and carry on
+                    broken = broken or isinstance(e, BrokenProcessPool)
+                    yield file_name, excel_path, error_message(e)
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def export_database(database_df, folder, fmt="xlsx"):
+    """Export the database to Database_experian_<datetime>.<ext> in folder and return the path
+
+    fmt is a DATABASE_FORMATS key. Parquet and Feather need pyarrow.
+    """
+    if fmt not in DATABASE_FORMATS:
+        raise ValueError(f"Unknown database format {fmt!r}; choose from {', '.join(DATABASE_FORMATS)}")
+
+    now = datetime.now().strftime("%Y%m%d_%H%M%S")
+    file_name = f"Database_experian_{now}{DATABASE_FORMATS[fmt][1]}"
+    out_path = Path(folder) / file_name
+    write_database(database_df, out_path, fmt)
+    return out_path
+
+
+def write_database(database_df, out_path, fmt="xlsx"):
+    """Write the database to out_path in one of the DATABASE_FORMATS"""
+    if fmt == "xlsx":
+        with pd.ExcelWriter(out_path, engine="openpyxl") as writer:
+            database_df.to_excel(writer, sheet_name="Database", index=False)
+
+    elif fmt in ("parquet", "feather"):
+        try:
+            import pyarrow  # noqa: F401 - pandas needs it for both formats
+        except ImportError:
+            raise RuntimeError(f"{DATABASE_FORMATS[fmt][0]} export needs pyarrow (pip install pyarrow)")
+        # Database fields are text; keep them as one string type per column
+        columnar_df = database_df.fillna("").astype(str)
+        if fmt == "parquet":
+            columnar_df.to_parquet(out_path, index=False)
+        else:
+            columnar_df.to_feather(out_path)
+
+    elif fmt == "sqlite":
+        conn = sqlite3.connect(out_path)
+        try:
+            database_df.to_sql("database", conn, index=False, if_exists="replace")
+            for column in SQLITE_INDEXED_COLUMNS:
+                if column in database_df.columns:
+                    conn.execute(f'CREATE INDEX "idx_database_{column}" ON "database" ("{column}")')
+            conn.commit()
+        finally:
+            conn.close()
+
+    elif fmt == "csv.gz":
+        database_df.to_csv(out_path, index=False, compression="gzip")
+
+    else:
+        raise ValueError(f"Unknown database format {fmt!r}")
@@ -0,0 +1,188 @@
+"""Virtualized table view for the Excel preview and Database Viewer tabs.
+
+A ttk.Treeview gets slower with every row inserted, so VirtualGrid keeps only
+enough items to fill the viewport and refills them from the DataFrame as the
+view scrolls. Showing a file or the whole database costs one screenful.
+"""
+import pandas as pd
+
+MAX_CELL_CHARS = 50
+DEFAULT_VISIBLE_ROWS = 40  # Until the tree has been laid out and can be measured
+SHIFT_MASK = 0x0001  # Tk event.state modifier bits
+CONTROL_MASK = 0x0004
+
+
+def format_cell(value):
+    """Preview text for one cell: "-" for empty cells, long values shortened"""
+    if pd.isna(value) or value == "" or str(value).strip() == "":
+        return "-"
+    formatted_value = str(value).strip()
+    # Limit very long values to prevent display issues
+    if len(formatted_value) > MAX_CELL_CHARS:
+        formatted_value = formatted_value[:MAX_CELL_CHARS - 3] + "..."
+    return formatted_value
+
+
+class VirtualGrid:
+    """Drive a ttk.Treeview and its vertical scrollbar from a DataFrame, one viewport at a time
+
+    The caller sets up the tree's columns and headings as usual, then hands
+    the rows over with set_data(). The scrollbar reflects the position in the
+    whole frame; the tree itself only ever holds the visible rows. The
+    selection is kept as frame rows and re-applied to whichever items show
+    them, so it stays with the records as the view scrolls.
+    """
+
+    def __init__(self, tree, scrollbar):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.frame = pd.DataFrame()
+        self.row_labels = None
+        self.format_cells = True
+        self.top = 0
+        self.items = []
+        self.visible_rows = DEFAULT_VISIBLE_ROWS
+        self.selected_rows = set()  # Frame rows (0-based) the user has selected
+
+        # The grid, not the tree, owns the vertical position
+        self.tree.configure(yscrollcommand="")
+        self.scrollbar.configure(command=self.yview)
+
+        self.tree.bind("<Configure>", self._on_resize, add="+")
+        self.tree.bind("<<TreeviewSelect>>", self._on_select, add="+")
+        self.tree.bind("<Button-1>", self._on_click, add="+")
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.tree.bind(sequence, self._on_mouse_wheel, add="+")
+        for sequence in ("<Up>", "<Down>", "<Prior>", "<Next>", "<Control-Home>", "<Control-End>"):
+            self.tree.bind(sequence, self._on_key, add="+")
+
+    def set_data(self, frame, row_labels=None, format_cells=True):
+        """Show frame (a DataFrame or list of row tuples) from the top
+
+        row_labels, if given, is a sequence the same length as frame whose
+        entries label the tree column (#0). With format_cells the values go
+        through format_cell(); otherwise they are shown as they are.
+        """
+        self.frame = frame if isinstance(frame, pd.DataFrame) else pd.DataFrame(list(frame))
+        self.row_labels = row_labels
+        self.format_cells = format_cells
+        self.top = 0
+        self.selected_rows = set()
+        self.render()
+
+    def clear(self):
+        """Remove all rows"""
+        self.set_data(pd.DataFrame())
+
+    def render(self):
+        """Fill the pooled items with the rows from self.top downwards"""
+        total = len(self.frame)
+        self.top = max(0, min(self.top, total - self.visible_rows))
+        count = min(self.visible_rows, total - self.top)
+
+        # Grow or shrink the item pool to the number of rows on screen
+        while len(self.items) < count:
+            self.items.append(self.tree.insert("", "end"))
+        if len(self.items) > count:
+            self.tree.delete(*self.items[count:])
+            del self.items[count:]
+
+        rows = self.frame.iloc[self.top:self.top + count].to_numpy(dtype=object)
+        for offset, (item, row) in enumerate(zip(self.items, rows)):
+            values = [format_cell(value) for value in row] if self.format_cells else list(row)
+            label = str(self.row_labels[self.top + offset]) if self.row_labels is not None else ""
+            self.tree.item(item, text=label, values=values)
+
+        # The selection belongs to rows, not to the pooled items that show them
+        selected = [item for offset, item in enumerate(self.items) if self.top + offset in self.selected_rows]
+        if set(self.tree.selection()) != set(selected):
+            self.tree.selection_set(selected)
+
+        # Keep the tree's own view pinned so the pool always lines up with the viewport
+        self.tree.yview_moveto(0)
+        if total:
+            self.scrollbar.set(self.top / total, (self.top + count) / total)
+        else:
+            self.scrollbar.set(0, 1)
+
+    def yview(self, *args):
+        """Scrollbar command: ("moveto", fraction) or ("scroll", amount, "units"/"pages")"""
+        if not args:
+            return
+        if args[0] == "moveto":
+            self.top = int(float(args[1]) * len(self.frame))
+        elif args[0] == "scroll":
+            amount = int(args[1])
+            self.top += amount * self.visible_rows if args[2] == "pages" else amount
+        self.render()
+
+    def scroll_to(self, row):
+        """Scroll so row (0-based) is the first visible row"""
+        self.top = row
+        self.render()
+
+    def _on_click(self, event):
+        # A plain click replaces the whole selection, rows scrolled out of view included
+        if not event.state & (SHIFT_MASK | CONTROL_MASK):
+            self.selected_rows = set()
+
+    def _on_select(self, event=None):
+        # Fold the tree's selection of the visible rows into selected_rows
+        rows = {item: self.top + offset for offset, item in enumerate(self.items)}
+        selection = set(self.tree.selection())
+        self.selected_rows -= set(rows.values())
+        self.selected_rows |= {row for item, row in rows.items() if item in selection}
+
+    def _select_row(self, row, extend):
+        # Keyboard move past the edge of the viewport: the selection follows to row
+        if 0 <= row < len(self.frame):
+            self.selected_rows = self.selected_rows | {row} if extend else {row}
+
+    def _on_resize(self, event=None):
+        visible_rows = self._measure_visible_rows()
+        if visible_rows != self.visible_rows:
+            self.visible_rows = visible_rows
+            self.render()
+
+    def _measure_visible_rows(self):
+        # Rows that fit under the heading, measured from the first item
+        height = self.tree.winfo_height()
+        if height <= 1 or not self.items:
+            return self.visible_rows
+        bbox = self.tree.bbox(self.items[0])
+        if not bbox:
+            return self.visible_rows
+        _, row_top, _, row_height = bbox
+        return max(1, (height - row_top) // max(1, row_height))
+
+    def _on_mouse_wheel(self, event):
+        if event.num == 4:
+            delta = -3
+        elif event.num == 5:
+            delta = 3
+        else:
+            delta = -3 if event.delta > 0 else 3
+        self.yview("scroll", delta, "units")
+        return "break"
+
+    def _on_key(self, event):
+        focus = self.tree.focus()
+        keysym = event.keysym
+        extend = bool(event.state & SHIFT_MASK)
+        if keysym == "Up" and self.items and focus == self.items[0] and self.top > 0:
+            self._select_row(self.top - 1, extend)
+            self.yview("scroll", -1, "units")
+        elif keysym == "Down" and self.items and focus == self.items[-1]:
+            self._select_row(self.top + len(self.items), extend)
+            self.yview("scroll", 1, "units")
+        elif keysym == "Prior":
+            self.yview("scroll", -1, "pages")
+        elif keysym == "Next":
+            self.yview("scroll", 1, "pages")
+        elif keysym == "Home":
+            self.scroll_to(0)
+        elif keysym == "End":
+            self.scroll_to(len(self.frame))
+        else:
+            return None  # Let the tree move the focus within the viewport
+        return "break"
@@ -0,0 +1,29 @@
+"""Deferred imports so the GUI window appears before the heavy libraries load.
+
+pandas, PyMuPDF, pdfplumber and the extraction modules built on them take
+about a second to import. main.py (and ccris_render, which the viewer needs
+at start-up) bind those names with lazy_import() instead; the real import
+happens the first time an attribute is used, typically when the user opens
+a PDF.
+"""
+import importlib
+import sys
+import types
+
+
+class LazyModule(types.ModuleType):
+    """Placeholder for a module that is imported on first attribute access"""
+
+    def __getattr__(self, attr):
+        # import_module takes the import lock, so a first use from a worker
+        # thread and one from the Tk thread cannot both run the import
+        return getattr(importlib.import_module(self.__name__), attr)
+
+    def __repr__(self):
+        loaded = "loaded" if self.__name__ in sys.modules else "not loaded yet"
+        return f"<lazy module {self.__name__!r} ({loaded})>"
+
+
+def lazy_import(name):
+    """The module called name if it is already imported, else a LazyModule for it"""
+    return sys.modules.get(name) or LazyModule(name)
@@ -0,0 +1,469 @@
+"""Page rendering for the PDF viewer.
+
+Pages are rendered with PyMuPDF into PIL images. PageRenderCache keeps the
+most recent (document, page, zoom) renders and a background thread renders
+the pages around the one being read, so flipping pages in the viewer only
+has to put an image that already exists on the canvas. Pages that are not
+cached yet go through TileRenderer: a quick low-resolution pass is shown at
+once and TILE_SIZE tiles at the chosen zoom replace it in the background,
+visible tiles first. ThumbnailRenderer fills the page strip from a
+background thread and keeps the thumbnails on disk. Tk-free; the viewer
+attaches its PhotoImages to the cached entries.
+"""
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING
+
+from PIL import Image
+
+import ccris_cache
+import ccris_lazy
+
+fitz = ccris_lazy.lazy_import("fitz")  # PyMuPDF; loaded when the first page is rendered
+if TYPE_CHECKING:  # Never run; lets type checkers and PyInstaller's import scan see PyMuPDF
+    import fitz
+
+DEFAULT_ZOOM = 1.5
+PREFETCH_OFFSETS = (1, -1, 2, -2)  # Pages around the current one, nearest first
+
+# Zoom choices offered by the viewer; None means fit the page to the canvas width
+ZOOM_LEVELS = {"Fit width": None, "100%": 1.0, "150%": 1.5, "200%": 2.0}
+PREVIEW_ZOOM = 0.4  # Resolution of the quick first pass
+TILE_SIZE = 512     # Tile edge in pixels at the chosen zoom
+THUMBNAIL_WIDTH = 90
+
+
+def fit_width_zoom(session, page_no, width, margin=20):
+    """Zoom that makes page_no fill width pixels (less a margin)"""
+    with session.fitz_lock:
+        page_width = session.fitz_doc[page_no].rect.width
+    return max(0.25, (width - margin) / page_width) if page_width else DEFAULT_ZOOM
+
+
+def page_sizes(session):
+    """(width, height) in points of every page"""
+    with session.fitz_lock:
+        return [(page.rect.width, page.rect.height) for page in session.fitz_doc]
+
+
+def page_pixel_size(session, page_no, zoom):
+    """(width, height) in pixels of page_no rendered at zoom"""
+    with session.fitz_lock:
+        rect = session.fitz_doc[page_no].rect * fitz.Matrix(zoom, zoom)
+    irect = rect.irect
+    return irect.width, irect.height
+
+
+# MuPDF calls the pooled path makes through PyMuPDF's low-level bindings
+POOLED_RENDER_CALLS = (
+    "fz_new_pixmap_with_bbox", "fz_new_draw_device", "fz_new_draw_device_with_bbox", "fz_run_display_list",
+    "fz_close_device", "fz_bound_page", "fz_intersect_rect", "fz_transform_rect", "fz_round_rect"
+)
+_pooled_rendering = None  # Whether the pooled path works with the installed PyMuPDF; decided on first use
+
+
+def pooled_rendering_available():
+    """Whether the installed PyMuPDF exposes the low-level calls the pooled render path relies on"""
+    global _pooled_rendering
+    if _pooled_rendering is None:
+        mupdf = getattr(fitz, "mupdf", None)
+        _pooled_rendering = mupdf is not None and all(hasattr(mupdf, name) for name in POOLED_RENDER_CALLS)
+    return _pooled_rendering
+
+
+class PixmapPool(threading.local):
+    """Scratch RGB pixmaps reused for renders of the same pixel size, one set per thread
+
+    Pages of a report share a size, so after the first page every render
+    draws into an existing pixmap instead of allocating a new one.
+    """
+
+    def __init__(self, max_sizes=4):
+        self.max_sizes = max_sizes
+        self.allocated = 0  # Pixmaps created by this thread
+        self._pixmaps = OrderedDict()
+
+    def get(self, irect):
+        """Blank (white) pixmap covering irect"""
+        size = (irect.width, irect.height)
+        pix = self._pixmaps.get(size)
+        if pix is None:
+            # Allocated the way Page.get_pixmap() does: fitz.csRGB is not the same
+            # colorspace object and would colour-convert the output slightly
+            mupdf = fitz.mupdf
+            pix = fitz.Pixmap("raw", mupdf.fz_new_pixmap_with_bbox(
+                mupdf.FzColorspace(mupdf.FzColorspace.Fixed_RGB), mupdf.FzIrect(*irect),
+                mupdf.FzSeparations(), 0))
+            self.allocated += 1
+            self._pixmaps[size] = pix
+            while len(self._pixmaps) > self.max_sizes:
+                self._pixmaps.popitem(last=False)
+        else:
+            self._pixmaps.move_to_end(size)
+            pix.set_origin(irect.x0, irect.y0)
+        pix.clear_with(255)
+        return pix
+
+
+pixmap_pool = PixmapPool()
+
+
+def draw_page(page, pix, mat, clip=None):
+    """Draw page through mat onto the existing pixmap pix, limited to clip (page coordinates)
+
+    Mirrors what Page.get_pixmap() does inside PyMuPDF, display list and
+    all, so the pixels come out identical; only the target pixmap differs.
+    """
+    mupdf = fitz.mupdf
+    display_list = page.get_displaylist().this
+    ctm = mupdf.FzMatrix(mat.a, mat.b, mat.c, mat.d, mat.e, mat.f)
+    if clip is None:
+        device = mupdf.fz_new_draw_device(ctm, pix.this)
+        area = mupdf.FzRect(mupdf.FzRect.Fixed_INFINITE)
+    else:
+        device = mupdf.fz_new_draw_device_with_bbox(ctm, pix.this, mupdf.FzIrect(*pix.irect))
+        area = mupdf.FzRect(*clip)
+    try:
+        mupdf.fz_run_display_list(display_list, device, mupdf.FzMatrix(), area, mupdf.FzCookie())
+    finally:
+        mupdf.fz_close_device(device)
+
+
+def pixel_area(page, mat, clip=None):
+    """IRect of the pixels get_pixmap(matrix=mat, clip=clip) would produce"""
+    mupdf = fitz.mupdf
+    rect = mupdf.fz_bound_page(page.this)
+    if clip is not None:
+        rect = mupdf.fz_intersect_rect(rect, mupdf.FzRect(*clip))
+    rect = mupdf.fz_transform_rect(rect, mupdf.FzMatrix(mat.a, mat.b, mat.c, mat.d, mat.e, mat.f))
+    irect = mupdf.fz_round_rect(rect)
+    return fitz.IRect(irect.x0, irect.y0, irect.x1, irect.y1)
+
+
+def render_pixels(page, mat, clip=None):
+    """Render page at mat (optionally only the clip area) into a PIL image
+
+    Returns (image, irect). The page is drawn into a pooled pixmap and PIL
+    copies the samples straight out of it (RGB is unpacked into PIL's own
+    buffer), so the pixmap can be reused as soon as this returns. No PPM
+    round trip. The pooled path uses PyMuPDF internals; if they are missing
+    or have changed, pages are rendered with Page.get_pixmap() instead.
+    Call with the document's fitz_lock held.
+    """
+    global _pooled_rendering
+    if pooled_rendering_available():
+        try:
+            irect = pixel_area(page, mat, clip)
+            pix = pixmap_pool.get(irect)
+            draw_page(page, pix, mat, clip)
+            return pixmap_image(pix), irect
+        except (AttributeError, TypeError) as e:
+            print(f"Pooled page rendering disabled, using get_pixmap(): {e}")
+            _pooled_rendering = False
+
+    pix = page.get_pixmap(matrix=mat, clip=clip)
+    return pixmap_image(pix), fitz.IRect(pix.irect)
+
+
+def pixmap_image(pix):
+    """Copy of an RGB pixmap's pixels as a PIL image"""
+    return Image.frombuffer("RGB", (pix.width, pix.height), pix.samples_mv, "raw", "RGB", pix.stride, 1)
+
+
+def render_page(session, page_no, zoom=DEFAULT_ZOOM):
+    """Render one page of a DocumentSession to a PIL image"""
+    mat = fitz.Matrix(zoom, zoom)
+    with session.fitz_lock:
+        image, _ = render_pixels(session.fitz_doc[page_no], mat)
+    return image
+
+
+def render_preview(session, page_no, zoom):
+    """Fast low-resolution render of page_no scaled up to its size at zoom"""
+    image = render_page(session, page_no, min(PREVIEW_ZOOM, zoom))
+    return image.resize(page_pixel_size(session, page_no, zoom), Image.BILINEAR)
+
+
+def render_tile(session, page_no, zoom, box):
+    """Render the (x0, y0, x1, y1) pixel box of page_no at zoom
+
+    Returns (image, (x, y)) where (x, y) is the tile's top-left pixel.
+    """
+    mat = fitz.Matrix(zoom, zoom)
+    x0, y0, x1, y1 = box
+    with session.fitz_lock:
+        page = session.fitz_doc[page_no]
+        # Pixel boxes are relative to the rendered page, which starts at the page origin * zoom
+        origin = page.rect.tl * mat
+        clip = fitz.Rect(origin.x + x0, origin.y + y0, origin.x + x1, origin.y + y1) * ~mat
+        image, irect = render_pixels(page, mat, clip)
+    return image, (irect.x0 - int(origin.x), irect.y0 - int(origin.y))
+
+
+def tile_boxes(width, height, tile_size=TILE_SIZE):
+    """Pixel boxes (x0, y0, x1, y1) covering a width x height page"""
+    return [
+        (x, y, min(x + tile_size, width), min(y + tile_size, height))
+        for y in range(0, height, tile_size)
+        for x in range(0, width, tile_size)
+    ]
+
+
+class RenderedPage:
+    """A rendered page; photo is filled in by the viewer on the Tk thread"""
+
+    def __init__(self, image):
+        self.image = image
+        self.photo = None
+
+
+class PageRenderCache:
+    """Bounded LRU of rendered pages keyed by (document, page, zoom), with neighbour prefetch"""
+
+    def __init__(self, max_pages=12):
+        self.max_pages = max_pages
+        self.hits = 0
+        self.misses = 0
+        self._pages = OrderedDict()
+        self._pending = set()  # Keys queued for prefetch
+        self._lock = threading.Lock()
+        self._prefetcher = ThreadPoolExecutor(max_workers=1, thread_name_prefix="page-prefetch")
+
+    @staticmethod
+    def key(session, page_no, zoom):
+        return (session.path, id(session), page_no, round(zoom, 4))
+
+    def get(self, session, page_no, zoom=DEFAULT_ZOOM):
+        """Return the RenderedPage for page_no, rendering it on a miss"""
+        key = self.key(session, page_no, zoom)
+        with self._lock:
+            rendered = self._pages.get(key)
+            if rendered is not None:
+                self._pages.move_to_end(key)
+                self.hits += 1
+                return rendered
+            self.misses += 1
+
+        return self._store(key, RenderedPage(render_page(session, page_no, zoom)))
+
+    def peek(self, session, page_no, zoom=DEFAULT_ZOOM):
+        """Return the cached RenderedPage without rendering or touching the LRU order, else None"""
+        with self._lock:
+            return self._pages.get(self.key(session, page_no, zoom))
+
+    def prefetch(self, session, page_no, zoom=DEFAULT_ZOOM, on_ready=None):
+        """Render the pages around page_no in the background
+
+        on_ready(page_no, rendered) is called from the prefetch thread after
+        each page is stored.
+        """
+        with session.fitz_lock:
+            page_count = len(session.fitz_doc)
+        for offset in PREFETCH_OFFSETS:
+            neighbour = page_no + offset
+            if not 0 <= neighbour < page_count:
+                continue
+            key = self.key(session, neighbour, zoom)
+            with self._lock:
+                if key in self._pages or key in self._pending:
+                    continue
+                self._pending.add(key)
+            self._prefetcher.submit(self._prefetch_one, key, session, neighbour, zoom, on_ready)
+
+    def _prefetch_one(self, key, session, page_no, zoom, on_ready):
+        try:
+            rendered = self._store(key, RenderedPage(render_page(session, page_no, zoom)))
+        except Exception as e:
+            # Document closed or switched while queued; the viewer renders on demand instead
+            print(f"Prefetch of page {page_no + 1} skipped: {e}")
+            return
+        finally:
+            with self._lock:
+                self._pending.discard(key)
+        if on_ready is not None:
+            on_ready(page_no, rendered)
+
+    def _store(self, key, rendered):
+        with self._lock:
+            existing = self._pages.get(key)
+            if existing is not None:
+                return existing  # Rendered twice (prefetch and viewer raced); keep the first
+            self._pages[key] = rendered
+            while len(self._pages) > self.max_pages:
+                self._pages.popitem(last=False)
+        return rendered
+
+    def put(self, session, page_no, zoom, image):
+        """Store an image rendered elsewhere (e.g. assembled from tiles) and return its RenderedPage"""
+        return self._store(self.key(session, page_no, zoom), RenderedPage(image))
+
+    def clear(self):
+        """Drop every cached page"""
+        with self._lock:
+            self._pages.clear()
+
+
+class RenderedTile(RenderedPage):
+    """A rendered tile and its top-left pixel on the page"""
+
+    def __init__(self, image, position):
+        super().__init__(image)
+        self.position = position
+
+
+class TileRenderer:
+    """Render a page tile by tile in the background, visible tiles first
+
+    Tiles are kept in an LRU per (document, page, zoom, box). Starting a new
+    page or zoom abandons the tiles still queued for the previous one. Once
+    every tile of a page is ready it is assembled into one image and handed
+    to the PageRenderCache, so the next visit takes the whole-page path.
+    """
+
+    def __init__(self, page_cache, max_tiles=96):
+        self.page_cache = page_cache
+        self.max_tiles = max_tiles
+        self.generation = 0  # Bumped on every start(); queued work for older generations is dropped
+        self._tiles = OrderedDict()
+        self._lock = threading.Lock()
+        self._worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="page-tiles")
+
+    def start(self, session, page_no, zoom, visible_box, on_tile):
+        """Queue every tile of page_no, nearest to visible_box first
+
+        visible_box is the (x0, y0, x1, y1) pixel area on screen. on_tile(
+        generation, tile) is called from the worker thread for each tile,
+        cached ones included. Returns the generation of this request.
+        """
+        with self._lock:
+            self.generation += 1
+            generation = self.generation
+
+        width, height = page_pixel_size(session, page_no, zoom)
+        vx0, vy0, vx1, vy1 = visible_box
+
+        def distance(box):
+            # 0 for tiles overlapping the viewport, else the vertical gap to it
+            x0, y0, x1, y1 = box
+            if y1 <= vy0:
+                return vy0 - y1
+            if y0 >= vy1:
+                return y0 - vy1
+            return 0
+
+        boxes = sorted(tile_boxes(width, height), key=distance)
+        self._worker.submit(self._render_tiles, generation, session, page_no, zoom, boxes, (width, height), on_tile)
+        return generation
+
+    def cancel(self):
+        """Abandon any queued tiles"""
+        with self._lock:
+            self.generation += 1
+
+    def _render_tiles(self, generation, session, page_no, zoom, boxes, size, on_tile):
+        tiles = []
+        for box in boxes:
+            if generation != self.generation:
+                return  # Page or zoom changed; stop working for the old view
+            key = (session.path, id(session), page_no, round(zoom, 4), box)
+            with self._lock:
+                tile = self._tiles.get(key)
+                if tile is not None:
+                    self._tiles.move_to_end(key)
+            if tile is None:
+                try:
+                    tile = RenderedTile(*render_tile(session, page_no, zoom, box))
+                except Exception as e:
+                    print(f"Tile render of page {page_no + 1} stopped: {e}")
+                    return
+                with self._lock:
+                    self._tiles[key] = tile
+                    while len(self._tiles) > self.max_tiles:
+                        self._tiles.popitem(last=False)
+            tiles.append(tile)
+            on_tile(generation, tile)
+
+        # Whole page ready: cache it so revisiting this page is a single image
+        page_image = Image.new(tiles[0].image.mode, size, "white") if tiles else None
+        if page_image is not None:
+            for tile in tiles:
+                page_image.paste(tile.image, tile.position)
+            self.page_cache.put(session, page_no, zoom, page_image)
+
+
+class ThumbnailRenderer:
+    """Page thumbnails rendered on a background thread and cached on disk
+
+    Thumbnails are keyed by the PDF's SHA-256 and page, so reopening a file
+    (or the same report under another name) reads them back instead of
+    rendering. reset() abandons queued requests when the viewer switches
+    files.
+    """
+
+    def __init__(self, disk_cache=None, width=THUMBNAIL_WIDTH):
+        self.disk_cache = disk_cache
+        self.width = width
+        self.generation = 0
+        self.rendered = 0  # Thumbnails rendered (disk cache misses)
+        self._hashes = {}  # id(session) -> (session, SHA-256 of its bytes)
+        self._lock = threading.Lock()
+        self._worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="thumbnails")
+
+    def reset(self):
+        """Drop thumbnails still queued for the previous document"""
+        with self._lock:
+            self.generation += 1
+
+    def request(self, session, pages, on_ready):
+        """Queue thumbnails for pages; on_ready(page_no, image) is called from the worker thread"""
+        generation = self.generation
+        self._worker.submit(self._render_pages, generation, session, list(pages), on_ready)
+
+    def _document_hash(self, session):
+        with self._lock:
+            cached = self._hashes.get(id(session))
+            if cached is not None and cached[0] is session:
+                return cached[1]
+        digest = hashlib.sha256(session.data).hexdigest()
+        with self._lock:
+            self._hashes[id(session)] = (session, digest)
+            while len(self._hashes) > 8:
+                self._hashes.pop(next(iter(self._hashes)))
+        return digest
+
+    def _render_pages(self, generation, session, pages, on_ready):
+        try:
+            doc_hash = self._document_hash(session)
+        except TypeError:
+            return  # Session closed before the worker got to it
+        for page_no in pages:
+            if generation != self.generation:
+                return
+            try:
+                image = self.thumbnail(session, doc_hash, page_no)
+            except Exception as e:
+                print(f"Thumbnail of page {page_no + 1} skipped: {e}")
+                continue
+            on_ready(page_no, image)
+
+    def thumbnail(self, session, doc_hash, page_no):
+        """Thumbnail of page_no from the disk cache, rendering and storing it on a miss"""
+        key = ccris_cache.make_key("thumbnail", doc_hash, page_no, self.width)
+        png = self.disk_cache.get(key) if self.disk_cache is not None else None
+        if png is not None:
+            image = Image.open(io.BytesIO(png))
+            image.load()
+            return image
+
+        with session.fitz_lock:
+            page_width = session.fitz_doc[page_no].rect.width
+        image = render_page(session, page_no, self.width / page_width if page_width else PREVIEW_ZOOM)
+        self.rendered += 1
+        if self.disk_cache is not None:
+            buffer = io.BytesIO()
+            image.save(buffer, format="PNG", optimize=True)
+            self.disk_cache.put(key, buffer.getvalue())
+        return image
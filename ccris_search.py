@@ -0,0 +1,217 @@
+"""Full-text search over the text layer of the loaded PDFs.
+
+TextIndexer reads each PDF's text with PyMuPDF on a background thread and
+adds it to a FullTextIndex, an in-memory inverted index from words to the
+pages containing them. The page texts are kept in the extraction cache,
+keyed by the file's SHA-256, so a report is only read once however often
+it is loaded. A query intersects the posting sets of its words instead of
+scanning every page, so searching a whole batch takes milliseconds.
+Tk-free.
+"""
+import hashlib
+import re
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import ccris_cache
+import ccris_lazy
+
+fitz = ccris_lazy.lazy_import("fitz")  # PyMuPDF; loaded when the first file is indexed
+if TYPE_CHECKING:  # Never run; lets type checkers and PyInstaller's import scan see PyMuPDF
+    import fitz
+
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+TEXT_VERSION = 1  # Part of the cache key; bump if the stored page text changes
+SNIPPET_CONTEXT = 40  # Characters shown either side of a match
+
+
+def tokenize(text):
+    """Lower-case words of text; punctuation separates words, so "900101-14-5678" is three"""
+    return WORD_PATTERN.findall(text.lower())
+
+
+class SearchHit:
+    """One page matching a query"""
+
+    def __init__(self, path, page_no, snippet):
+        self.path = path
+        self.page_no = page_no
+        self.snippet = snippet
+
+
+class FullTextIndex:
+    """Inverted index from words to the pages of the indexed documents
+
+    Every page gets an id when its document is added; postings maps each
+    word to the ids of the pages containing it. A query matches the pages
+    whose text has its words in order, next to each other (punctuation and
+    line breaks ignored); the last word also matches as a prefix so results
+    can follow typing.
+    """
+
+    def __init__(self):
+        self.documents = {}  # path -> page ids, in the order the documents were added
+        self.pages = {}  # page id -> (path, page_no, text, words joined by spaces)
+        self.postings = defaultdict(set)  # word -> page ids
+        self._next_page_id = 0
+        self._vocabulary = None  # Sorted words for prefix lookups; rebuilt after changes
+        self._lock = threading.Lock()
+
+    def __contains__(self, path):
+        return path in self.documents
+
+    def __len__(self):
+        return len(self.documents)
+
+    def add_document(self, path, page_texts):
+        """Index page_texts (one string per page) under path, replacing any earlier version"""
+        with self._lock:
+            self._remove(path)
+            page_ids = []
+            for page_no, text in enumerate(page_texts):
+                words = tokenize(text)
+                page_id = self._next_page_id
+                self._next_page_id += 1
+                self.pages[page_id] = (path, page_no, text, " ".join(words))
+                for word in set(words):
+                    self.postings[word].add(page_id)
+                page_ids.append(page_id)
+            self.documents[path] = page_ids
+            self._vocabulary = None
+
+    def remove_document(self, path):
+        """Drop path from the index"""
+        with self._lock:
+            self._remove(path)
+
+    def _remove(self, path):
+        for page_id in self.documents.pop(path, ()):
+            _, _, _, words = self.pages.pop(page_id)
+            for word in set(words.split()):
+                page_ids = self.postings[word]
+                page_ids.discard(page_id)
+                if not page_ids:
+                    del self.postings[word]
+            self._vocabulary = None
+
+    def search(self, query, limit=100):
+        """Pages matching query, in document and page order: (first limit SearchHits, total matches)"""
+        words = tokenize(query)
+        if not words:
+            return [], 0
+
+        with self._lock:
+            candidates = self._candidate_pages(words)
+            # Postings only say each word is on the page; check they appear as a phrase
+            phrase = " " + " ".join(words)
+            page_ids = sorted(
+                page_id for page_id in candidates if phrase in " " + self.pages[page_id][3] + " "
+            )
+            matches = [self.pages[page_id][:3] for page_id in page_ids]
+
+        # Same phrase in the original text: any run of non-word characters between the words
+        pattern = re.compile(r"(?<![a-z0-9])" + r"[^a-z0-9]+".join(map(re.escape, words)), re.IGNORECASE)
+        hits = [SearchHit(path, page_no, snippet(text, pattern)) for path, page_no, text in matches[:limit]]
+        return hits, len(matches)
+
+    def _candidate_pages(self, words):
+        # Pages with every word (the last one as a prefix), smallest posting sets first
+        *complete, last = words
+        postings = [self.postings.get(word, set()) for word in complete]
+        postings.append(self._pages_with_prefix(last))
+        postings.sort(key=len)
+        candidates = set(postings[0])
+        for page_ids in postings[1:]:
+            if not candidates:
+                break
+            candidates &= page_ids
+        return candidates
+
+    def _pages_with_prefix(self, prefix):
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self.postings)
+        page_ids = set()
+        for i in range(bisect_left(self._vocabulary, prefix), len(self._vocabulary)):
+            word = self._vocabulary[i]
+            if not word.startswith(prefix):
+                break
+            page_ids |= self.postings[word]
+        return page_ids
+
+
+def snippet(text, pattern, context=SNIPPET_CONTEXT):
+    """One-line extract of text around the first match of pattern"""
+    match = pattern.search(text)
+    start, end = (match.start(), match.end()) if match else (0, 0)
+    extract = " ".join(text[max(0, start - context):end + context].split())
+    prefix = "…" if start > context else ""
+    suffix = "…" if end + context < len(text) else ""
+    return prefix + extract + suffix
+
+
+class TextIndexer:
+    """Keeps a FullTextIndex in step with the loaded PDFs, reading them on a background thread
+
+    index_files() is called with the current file list whenever it changes:
+    documents no longer listed are dropped at once and missing ones are
+    queued. A newer call abandons what an older one still had queued.
+    """
+
+    def __init__(self, disk_cache=None, index=None):
+        self.index = index if index is not None else FullTextIndex()
+        self.disk_cache = disk_cache
+        self.generation = 0
+        self.extracted = 0  # Files whose text was read from the PDF (disk cache misses)
+        self.skipped = set()  # Paths that could not be read (e.g. password-protected); not retried
+        self._lock = threading.Lock()
+        self._worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="text-index")
+
+    def index_files(self, paths, on_progress=None):
+        """Index paths; on_progress(done, total) is called from the worker thread after each file"""
+        paths = [str(path) for path in paths]
+        with self._lock:
+            self.generation += 1
+            generation = self.generation
+        listed = set(paths)
+        for path in list(self.index.documents):
+            if path not in listed:
+                self.index.remove_document(path)
+        self._worker.submit(self._index_files, generation, paths, on_progress)
+
+    def _index_files(self, generation, paths, on_progress):
+        for done, path in enumerate(paths, 1):
+            if generation != self.generation:
+                return
+            if path not in self.index and path not in self.skipped:
+                try:
+                    page_texts = self.page_texts(path)
+                except Exception as e:
+                    print(f"Search index skipped {Path(path).name}: {e}")
+                    self.skipped.add(path)
+                    page_texts = None
+                # The file list may have changed while the file was read
+                if generation != self.generation:
+                    return
+                if page_texts is not None:
+                    self.index.add_document(path, page_texts)
+            if on_progress:
+                on_progress(done, len(paths))
+
+    def page_texts(self, path):
+        """Text of every page of the PDF at path, from the disk cache if the file was read before"""
+        data = Path(path).read_bytes()
+        key = ccris_cache.make_key("page_text", hashlib.sha256(data).hexdigest(), TEXT_VERSION)
+        page_texts = self.disk_cache.get(key) if self.disk_cache is not None else None
+        if page_texts is not None:
+            return page_texts
+
+        with fitz.open(stream=data, filetype="pdf") as doc:
+            page_texts = [page.get_text("text") for page in doc]
+        self.extracted += 1
+        if self.disk_cache is not None:
+            self.disk_cache.put(key, page_texts)
+        return page_texts
@@ -1,17 +1,29 @@
 import customtkinter as ctk
 from tkinter import filedialog, messagebox, ttk
 import tkinter as tk
-import pandas as pd
-import pdfplumber
 from pathlib import Path
-from datetime import datetime
-import re
-import fitz  # PyMuPDF
 from PIL import Image, ImageTk, ImageFilter
-import io
 import threading
 import time
-import numpy as np
+import multiprocessing
+from typing import TYPE_CHECKING
+import ccris_cache
+import ccris_lazy
+import ccris_render
+import ccris_search
+
+# pandas, pdfplumber and the extraction modules load on first use so the window appears straight away
+pd = ccris_lazy.lazy_import("pandas")
+pdfplumber = ccris_lazy.lazy_import("pdfplumber")
+ccris_engine = ccris_lazy.lazy_import("ccris_engine")
+ccris_clean = ccris_lazy.lazy_import("ccris_clean")
+ccris_database = ccris_lazy.lazy_import("ccris_database")
+ccris_export = ccris_lazy.lazy_import("ccris_export")
+ccris_grid = ccris_lazy.lazy_import("ccris_grid")
+if TYPE_CHECKING:  # Never run; lets type checkers and PyInstaller's import scan see the modules above
+    import pandas as pd
+    import pdfplumber
+    import ccris_engine, ccris_clean, ccris_database, ccris_export, ccris_grid
 
 class PDFtoExcelApp(ctk.CTk):
     def __init__(self):
@@ -30,7 +42,24 @@ class PDFtoExcelApp(ctk.CTk):
         self.pdf_paths = []  # For batch processing
         self.extracted_sections = {}
         self.file_previews = {}  # Store previews per file: {filename: DataFrame}
+        self.file_table_layouts = {}  # Detected table layout per auto-extracted file: {filename: layout}
+        self.dirty_previews = set()  # Previews changed since the last database build
+        self.database_row_cache = {}  # Database rows per file: {filename: (preview hash, rows)}
         self.pdf_document = None
+        self.pdf_session = None  # Cached document session backing pdf_document
+        self.page_renders = ccris_render.PageRenderCache()  # Recently rendered pages plus prefetched neighbours
+        self.page_tiles = ccris_render.TileRenderer(self.page_renders)  # Sharpens pages shown from a quick preview
+        self.pdf_zoom = ccris_render.DEFAULT_ZOOM  # Zoom of the page on the canvas (canvas px per PDF point)
+        self.pdf_page_item = None  # Canvas item of the page image; tiles sit just above it
+        self.pdf_tile_photos = []  # PhotoImages of the tiles on the canvas
+        self.thumbnails = ccris_render.ThumbnailRenderer(ccris_cache.thumbnail_cache())  # Page strip renderer
+        self.text_index = ccris_search.TextIndexer(ccris_cache.extraction_cache())  # Full-text index for the search box
+        self.search_hits = {}  # Entries of the search results menu: {label: SearchHit}
+        self.search_job = None  # Pending search while the query is being typed
+        self.refit_job = None  # Pending "Fit width" re-render while the viewer is being resized
+        self.thumb_slots = []  # (top y, height) of each page's slot in the thumbnail strip
+        self.thumb_requested = set()  # Pages whose thumbnail has been queued
+        self.thumb_photos = {}  # PhotoImages in the strip: {page_num: photo}
         self.current_page = 0
         self.pdf_x_offset = 0  # X offset for centered PDF
         self.pdf_y_offset = 0  # Y offset for PDF position
@@ -44,9 +73,10 @@ class PDFtoExcelApp(ctk.CTk):
         self.temp_selections = {}  # Temporary selections before saving: {page_num: [(bbox, rect_id), ...]}
         self.selection_history = []  # History for undo: [(page_num, bbox, rect_id), ...]
         self.file_risk_grades = {}  # Store risk grades per file: {filename: risk_grade}
+        self.worker_count = None  # Worker processes for extraction (None: CCRIS_WORKERS or the CPU count)
         
         # Database variables
-        self.database_df = pd.DataFrame()  # Combined database DataFrame
+        self.database_df = None  # Combined database DataFrame (None until built)
         
         # Loading screen variables
         self.loading_frame = None
@@ -55,7 +85,9 @@ class PDFtoExcelApp(ctk.CTk):
         self.loading_progress_label = None
         self.loading_current_frame = 0
         self.loading_animation_job = None
+        self.loading_cancel_btn = None
         self.blur_overlay = None
+        self.batch_cancel_event = None  # Set to stop a running batch after the current files
         
         # Create GUI
         self.create_widgets()
@@ -150,12 +182,32 @@ class PDFtoExcelApp(ctk.CTk):
         # Create Tabbed Interfaceabel to prevent errors (but don't pack it)
         self.file_label = ctk.CTkLabel(self, text="")
         
-        # Create Tabbed Interface
-        self.tab_view = ctk.CTkTabview(self, width=1350, height=650)
+        # Create Tabbed Interface (the Excel Preview and Database Viewer tabs are built on first use)
+        self.tab_view = ctk.CTkTabview(self, width=1350, height=650, command=self.on_tab_changed)
         self.tab_view.pack(pady=10, padx=20, fill="both", expand=True)
+        self.tab_view.add("📄 PDF Viewer")
+        self.tab_view.add("📊 Excel Preview")
+        self.tab_view.add("🗄️ Database Viewer")
+        self.excel_tab_built = False
+        self.database_tab_built = False
+        
+        # Treeview style shared by the Excel Preview and Database Viewer grids
+        style = ttk.Style()
+        style.theme_use("default")
+        style.configure("Treeview",
+                        background="#2b2b2b",
+                        foreground="white",
+                        fieldbackground="#2b2b2b",
+                        borderwidth=1,
+                        relief="solid")
+        style.configure("Treeview.Heading",
+                        background="#1f538d",
+                        foreground="white",
+                        borderwidth=1)
+        style.map("Treeview",
+                  background=[("selected", "#144870")])
         
         # Tab 1: PDF Viewer
-        self.tab_view.add("📄 PDF Viewer")
         pdf_tab = self.tab_view.tab("📄 PDF Viewer")
         
         # PDF navigation frame
@@ -241,6 +293,59 @@ class PDFtoExcelApp(ctk.CTk):
         )
         self.apply_all_btn.pack(side="left", padx=5)
         
+        # Save Template button (saved selections as JSON for the command line batch mode)
+        self.save_template_btn = ctk.CTkButton(
+            button_container,
+            text="🗂️ Save Template",
+            command=self.save_selection_template,
+            width=150,
+            state="disabled",
+            fg_color="#0891b2",
+            hover_color="#0e7490"
+        )
+        self.save_template_btn.pack(side="left", padx=5)
+        
+        # Zoom for the PDF viewer
+        self.pdf_zoom_choice = ctk.StringVar(value="150%")
+        self.pdf_zoom_menu = ctk.CTkOptionMenu(
+            button_container,
+            values=list(ccris_render.ZOOM_LEVELS),
+            variable=self.pdf_zoom_choice,
+            command=lambda _: self.display_pdf_page(),
+            width=110
+        )
+        self.pdf_zoom_menu.pack(side="left", padx=5)
+        
+        # Full-text search across every loaded PDF
+        search_frame = ctk.CTkFrame(pdf_tab)
+        search_frame.pack(pady=(0, 5), padx=10, fill="x")
+        
+        self.search_entry = ctk.CTkEntry(
+            search_frame,
+            placeholder_text="🔍 Search loaded PDFs (company, IC number, facility...)",
+            width=380
+        )
+        self.search_entry.pack(side="left", padx=5, pady=5)
+        self.search_entry.bind("<KeyRelease>", self.on_search_typed)
+        self.search_entry.bind("<Return>", lambda e: self.run_search())
+        
+        self.search_results = ctk.CTkComboBox(
+            search_frame,
+            values=["No results"],
+            command=self.on_search_result_selected,
+            width=560,
+            state="disabled"
+        )
+        self.search_results.pack(side="left", padx=5)
+        
+        self.search_status_label = ctk.CTkLabel(
+            search_frame,
+            text="",
+            font=ctk.CTkFont(size=11),
+            text_color="gray"
+        )
+        self.search_status_label.pack(side="left", padx=10)
+        
         # PDF display canvas with scrollbar
         pdf_canvas_frame = ctk.CTkFrame(pdf_tab)
         pdf_canvas_frame.pack(pady=5, padx=10, fill="both", expand=True)
@@ -257,6 +362,24 @@ class PDFtoExcelApp(ctk.CTk):
         )
         self.pdf_canvas.configure(yscrollcommand=self.pdf_scrollbar.set)
         
+        # Page thumbnail strip (filled lazily as it scrolls)
+        self.thumb_canvas = ctk.CTkCanvas(
+            pdf_canvas_frame,
+            width=ccris_render.THUMBNAIL_WIDTH + 20,
+            bg="#232323",
+            highlightthickness=0
+        )
+        self.thumb_scrollbar = ctk.CTkScrollbar(
+            pdf_canvas_frame,
+            command=self.on_thumbnail_scroll
+        )
+        self.thumb_canvas.configure(yscrollcommand=self.thumb_scrollbar.set)
+        self.thumb_canvas.pack(side="left", fill="y")
+        self.thumb_scrollbar.pack(side="left", fill="y")
+        self.thumb_canvas.bind("<Button-1>", self.on_thumbnail_click)
+        self.thumb_canvas.bind("<MouseWheel>", self.on_thumbnail_wheel)
+        self.thumb_canvas.bind("<Configure>", lambda e: self.load_visible_thumbnails())
+        
         self.pdf_scrollbar.pack(side="right", fill="y")
         self.pdf_canvas.pack(side="left", fill="both", expand=True)
 
@@ -279,11 +402,40 @@ class PDFtoExcelApp(ctk.CTk):
         self.pdf_canvas.bind("<B1-Motion>", self.on_mouse_drag)
         self.pdf_canvas.bind("<ButtonRelease-1>", self.on_mouse_up)
         
-        # Bind mouse wheel for scrolling
+        # Bind mouse wheel for scrolling (Shift scrolls sideways when zoomed in)
         self.pdf_canvas.bind("<MouseWheel>", self.on_mouse_wheel)
+        self.pdf_canvas.bind("<Shift-MouseWheel>", self.on_shift_mouse_wheel)
+        
+        # "Fit width" follows the canvas width, so refit the page when the viewer is resized
+        self.pdf_canvas.bind("<Configure>", self.on_pdf_canvas_resized)
+        
+        # Status bar
+        self.status_label = ctk.CTkLabel(
+            self,
+            text="Ready - Please select a PDF file to begin",
+            font=ctk.CTkFont(size=11),
+            anchor="w"
+        )
+        self.status_label.pack(side="bottom", fill="x", padx=20, pady=10)
+        
+        # Setup loading screen
+        self.setup_loading_screen()
+    
+    def on_tab_changed(self):
+        """Build the Excel Preview or Database Viewer tab the first time it is opened"""
+        tab_name = self.tab_view.get()
+        if tab_name == "📊 Excel Preview":
+            self.build_excel_tab()
+        elif tab_name == "🗄️ Database Viewer":
+            self.build_database_tab()
+    
+    def build_excel_tab(self):
+        """Create the Excel Preview tab's widgets (once, when the tab is first needed)"""
+        if self.excel_tab_built:
+            return
+        self.excel_tab_built = True
         
         # Tab 2: Excel Preview
-        self.tab_view.add("📊 Excel Preview")
         excel_tab = self.tab_view.tab("📊 Excel Preview")
         
         # Excel sheet selector
@@ -316,36 +468,29 @@ class PDFtoExcelApp(ctk.CTk):
         tree_scroll_x = ctk.CTkScrollbar(excel_display_frame, orientation="horizontal")
         tree_scroll_x.pack(side="bottom", fill="x")
         
-        # Use tkinter Treeview for table display
-        style = ttk.Style()
-        style.theme_use("default")
-        style.configure("Treeview",
-                        background="#2b2b2b",
-                        foreground="white",
-                        fieldbackground="#2b2b2b",
-                        borderwidth=1,
-                        relief="solid")
-        style.configure("Treeview.Heading",
-                        background="#1f538d",
-                        foreground="white",
-                        borderwidth=1)
-        style.map("Treeview",
-                  background=[("selected", "#144870")])
-        
         self.excel_display = ttk.Treeview(
             excel_display_frame,
-            yscrollcommand=tree_scroll_y.set,
             xscrollcommand=tree_scroll_x.set,
             show="headings",
             selectmode="extended"
         )
         self.excel_display.pack(pady=10, padx=10, fill="both", expand=True)
         
-        tree_scroll_y.configure(command=self.excel_display.yview)
+        # Only the visible rows live in the tree; the grid refills them on scroll
+        self.excel_grid = ccris_grid.VirtualGrid(self.excel_display, tree_scroll_y)
         tree_scroll_x.configure(command=self.excel_display.xview)
         
+        # Show whatever has been extracted before the tab was opened
+        if self.file_previews:
+            self.update_excel_preview()
+    
+    def build_database_tab(self):
+        """Create the Database Viewer tab's widgets (once, when the tab is first needed)"""
+        if self.database_tab_built:
+            return
+        self.database_tab_built = True
+        
         # Tab 3: Database Viewer
-        self.tab_view.add("🗄️ Database Viewer")
         db_tab = self.tab_view.tab("🗄️ Database Viewer")
         
         # Database navigation frame
@@ -384,6 +529,16 @@ class PDFtoExcelApp(ctk.CTk):
         )
         self.db_export_btn.pack(pady=4)
         
+        # Output format for Export Database
+        self.db_export_format = ctk.StringVar(value=ccris_export.DATABASE_FORMATS["xlsx"][0])
+        self.db_format_menu = ctk.CTkOptionMenu(
+            db_btn_frame,
+            values=[label for label, _ in ccris_export.DATABASE_FORMATS.values()],
+            variable=self.db_export_format,
+            width=140
+        )
+        self.db_format_menu.pack(pady=4)
+        
 
         
         # Database preview area (treeview)
@@ -398,133 +553,67 @@ class PDFtoExcelApp(ctk.CTk):
         
         self.db_tree = ttk.Treeview(
             db_preview_frame,
-            yscrollcommand=db_scroll_y.set,
             xscrollcommand=db_scroll_x.set,
             show="headings",
             selectmode="extended"
         )
         self.db_tree.pack(pady=10, padx=10, fill="both", expand=True)
         
-        db_scroll_y.configure(command=self.db_tree.yview)
+        self.db_grid = ccris_grid.VirtualGrid(self.db_tree, db_scroll_y)
         db_scroll_x.configure(command=self.db_tree.xview)
         
-        # Status bar
-        self.status_label = ctk.CTkLabel(
-            self,
-            text="Ready - Please select a PDF file to begin",
-            font=ctk.CTkFont(size=11),
-            anchor="w"
-        )
-        self.status_label.pack(side="bottom", fill="x", padx=20, pady=10)
-        
-        # Setup loading screen
-        self.setup_loading_screen()
+        # Enable Build Database if previews were extracted before the tab was opened
+        self.update_database_file_list()
     
     def extract_risk_grade_from_score(self, score):
         """Convert i-SCORE to Risk Grade based on the official ranges"""
-        if score < 360:
-            return 1
-        elif 361 <= score <= 420:
-            return 2
-        elif 421 <= score <= 460:
-            return 3
-        elif 461 <= score <= 540:
-            return 4
-        elif 541 <= score <= 580:
-            return 5
-        elif 581 <= score <= 620:
-            return 6
-        elif 621 <= score <= 660:
-            return 7
-        elif 661 <= score <= 700:
-            return 8
-        elif 701 <= score <= 740:
-            return 9
-        elif score > 741:
-            return 10
-        else:
-            return None
+        return ccris_engine.risk_grade_from_score(score)
     
     def extract_iscore_and_risk_grade(self, pdf_path):
         """Extract i-SCORE and calculate risk grade from PDF"""
-        try:
-            doc = fitz.open(pdf_path)
-            
-            for page_num, page in enumerate(doc):
-                # Extract text to find i-SCORE
-                text_blocks = page.get_text("dict")
-                
-                for block in text_blocks["blocks"]:
-                    if "lines" in block:
-                        for line in block["lines"]:
-                            if "spans" in line:
-                                for span in line["spans"]:
-                                    text = span["text"].strip()
-                                    
-                                    # Look for i-SCORE pattern
-                                    if "i-SCORE" in text or "i-score" in text.lower():
-                                        # Get the bbox area around i-SCORE
-                                        bbox = span["bbox"]
-                                        search_rect = fitz.Rect(
-                                            bbox[0] - 50, bbox[1] - 20,
-                                            bbox[0] + 200, bbox[1] + 50
-                                        )
-                                        
-                                        # Extract text in this region
-                                        region_text = page.get_textbox(search_rect)
-                                        
-                                        # Find the score number
-                                        score_match = re.search(r'i-SCORE[^\d]*(\d{3,4})', region_text, re.IGNORECASE)
-                                        if score_match:
-                                            score = int(score_match.group(1))
-                                            risk_grade = self.extract_risk_grade_from_score(score)
-                                            doc.close()
-                                            return score, risk_grade
-                                        
-                                        # Alternative pattern - look for numbers near i-SCORE
-                                        numbers = re.findall(r'\b(\d{3,4})\b', region_text)
-                                        for num_str in numbers:
-                                            num = int(num_str)
-                                            if 300 <= num <= 900:  # Valid score range
-                                                risk_grade = self.extract_risk_grade_from_score(num)
-                                                doc.close()
-                                                return num, risk_grade
-            
-            doc.close()
-            return None, None
-            
-        except Exception as e:
-            print(f"Error extracting risk grade from {pdf_path}: {e}")
-            return None, None
+        return ccris_engine.extract_iscore_and_risk_grade(pdf_path)
     
     def setup_loading_screen(self):
-        """Setup the loading screen with GIF animation and blur effect"""
+        """Setup the loading screen; the GIF is opened and decoded a frame at a time as the animation reaches it"""
+        self.loading_gif = None  # Open GIF while frames are still being decoded
+        self.loading_gif_frames = []  # Frames decoded so far, as CTkImages
+        self.loading_gif_complete = False  # Every frame has been decoded
+    
+    def get_loading_gif_frame(self, index):
+        """CTkImage for frame index of the loading GIF (None past the last frame), decoded on first use"""
+        if index < len(self.loading_gif_frames):
+            return self.loading_gif_frames[index]
+        if self.loading_gif_complete:
+            return None
+        
         try:
-            # Load GIF frames
-            gif_path = r"C:\Users\aaafauzan\Desktop\VS Code\Pdf to Excel\Picture\Loading.gif"
-            gif_image = Image.open(gif_path)
-            
-            # Extract all frames from GIF
-            self.loading_gif_frames = []
-            try:
-                while True:
-                    # Resize frame to reasonable size
-                    frame = gif_image.copy().resize((100, 100), Image.Resampling.LANCZOS)
-                    # Convert to CTkImage to avoid warnings
-                    ctk_frame = ctk.CTkImage(frame, size=(100, 100))
-                    self.loading_gif_frames.append(ctk_frame)
-                    gif_image.seek(len(self.loading_gif_frames))
-            except EOFError:
-                pass  # End of GIF frames
-                
+            if self.loading_gif is None:
+                gif_path = r"C:\Users\aaafauzan\Desktop\VS Code\Pdf to Excel\Picture\Loading.gif"
+                self.loading_gif = Image.open(gif_path)
+            self.loading_gif.seek(index)
+            # Resize frame to reasonable size
+            frame = self.loading_gif.copy().resize((100, 100), Image.Resampling.LANCZOS)
+            # Convert to CTkImage to avoid warnings
+            self.loading_gif_frames.append(ctk.CTkImage(frame, size=(100, 100)))
+            return self.loading_gif_frames[index]
+        except EOFError:
+            pass  # End of GIF frames
         except Exception as e:
             print(f"Warning: Could not load loading GIF: {e}")
-            # Create a simple default loading image
-            default_img = Image.new('RGBA', (100, 100), (100, 100, 100, 255))
-            self.loading_gif_frames = [ctk.CTkImage(default_img, size=(100, 100))]
+            if not self.loading_gif_frames:
+                # Create a simple default loading image
+                default_img = Image.new('RGBA', (100, 100), (100, 100, 100, 255))
+                self.loading_gif_frames = [ctk.CTkImage(default_img, size=(100, 100))]
+        
+        # All frames are cached now, so the file is no longer needed
+        if self.loading_gif is not None:
+            self.loading_gif.close()
+            self.loading_gif = None
+        self.loading_gif_complete = True
+        return None
     
-    def show_loading_screen(self, message="Loading..."):
-        """Show loading screen with blur effect"""
+    def show_loading_screen(self, message="Loading...", cancel_command=None):
+        """Show loading screen with blur effect (and a Cancel button if cancel_command is given)"""
         if self.loading_frame:
             return  # Already showing
             
@@ -575,6 +664,18 @@ class PDFtoExcelApp(ctk.CTk):
         )
         self.loading_progress_label.pack(pady=10)
         
+        # Optional cancel button for long-running jobs
+        if cancel_command:
+            self.loading_cancel_btn = ctk.CTkButton(
+                self.loading_frame,
+                text="⏹ Cancel",
+                command=cancel_command,
+                width=120,
+                fg_color="#dc2626",
+                hover_color="#991b1b"
+            )
+            self.loading_cancel_btn.pack(pady=(0, 15))
+        
         # Start GIF animation
         self.loading_current_frame = 0
         self.animate_loading_gif()
@@ -584,15 +685,19 @@ class PDFtoExcelApp(ctk.CTk):
     
     def animate_loading_gif(self):
         """Animate the loading GIF"""
-        if not self.loading_gif_label or not self.loading_gif_frames:
+        if not self.loading_gif_label:
             return
         
         try:
-            # Update frame
-            if self.loading_current_frame >= len(self.loading_gif_frames):
+            # Update frame (wrapping round after the last one)
+            frame = self.get_loading_gif_frame(self.loading_current_frame)
+            if frame is None:
                 self.loading_current_frame = 0
+                frame = self.get_loading_gif_frame(0)
+                if frame is None:
+                    return
                 
-            self.loading_gif_label.configure(image=self.loading_gif_frames[self.loading_current_frame])
+            self.loading_gif_label.configure(image=frame)
             self.loading_current_frame += 1
             
             # Schedule next frame (50ms = 20fps for smoother animation)
@@ -634,6 +739,7 @@ class PDFtoExcelApp(ctk.CTk):
             
         self.loading_gif_label = None
         self.loading_progress_label = None
+        self.loading_cancel_btn = None
     
     def select_pdf(self):
         """Open file dialog to select PDF file"""
@@ -692,6 +798,7 @@ class PDFtoExcelApp(ctk.CTk):
                         # Clear previous extractions
                         self.extracted_sections = {}
                         self.file_previews = {}  # Clear previous previews
+                        self.file_table_layouts = {}
                         
                         # Initialize preview entries for all files
                         for pdf_path in self.pdf_paths:
@@ -757,6 +864,7 @@ class PDFtoExcelApp(ctk.CTk):
                             # Clear previous extractions
                             self.extracted_sections = {}
                             self.file_previews = {}  # Clear previous previews
+                            self.file_table_layouts = {}
                             
                             # Initialize preview entries for all files
                             for pdf_path in self.pdf_paths:
@@ -794,92 +902,11 @@ class PDFtoExcelApp(ctk.CTk):
     
     def is_header_footer(self, text):
         """Check if text is part of header or footer"""
-        if not text or pd.isna(text):
-            return True
-        
-        text_str = str(text).strip()
-        text_lower = text_str.lower()
-        
-        # Exact footer patterns
-        footer_keywords = [
-            'commercial confidential',
-            'experian information services (malaysia) sdn. bhd.',
-            'is certified to iso/iec',
-            'cert. no: ism',
-            'notice: the information provided by experian',
-            'we do not guarantee the accuracy',
-            'while we have used our best endeavours',
-            'the information furnished is strictly confidential',
-            'experian shall not be liable',
-            'customer service division at:',
-            'suite 16.02, level 16',
-            'centrepoint south mid valley city',
-            'lingkaran syed putra',
-            'kuala lumpur',
-            '+60326151111',
-            'page',
-            'of 7'
-        ]
-        
-        # Exact header patterns
-        header_keywords = [
-            'strictly confidential',
-            'order id',
-            'credittrack by experian',
-            'order date',
-            'effective date',
-            'user name',
-            'check/track by experian'
-        ]
-        
-        # Check footer patterns
-        for keyword in footer_keywords:
-            if keyword in text_lower:
-                return True
-        
-        # Check header patterns
-        for keyword in header_keywords:
-            if keyword in text_lower:
-                return True
-        
-        # Check if text is mostly the disclaimer
-        if len(text_str) > 200 and 'experian' in text_lower:
-            return True
-        
-        # Check if it's just a page number pattern
-        if re.match(r'^page\s+\d+\s+of\s+\d+$', text_lower):
-            return True
-        
-        # Check for Order ID pattern
-        if re.match(r'.*order\s+id\s*:\s*\d+.*', text_lower):
-            return True
-            
-        return False
+        return ccris_clean.is_header_footer(text)
     
     def clean_table_data(self, df):
         """Remove header/footer rows from dataframe"""
-        if df.empty:
-            return df
-        
-        # Remove rows where ANY column contains header/footer text
-        rows_to_keep = []
-        for idx, row in df.iterrows():
-            # Check if this row contains header/footer content
-            is_bad_row = False
-            for cell in row:
-                if self.is_header_footer(cell):
-                    is_bad_row = True
-                    break
-            
-            if not is_bad_row:
-                rows_to_keep.append(idx)
-        
-        df_cleaned = df.loc[rows_to_keep].reset_index(drop=True)
-        
-        # Remove columns that are all empty or None
-        df_cleaned = df_cleaned.dropna(axis=1, how='all')
-        
-        return df_cleaned
+        return ccris_clean.clean_table_data(df)
     
     def clean_extracted_data(self):
         """Deep clean extracted data to remove all header/footer contamination"""
@@ -915,14 +942,21 @@ class PDFtoExcelApp(ctk.CTk):
             import traceback
             traceback.print_exc()
     
-    def load_pdf_viewer(self, pdf_path):
-        """Load PDF into the PDF viewer tab"""
+    def load_pdf_viewer(self, pdf_path, page_num=0):
+        """Load PDF into the PDF viewer tab, showing page_num"""
         try:
-            if self.pdf_document:
-                self.pdf_document.close()
+            # Hand the previous document back to the shared cache instead of closing it
+            if self.pdf_session:
+                ccris_engine.document_cache.release(self.pdf_session)
+                self.pdf_session = None
+            
+            self.pdf_session = ccris_engine.document_cache.acquire(pdf_path)
+            self.pdf_document = self.pdf_session.fitz_doc
+            self.current_page = page_num
+            self.build_thumbnail_strip()
             
-            self.pdf_document = fitz.open(pdf_path)
-            self.current_page = 0
+            # Keep the search index in step with the loaded files
+            self.update_text_index()
             
             # Enable navigation buttons
             self.select_table_btn.configure(state="normal")
@@ -961,27 +995,34 @@ class PDFtoExcelApp(ctk.CTk):
             return
         
         try:
-            page = self.pdf_document[self.current_page]
-            
             # Update page label and sticky center
             page_text = f"Page {self.current_page + 1} of {len(self.pdf_document)}"
             self.page_label.configure(text=page_text)
             self.sticky_center.configure(text=page_text)
             
-            # Render page to image
-            zoom = 1.5  # Zoom factor for better quality
-            mat = fitz.Matrix(zoom, zoom)
-            pix = page.get_pixmap(matrix=mat)
-            
-            # Convert to PIL Image
-            img_data = pix.tobytes("ppm")
-            img = Image.open(io.BytesIO(img_data))
-            
-            # Convert to PhotoImage
-            photo = ImageTk.PhotoImage(img)
+            # Zoom chosen in the toolbar; selections are converted with the same factor
+            zoom = self.current_zoom()
+            self.pdf_zoom = zoom
+            
+            # Render page to image (cached, or prefetched while the previous page was shown)
+            rendered = self.page_renders.peek(self.pdf_session, self.current_page, zoom)
+            progressive = rendered is None
+            if progressive:
+                # Not rendered yet: show a quick low-resolution pass, sharp tiles follow in the background
+                img = ccris_render.render_preview(self.pdf_session, self.current_page, zoom)
+                photo = ImageTk.PhotoImage(img)
+            else:
+                img = rendered.image
+                
+                # Convert to PhotoImage once per cached page
+                if rendered.photo is None:
+                    rendered.photo = ImageTk.PhotoImage(img)
+                photo = rendered.photo
             
-            # Clear canvas
+            # Clear canvas (and stop sharpening the previous page)
+            self.page_tiles.cancel()
             self.pdf_canvas.delete("all")
+            self.pdf_tile_photos = []
             
             # Get canvas size
             canvas_width = self.pdf_canvas.winfo_width()
@@ -997,7 +1038,7 @@ class PDFtoExcelApp(ctk.CTk):
             self.pdf_y_offset = y_center
             
             # Display image centered horizontally
-            self.pdf_canvas.create_image(x_center, y_center, anchor="nw", image=photo)
+            self.pdf_page_item = self.pdf_canvas.create_image(x_center, y_center, anchor="nw", image=photo)
             self.pdf_canvas.image = photo  # Keep a reference
             
             # Update scroll region
@@ -1005,10 +1046,156 @@ class PDFtoExcelApp(ctk.CTk):
             
             # Redraw saved selections
             self.redraw_selections()
+            self.highlight_thumbnail()
+            
+            if progressive:
+                # Tiles in view first (page pixel coordinates of the visible canvas area)
+                view_top = self.pdf_canvas.canvasy(0) - y_center
+                visible_box = (0, view_top, img_width, view_top + canvas_height)
+                self.page_tiles.start(self.pdf_session, self.current_page, zoom, visible_box,
+                                      on_tile=self.on_tile_rendered)
+            
+            # Render the neighbouring pages while this one is being read
+            self.page_renders.prefetch(self.pdf_session, self.current_page, zoom, on_ready=self.on_page_prefetched)
             
         except Exception as e:
             print(f"Error displaying PDF page: {e}")
     
+    def build_thumbnail_strip(self):
+        """Lay out one placeholder per page in the thumbnail strip; images load as they scroll into view"""
+        self.thumbnails.reset()
+        self.thumb_canvas.delete("all")
+        self.thumb_canvas.yview_moveto(0)
+        self.thumb_slots = []
+        self.thumb_requested = set()
+        self.thumb_photos = {}
+        
+        width = ccris_render.THUMBNAIL_WIDTH
+        y = 10
+        for page_num, (page_width, page_height) in enumerate(ccris_render.page_sizes(self.pdf_session)):
+            height = int(width * page_height / page_width) if page_width else width
+            self.thumb_canvas.create_rectangle(10, y, 10 + width, y + height, fill="#3a3a3a", outline="#555555")
+            self.thumb_canvas.create_text(10 + width // 2, y + height // 2, text=str(page_num + 1), fill="#aaaaaa")
+            self.thumb_slots.append((y, height))
+            y += height + 20
+        self.thumb_canvas.configure(scrollregion=(0, 0, width + 20, y))
+        self.load_visible_thumbnails()
+    
+    def load_visible_thumbnails(self):
+        """Queue thumbnails for the pages in (or just below) the visible part of the strip"""
+        if not self.pdf_session or not self.thumb_slots:
+            return
+        top = self.thumb_canvas.canvasy(0)
+        bottom = top + max(self.thumb_canvas.winfo_height(), 400) * 2  # Look one screen ahead
+        pages = [
+            page_num for page_num, (y, height) in enumerate(self.thumb_slots)
+            if y + height >= top and y <= bottom and page_num not in self.thumb_requested
+        ]
+        if pages:
+            self.thumb_requested.update(pages)
+            session = self.pdf_session
+            self.thumbnails.request(
+                session, pages,
+                on_ready=lambda page_num, image: self.after(0, self.show_thumbnail, session, page_num, image)
+            )
+    
+    def show_thumbnail(self, session, page_num, image):
+        """Put a rendered thumbnail in its slot (Tk thread)"""
+        if session is not self.pdf_session or page_num >= len(self.thumb_slots):
+            return  # Switched files since it was requested
+        photo = ImageTk.PhotoImage(image)
+        self.thumb_photos[page_num] = photo
+        self.thumb_canvas.create_image(10, self.thumb_slots[page_num][0], anchor="nw", image=photo)
+        self.thumb_canvas.tag_raise("current_page")
+    
+    def highlight_thumbnail(self):
+        """Outline the current page in the strip and scroll it into view"""
+        self.thumb_canvas.delete("current_page")
+        if self.current_page >= len(self.thumb_slots):
+            return
+        y, height = self.thumb_slots[self.current_page]
+        self.thumb_canvas.create_rectangle(
+            7, y - 3, ccris_render.THUMBNAIL_WIDTH + 13, y + height + 3,
+            outline="#1f6aa5", width=3, tags="current_page"
+        )
+        top = self.thumb_canvas.canvasy(0)
+        view_height = self.thumb_canvas.winfo_height()
+        if y < top or y + height > top + view_height:
+            total_height = self.thumb_slots[-1][0] + self.thumb_slots[-1][1] + 20
+            self.thumb_canvas.yview_moveto(max(0, y - 10) / total_height)
+            self.load_visible_thumbnails()
+    
+    def on_thumbnail_click(self, event):
+        """Jump to the page whose thumbnail was clicked"""
+        y = self.thumb_canvas.canvasy(event.y)
+        for page_num, (top, height) in enumerate(self.thumb_slots):
+            if top - 10 <= y <= top + height + 10:
+                if page_num != self.current_page:
+                    self.current_page = page_num
+                    self.display_pdf_page()
+                return
+    
+    def on_thumbnail_scroll(self, *args):
+        """Scrollbar command for the strip"""
+        self.thumb_canvas.yview(*args)
+        self.load_visible_thumbnails()
+    
+    def on_thumbnail_wheel(self, event):
+        """Scroll the thumbnail strip with the mouse wheel"""
+        self.thumb_canvas.yview_scroll(int(-1*(event.delta/120)), "units")
+        self.load_visible_thumbnails()
+    
+    def current_zoom(self):
+        """Zoom factor picked in the zoom menu ("Fit width" follows the canvas width)"""
+        zoom = ccris_render.ZOOM_LEVELS.get(self.pdf_zoom_choice.get(), ccris_render.DEFAULT_ZOOM)
+        if zoom is None:
+            canvas_width = self.pdf_canvas.winfo_width()
+            if canvas_width <= 1:
+                return ccris_render.DEFAULT_ZOOM  # Canvas not laid out yet
+            zoom = ccris_render.fit_width_zoom(self.pdf_session, self.current_page, canvas_width)
+        return zoom
+    
+    def on_pdf_canvas_resized(self, event=None):
+        """Refit the page shortly after resizing stops when the zoom is Fit width"""
+        if self.pdf_zoom_choice.get() != "Fit width" or not self.pdf_document:
+            return
+        if self.refit_job:
+            self.after_cancel(self.refit_job)
+        self.refit_job = self.after(250, self.refit_pdf_page)
+    
+    def refit_pdf_page(self):
+        """Re-render the current page if the canvas width changed its "Fit width" zoom"""
+        self.refit_job = None
+        if self.pdf_zoom_choice.get() != "Fit width" or not self.pdf_document:
+            return
+        if abs(self.current_zoom() - self.pdf_zoom) > 1e-6:
+            self.display_pdf_page()
+    
+    def on_tile_rendered(self, generation, tile):
+        """Put a sharp tile over the preview of the current page (called from the tile thread)"""
+        def place_tile():
+            # Skip tiles for a page or zoom that is no longer shown
+            if generation != self.page_tiles.generation or self.pdf_page_item is None:
+                return
+            if tile.photo is None:
+                tile.photo = ImageTk.PhotoImage(tile.image)
+            x, y = tile.position
+            item = self.pdf_canvas.create_image(
+                self.pdf_x_offset + x, self.pdf_y_offset + y, anchor="nw", image=tile.photo
+            )
+            # Keep tiles under the selection rectangles, page preview under the tiles
+            self.pdf_canvas.tag_lower(item)
+            self.pdf_canvas.tag_lower(self.pdf_page_item)
+            self.pdf_tile_photos.append(tile.photo)
+        self.after(0, place_tile)
+    
+    def on_page_prefetched(self, page_no, rendered):
+        """Build the PhotoImage for a prefetched page on the Tk thread so flipping to it is instant"""
+        def make_photo():
+            if rendered.photo is None:
+                rendered.photo = ImageTk.PhotoImage(rendered.image)
+        self.after(0, make_photo)
+    
     def previous_page(self):
         """Go to previous PDF page"""
         if self.current_page > 0:
@@ -1026,6 +1213,80 @@ class PDFtoExcelApp(ctk.CTk):
         # Scroll the canvas vertically
         self.pdf_canvas.yview_scroll(int(-1*(event.delta/120)), "units")
     
+    def on_shift_mouse_wheel(self, event):
+        """Scroll the canvas sideways (pages wider than the viewer at high zoom)"""
+        self.pdf_canvas.xview_scroll(int(-1*(event.delta/120)), "units")
+    
+    def update_text_index(self):
+        """Index the text of the loaded PDFs in the background (files indexed before are kept)"""
+        paths = self.pdf_paths or ([self.pdf_path] if self.pdf_path else [])
+        self.text_index.index_files(
+            paths, on_progress=lambda done, total: self.after(0, lambda: self.on_text_indexed(done, total))
+        )
+    
+    def on_text_indexed(self, done, total):
+        """Show indexing progress; re-run the current search once every file is in"""
+        if done < total:
+            self.search_status_label.configure(text=f"Indexing text {done}/{total} files...")
+        elif self.search_entry.get().strip():
+            self.run_search()
+        else:
+            self.search_status_label.configure(text=f"{len(self.text_index.index)} files searchable")
+    
+    def on_search_typed(self, event=None):
+        """Search shortly after typing stops"""
+        if event is not None and event.keysym == "Return":
+            return  # Handled by the <Return> binding
+        if self.search_job:
+            self.after_cancel(self.search_job)
+        self.search_job = self.after(250, self.run_search)
+    
+    def run_search(self):
+        """Look the query up in the text index and list the matching pages"""
+        if self.search_job:
+            self.after_cancel(self.search_job)
+            self.search_job = None
+        
+        query = self.search_entry.get().strip()
+        self.search_hits = {}
+        if not query:
+            self.search_results.configure(values=["No results"], state="disabled")
+            self.search_results.set("")
+            self.search_status_label.configure(text="")
+            return
+        
+        started = time.perf_counter()
+        hits, total = self.text_index.index.search(query, limit=200)
+        elapsed = time.perf_counter() - started
+        
+        for hit in hits:
+            label = f"{Path(hit.path).name}  p.{hit.page_no + 1}:  {hit.snippet}"
+            self.search_hits[label] = hit
+        
+        if hits:
+            self.search_results.configure(values=list(self.search_hits), state="readonly")
+            self.search_results.set(f"{total} matching page{'s' if total != 1 else ''} - pick one to open")
+        else:
+            self.search_results.configure(values=["No results"], state="disabled")
+            self.search_results.set("No results")
+        shown = f", first {len(hits)} listed" if total > len(hits) else ""
+        self.search_status_label.configure(text=f"{total} pages{shown} - {elapsed * 1000:.1f} ms")
+    
+    def on_search_result_selected(self, label):
+        """Open the file and page of the chosen search result in the viewer"""
+        hit = self.search_hits.get(label)
+        if hit is None:
+            return
+        
+        if self.pdf_path is None or Path(hit.path) != Path(self.pdf_path):
+            self.pdf_path = hit.path
+            self.load_pdf_viewer(hit.path, page_num=hit.page_no)
+        elif hit.page_no != self.current_page:
+            self.current_page = hit.page_no
+            self.display_pdf_page()
+        self.pdf_canvas.yview_moveto(0)
+        self.status_label.configure(text=f"Search: {Path(hit.path).name}, page {hit.page_no + 1}")
+    
     def toggle_selection_mode(self):
         """Toggle table selection mode"""
         self.selecting = not self.selecting
@@ -1096,7 +1357,7 @@ class PDFtoExcelApp(ctk.CTk):
         pdf_y2 = y2 - self.pdf_y_offset
         
         # Then account for zoom factor
-        zoom = 1.5
+        zoom = self.pdf_zoom
         
         # Get bounding box in PDF coordinates
         bbox = (pdf_x1/zoom, pdf_y1/zoom, pdf_x2/zoom, pdf_y2/zoom)
@@ -1150,7 +1411,9 @@ class PDFtoExcelApp(ctk.CTk):
                         self.file_risk_grades[file_name] = risk_grade
                 
                 # Extract data from all temp selections on this page
-                with pdfplumber.open(current_file) as pdf:
+                new_tables = []
+                with ccris_engine.open_document(current_file) as session, session.plumber_lock:
+                    pdf = session.plumber
                     page = pdf.pages[self.current_page]
                     
                     selection_count = len(self.temp_selections[self.current_page])
@@ -1165,17 +1428,7 @@ class PDFtoExcelApp(ctk.CTk):
                         table = cropped.extract_table()
                         
                         if table:
-                            new_df = pd.DataFrame(table)
-                            
-                            # Append to file preview
-                            if file_name in self.file_previews:
-                                existing_df = self.file_previews[file_name]
-                                # Add separator
-                                num_cols = max(len(existing_df.columns), len(new_df.columns))
-                                separator = pd.DataFrame([[None] * num_cols] * 2)
-                                self.file_previews[file_name] = pd.concat([existing_df, separator, new_df], ignore_index=True)
-                            else:
-                                self.file_previews[file_name] = new_df
+                            new_tables.append(table)
                         
                         # Change rectangle color to blue (saved) on main thread
                         self.after(0, lambda rid=rect_id: self.pdf_canvas.itemconfig(rid, outline="blue"))
@@ -1185,6 +1438,11 @@ class PDFtoExcelApp(ctk.CTk):
                             self.saved_selections[self.current_page] = []
                         self.saved_selections[self.current_page].append(bbox)
                 
+                # Append all of this page's tables to the file preview in one go
+                if new_tables:
+                    self.append_tables(self.file_previews, file_name, new_tables)
+                    self.dirty_previews.add(file_name)
+                
                 # Clear temp selections for this page
                 saved_count = len(self.temp_selections[self.current_page])
                 self.temp_selections[self.current_page] = []
@@ -1196,6 +1454,7 @@ class PDFtoExcelApp(ctk.CTk):
                     # Update preview
                     self.update_excel_preview()
                     self.export_btn.configure(state="normal")
+                    self.save_template_btn.configure(state="normal")
                     
                     total_saved = sum(len(sels) for sels in self.saved_selections.values())
                     self.status_label.configure(text=f"✓ Saved {saved_count} selection(s) from page {self.current_page + 1}! Total saved: {total_saved}")
@@ -1215,6 +1474,26 @@ class PDFtoExcelApp(ctk.CTk):
         thread = threading.Thread(target=save_selections_thread, daemon=True)
         thread.start()
     
+    def save_selection_template(self):
+        """Save the saved selection areas as a JSON template for `python -m ccris extract --template`"""
+        if not self.saved_selections:
+            messagebox.showerror("Error", "No selections saved! Please mark and save selections first.")
+            return
+        
+        template_path = filedialog.asksaveasfilename(
+            title="Save Selection Template",
+            defaultextension=".json",
+            filetypes=[("Selection Template", "*.json"), ("All Files", "*.*")]
+        )
+        if not template_path:
+            return
+        
+        try:
+            ccris_engine.save_selection_template(self.saved_selections, template_path)
+            self.status_label.configure(text=f"✓ Template saved: {Path(template_path).name}")
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to save template:\n{str(e)}")
+    
     def undo_last_selection(self):
         """Undo the most recent selection (remove from temp selections)"""
         if not self.selection_history:
@@ -1249,65 +1528,42 @@ class PDFtoExcelApp(ctk.CTk):
         
         def auto_extract_thread():
             try:
-                header_crop = 90  # Top 80px to remove
-                footer_crop = 90  # Bottom 80px to remove
                 processed = 0
                 total_files = len(files)
+                engine = ccris_engine.ExtractionEngine(self.worker_count)
+                self.after(0, lambda: self.status_label.configure(
+                    text=f"Auto-extracting tables from {total_files} files with {min(engine.workers, total_files)} workers..."
+                ))
 
-                for file_idx, current_file in enumerate(files):
-                    try:
-                        file_name = Path(current_file).name
-                        
-                        # Extract i-SCORE and risk grade
-                        if file_name not in self.file_risk_grades:
-                            iscore, risk_grade = self.extract_iscore_and_risk_grade(current_file)
-                            if risk_grade:
-                                self.file_risk_grades[file_name] = risk_grade
-                        
-                        # Update progress
-                        progress = int((file_idx / total_files) * 90)
-                        self.after(0, lambda p=progress, fn=file_name: (
-                            self.update_loading_progress(p),
-                            self.status_label.configure(text=f"Auto-extracting tables from {fn}...")
-                        ))
-
-                        with pdfplumber.open(current_file) as pdf:
-                            all_tables = []
-                            
-                            for page in pdf.pages:
-                                page_height = page.height
-                                cropped_page = page.crop((0, header_crop, page.width, page_height - footer_crop))
-                                tables = cropped_page.extract_tables()
-                                
-                                if tables:
-                                    # Get table objects with cell bounding boxes for color detection
-                                    table_settings = {
-                                        "vertical_strategy": "lines",
-                                        "horizontal_strategy": "lines",
-                                        "snap_tolerance": 3,
-                                        "join_tolerance": 3,
-                                    }
-                                    tables_with_cells = cropped_page.find_tables(table_settings)
-                                    
-                                    for table_idx, table in enumerate(tables):
-                                        if table and len(table) > 0:
-                                            all_tables.append(table)
-
-                            if all_tables:
-                                combined_rows = []
-                                for table_idx, table in enumerate(all_tables):
-                                    combined_rows.extend(table)
-                                    if table_idx < len(all_tables) - 1:
-                                        num_cols = len(table[0]) if table else 1
-                                        combined_rows.extend([[None] * num_cols] * 2)
-
-                                df = pd.DataFrame(combined_rows)
-                                self.file_previews[file_name] = df
-                                processed += 1
-                    except Exception as e:
+                # Unchanged files come straight from the extraction cache; the rest are extracted
+                # in worker processes and stream back as they finish
+                results = engine.map_files(
+                    ccris_engine.auto_extract_file, files, cache=ccris_cache.extraction_cache(),
+                    header_crop=90, footer_crop=90
+                )
+                for done, (file_idx, result) in enumerate(results, 1):
+                    file_name = result["file_name"]
+                    
+                    if result["error"]:
                         # Continue to next file if one fails
-                        print(f"Auto-extract failed for {current_file}: {e}")
-                        continue
+                        print(f"Auto-extract failed for {result['path']}: {result['error']}")
+                    else:
+                        # Store i-SCORE risk grade
+                        if file_name not in self.file_risk_grades and result["risk_grade"]:
+                            self.file_risk_grades[file_name] = result["risk_grade"]
+                        
+                        if result["rows"]:
+                            self.file_previews[file_name] = pd.DataFrame(result["rows"])
+                            self.dirty_previews.add(file_name)
+                            self.file_table_layouts[file_name] = result["layout"]
+                            processed += 1
+                    
+                    # Update progress
+                    progress = int((done / total_files) * 90)
+                    self.after(0, lambda p=progress, fn=file_name, d=done: (
+                        self.update_loading_progress(p),
+                        self.status_label.configure(text=f"Auto-extracted {d}/{total_files}: {fn}")
+                    ))
 
                 # Final UI updates
                 def finish_extraction():
@@ -1356,72 +1612,39 @@ class PDFtoExcelApp(ctk.CTk):
         def apply_selections_thread():
             try:
                 processed_count = 0
-                header_crop = 80  # Top 80px to remove
-                footer_crop = 80  # Bottom 80px to remove
                 total_files = len(self.pdf_paths)
-                
-                for file_idx, pdf_path in enumerate(self.pdf_paths):
-                    file_name = Path(pdf_path).name
+                engine = ccris_engine.ExtractionEngine(self.worker_count)
+                
+                # Unchanged files with the same selections come from the extraction cache
+                results = engine.map_files(
+                    ccris_engine.extract_file_with_selections, self.pdf_paths,
+                    cache=ccris_cache.extraction_cache(),
+                    selections={page: list(boxes) for page, boxes in self.saved_selections.items()},
+                    header_crop=80, footer_crop=80
+                )
+                for done, (file_idx, result) in enumerate(results, 1):
+                    file_name = result["file_name"]
                     
-                    # Extract i-SCORE and risk grade
-                    if file_name not in self.file_risk_grades:
-                        iscore, risk_grade = self.extract_iscore_and_risk_grade(pdf_path)
-                        if risk_grade:
-                            self.file_risk_grades[file_name] = risk_grade
+                    if result["error"]:
+                        print(f"Error processing {file_name}: {result['error']}")
+                    else:
+                        # Store i-SCORE risk grade
+                        if file_name not in self.file_risk_grades and result["risk_grade"]:
+                            self.file_risk_grades[file_name] = result["risk_grade"]
+                        
+                        # Combine all tables for this file
+                        if result["rows"]:
+                            self.file_previews[file_name] = pd.DataFrame(result["rows"])
+                            self.dirty_previews.add(file_name)
+                            self.file_table_layouts.pop(file_name, None)  # Layout no longer matches
+                            processed_count += 1
                     
                     # Update progress
-                    progress = int((file_idx / total_files) * 90)
-                    self.after(0, lambda p=progress, fn=file_name: (
+                    progress = int((done / total_files) * 90)
+                    self.after(0, lambda p=progress, fn=file_name, d=done: (
                         self.update_loading_progress(p),
-                        self.status_label.configure(text=f"Applying selections to {fn}...")
+                        self.status_label.configure(text=f"Applied selections {d}/{total_files}: {fn}")
                     ))
-                    
-                    try:
-                        with pdfplumber.open(pdf_path) as pdf:
-                            file_tables = []
-                            
-                            # Apply selections from each saved page
-                            for page_num in sorted(self.saved_selections.keys()):
-                                if page_num < len(pdf.pages):
-                                    page = pdf.pages[page_num]
-                                    page_height = page.height
-                                    
-                                    # Crop page to remove header/footer
-                                    cropped_page = page.crop((0, header_crop, page.width, page_height - footer_crop))
-                                    
-                                    for bbox in self.saved_selections[page_num]:
-                                        try:
-                                            # Adjust bbox coordinates for the cropped page
-                                            adjusted_bbox = (
-                                                bbox[0],
-                                                max(0, bbox[1] - header_crop),  # Adjust Y coordinate
-                                                bbox[2],
-                                                bbox[3] - header_crop
-                                            )
-                                            
-                                            # Only extract if bbox is within cropped area
-                                            if adjusted_bbox[1] >= 0 and adjusted_bbox[3] <= (page_height - header_crop - footer_crop):
-                                                table = cropped_page.crop(adjusted_bbox).extract_table()
-                                                if table:
-                                                    file_tables.append(pd.DataFrame(table))
-                                        except:
-                                            continue
-                            
-                            # Combine all tables for this file
-                            if file_tables:
-                                combined_df = file_tables[0]
-                                for df in file_tables[1:]:
-                                    # Add separator
-                                    num_cols = max(len(combined_df.columns), len(df.columns))
-                                    separator = pd.DataFrame([[None] * num_cols] * 2)
-                                    combined_df = pd.concat([combined_df, separator, df], ignore_index=True)
-                                
-                                self.file_previews[file_name] = combined_df
-                                processed_count += 1
-                    
-                    except Exception as e:
-                        print(f"Error processing {file_name}: {e}")
-                        continue
                 
                 def finish_apply():
                     self.update_loading_progress(100)
@@ -1453,7 +1676,7 @@ class PDFtoExcelApp(ctk.CTk):
         # Note: We don't clear rectangles here as they persist across page changes
         # Only redraw if switching pages
         
-        zoom = 1.5
+        zoom = self.pdf_zoom
         
         # Redraw saved selections (blue)
         if self.current_page in self.saved_selections:
@@ -1487,6 +1710,18 @@ class PDFtoExcelApp(ctk.CTk):
                     width=2
                 )
     
+    def append_tables(self, sheets, name, tables):
+        """Append tables to sheets[name] with two blank rows between them, rebuilding the DataFrame once"""
+        # The builder only lives for this call: once the sheet is written its rows would be a second copy
+        builder = ccris_engine.TableRowBuilder(sheets.get(name))
+        for table in tables:
+            builder.add_table(table)
+        sheets[name] = builder.to_frame()
+        
+        # Keep an auto-extracted file's table layout covering the appended tables
+        if sheets is self.file_previews and name in self.file_table_layouts:
+            self.file_table_layouts[name]["tables"].extend(builder.tables)
+    
     def extract_selected_table(self, bbox):
         """Extract table from the selected bounding box"""
         if not self.pdf_document:
@@ -1496,30 +1731,16 @@ class PDFtoExcelApp(ctk.CTk):
             self.status_label.configure(text="Extracting table from selected area...")
             self.update()
             
-            with pdfplumber.open(self.pdf_path) as pdf:
+            with ccris_engine.open_document(self.pdf_path) as session, session.plumber_lock:
+                pdf = session.plumber
                 page = pdf.pages[self.current_page]
                 
                 # Extract table from the selected area
                 table = page.crop(bbox).extract_table()
                 
                 if table:
-                    # Convert to DataFrame
-                    new_df = pd.DataFrame(table)
-                    
-                    # Append to single sheet named "Extracted Data"
-                    if "Extracted Data" in self.extracted_sections:
-                        # Append to existing data with blank rows as separator
-                        existing_df = self.extracted_sections["Extracted Data"]
-                        
-                        # Create separator (2 blank rows)
-                        num_cols = max(len(existing_df.columns), len(new_df.columns))
-                        separator = pd.DataFrame([[None] * num_cols] * 2)
-                        
-                        # Concatenate: existing data + separator + new data
-                        self.extracted_sections["Extracted Data"] = pd.concat([existing_df, separator, new_df], ignore_index=True)
-                    else:
-                        # Create new sheet
-                        self.extracted_sections["Extracted Data"] = new_df
+                    # Append to single sheet named "Extracted Data" (blank rows as separator)
+                    self.append_tables(self.extracted_sections, "Extracted Data", [table])
                     
                     # Enable export buttons
                     self.export_btn.configure(state="normal")
@@ -1552,23 +1773,24 @@ class PDFtoExcelApp(ctk.CTk):
     def update_excel_preview(self):
         """Update Excel preview tab with extracted data"""
         if not self.file_previews:
-            self.sheet_selector.configure(values=["No data available"], state="disabled")
-            # Clear treeview
-            for item in self.excel_display.get_children():
-                self.excel_display.delete(item)
+            if self.excel_tab_built:
+                self.sheet_selector.configure(values=["No data available"], state="disabled")
+                # Clear treeview
+                self.excel_grid.clear()
             try:
                 self.clear_preview_btn.configure(state="disabled")
             except Exception:
                 pass
             return
         
-        # Show list of files
-        file_names = list(self.file_previews.keys())
-        self.sheet_selector.configure(values=file_names, state="readonly")
-        self.sheet_selector.set(file_names[0])
-        
-        # Display first file
-        self.display_file_preview(file_names[0])
+        # Show list of files (an unbuilt tab picks them up when it is first opened)
+        if self.excel_tab_built:
+            file_names = list(self.file_previews.keys())
+            self.sheet_selector.configure(values=file_names, state="readonly")
+            self.sheet_selector.set(file_names[0])
+            
+            # Display first file
+            self.display_file_preview(file_names[0])
         # Enable Clear Preview if any file has data
         try:
             has_data = any((not df.empty) for df in self.file_previews.values())
@@ -1599,6 +1821,7 @@ class PDFtoExcelApp(ctk.CTk):
                 
                 # Clear file previews
                 self.file_previews = {}
+                self.file_table_layouts = {}
                 
                 self.after(0, lambda: self.update_loading_progress(50))
                 
@@ -1612,8 +1835,8 @@ class PDFtoExcelApp(ctk.CTk):
                     self.update_loading_progress(75)
                     
                     # Clear treeview
-                    for item in self.excel_display.get_children():
-                        self.excel_display.delete(item)
+                    if self.excel_tab_built:
+                        self.excel_grid.clear()
                     
                     # Disable export and clear-preview button
                     try:
@@ -1648,8 +1871,7 @@ class PDFtoExcelApp(ctk.CTk):
         df = self.file_previews[file_name]
         
         # Clear existing treeview
-        for item in self.excel_display.get_children():
-            self.excel_display.delete(item)
+        self.excel_grid.clear()
         
         # Clear existing columns
         self.excel_display["columns"] = []
@@ -1663,12 +1885,14 @@ class PDFtoExcelApp(ctk.CTk):
             self.excel_display.heading("Message", text=f"File: {file_name}")
             self.excel_display.column("Message", width=800, anchor="w")
             
-            self.excel_display.insert("", "end", values=("No data extracted yet.",))
-            self.excel_display.insert("", "end", values=("",))
-            self.excel_display.insert("", "end", values=("To extract data:",))
-            self.excel_display.insert("", "end", values=("1. Mark selection areas on PDF",))
-            self.excel_display.insert("", "end", values=("2. Click 💾 Save Selections",))
-            self.excel_display.insert("", "end", values=("3. Click 📋 Apply to All Files to process all PDFs",))
+            self.excel_grid.set_data([
+                ("No data extracted yet.",),
+                ("",),
+                ("To extract data:",),
+                ("1. Mark selection areas on PDF",),
+                ("2. Click 💾 Save Selections",),
+                ("3. Click 📋 Apply to All Files to process all PDFs",)
+            ], format_cells=False)
         else:
             # Set up columns - use Excel-style letters (A, B, C, etc.)
             num_cols = len(df.columns)
@@ -1686,22 +1910,8 @@ class PDFtoExcelApp(ctk.CTk):
                 self.excel_display.heading(col_letter, text=col_letter, anchor='w')
                 self.excel_display.column(col_letter, width=standard_width, minwidth=100, anchor='w')
             
-            # Add data rows with improved formatting
-            for idx, row in df.iterrows():
-                # Format values - replace empty/NaN with "-" for consistency
-                row_values = []
-                for val in row:
-                    if pd.isna(val) or val == "" or str(val).strip() == "":
-                        row_values.append("-")
-                    else:
-                        # Clean and format cell value
-                        formatted_value = str(val).strip()
-                        # Limit very long values to prevent display issues
-                        if len(formatted_value) > 50:
-                            formatted_value = formatted_value[:47] + "..."
-                        row_values.append(formatted_value)
-                
-                self.excel_display.insert("", "end", text=str(idx + 1), values=row_values)
+            # Rows are formatted ("-" for empty, long values shortened) as they scroll into view
+            self.excel_grid.set_data(df, row_labels=df.index + 1)
     
     def excel_column_letter(self, n):
         """Convert column number to Excel-style letter (0->A, 1->B, 25->Z, 26->AA, etc.)"""
@@ -1824,102 +2034,121 @@ class PDFtoExcelApp(ctk.CTk):
             return
         
         output_path = Path(output_folder)
-        success_count = 0
-        failed_files = []
-        header_crop = 80  # Top 80px to remove
-        footer_crop = 80  # Bottom 80px to remove
-        
-        try:
-            total_files = len(self.pdf_paths)
+        files = list(self.pdf_paths)
+        selections = {page: list(boxes) for page, boxes in self.saved_selections.items()}
+        total_selections = sum(len(sels) for sels in selections.values())
+        total_files = len(files)
+        
+        self.batch_cancel_event = threading.Event()
+        self.batch_btn.configure(state="disabled")
+        self.show_loading_screen("Batch processing PDFs...", cancel_command=self.cancel_batch_processing)
+        
+        def batch_thread():
+            success_count = 0
+            failed_files = []
+            done = 0
+            started = time.perf_counter()
+            cancel_event = self.batch_cancel_event
             
-            for idx, pdf_path in enumerate(self.pdf_paths, 1):
+            try:
+                engine = ccris_engine.ExtractionEngine(self.worker_count)
+                results = engine.map_files(
+                    ccris_engine.extract_file_with_selections, files,
+                    cache=ccris_cache.extraction_cache(),
+                    selections=selections,
+                    header_crop=80, footer_crop=80
+                )
                 try:
-                    pdf_name = Path(pdf_path).stem
-                    self.status_label.configure(text=f"Processing {idx}/{total_files}: {pdf_name}...")
-                    self.update()
-                    
-                    # Extract data from this PDF using saved selections
-                    with pdfplumber.open(pdf_path) as pdf:
-                        all_extracted_tables = []
-                        
-                        # Sort pages to maintain order
-                        sorted_pages = sorted(self.saved_selections.keys())
-                        
-                        # Apply selections from each page in order
-                        for page_num in sorted_pages:
-                            if page_num < len(pdf.pages):
-                                page = pdf.pages[page_num]
-                                page_height = page.height
-                                
-                                # Crop page to remove header/footer
-                                cropped_page = page.crop((0, header_crop, page.width, page_height - footer_crop))
-                                
-                                for bbox in self.saved_selections[page_num]:
-                                    try:
-                                        # Adjust bbox coordinates for the cropped page
-                                        adjusted_bbox = (
-                                            bbox[0],
-                                            max(0, bbox[1] - header_crop),
-                                            bbox[2],
-                                            bbox[3] - header_crop
-                                        )
-                                        
-                                        # Only extract if bbox is within cropped area
-                                        if adjusted_bbox[1] >= 0 and adjusted_bbox[3] <= (page_height - header_crop - footer_crop):
-                                            table = cropped_page.crop(adjusted_bbox).extract_table()
-                                            if table:
-                                                all_extracted_tables.append(table)
-                                    except:
-                                        continue
+                    for done, (file_idx, result) in enumerate(results, 1):
+                        file_name = result["file_name"]
+                        pdf_name = Path(file_name).stem
                         
-                        if all_extracted_tables:
-                            # Combine all tables with separators
-                            combined_rows = []
-                            for table_idx, table in enumerate(all_extracted_tables):
-                                if table:
-                                    combined_rows.extend(table)
-                                    # Add separator between tables
-                                    if table_idx < len(all_extracted_tables) - 1:
-                                        num_cols = len(table[0]) if table else 1
-                                        combined_rows.extend([[None] * num_cols] * 2)
-                            
-                            df = pd.DataFrame(combined_rows)
-                            
-                            # Export to Excel
-                            excel_path = output_path / f"{pdf_name}.xlsx"
-                            with pd.ExcelWriter(excel_path, engine='openpyxl') as writer:
-                                df.to_excel(writer, sheet_name="Extracted Data", index=False, header=False)
-                            
-                            success_count += 1
+                        # Write each workbook as soon as its file finishes
+                        if result["error"]:
+                            failed_files.append(f"{file_name} (error: {result['error']})")
+                        elif result["rows"]:
+                            try:
+                                ccris_export.write_extracted_workbook(
+                                    pd.DataFrame(result["rows"]), output_path / f"{pdf_name}.xlsx"
+                                )
+                                success_count += 1
+                            except Exception as e:
+                                failed_files.append(f"{file_name} (error: {str(e)})")
                         else:
                             failed_files.append(f"{pdf_name} (no tables found)")
+                        
+                        # Throughput and ETA from the files finished so far
+                        elapsed = time.perf_counter() - started
+                        rate = done / elapsed if elapsed > 0 else 0
+                        eta = int((total_files - done) / rate) if rate else 0
+                        message = f"Batch {done}/{total_files} • {rate:.1f} files/s • ETA {eta // 60}m {eta % 60}s"
+                        if cancel_event.is_set():
+                            message = "Cancelling after current files..."
+                        progress = int((done / total_files) * 100)
+                        self.after(0, lambda p=progress, m=message, fn=file_name: (
+                            self.update_loading_progress(p, m),
+                            self.status_label.configure(text=f"{m}: {fn}")
+                        ))
+                        
+                        if cancel_event.is_set():
+                            break
+                finally:
+                    # Stops the pool and drops files that have not started yet
+                    results.close()
                 
-                except Exception as e:
-                    failed_files.append(f"{Path(pdf_path).name} (error: {str(e)})")
-                    continue
-            
-            # Show summary
-            total_selections = sum(len(sels) for sels in self.saved_selections.values())
-            summary_msg = f"Batch Processing Complete!\n\n"
-            summary_msg += f"Successfully processed: {success_count}/{total_files}\n"
-            summary_msg += f"Used {total_selections} selection areas across {len(self.saved_selections)} pages\n"
-            summary_msg += f"Header/footer (80px) removed automatically\n"
-            summary_msg += f"Output folder: {output_folder}\n"
-            
-            if failed_files:
-                summary_msg += f"\nFailed files ({len(failed_files)}): \n"
-                summary_msg += "\n".join(failed_files[:5])
-                if len(failed_files) > 5:
-                    summary_msg += f"\n... and {len(failed_files) - 5} more"
-            
-            self.status_label.configure(text=f"✓ Batch complete: {success_count}/{total_files} successful")
-            messagebox.showinfo("Batch Processing Complete", summary_msg)
+                error = None
+            except Exception as e:
+                error = e
+                import traceback
+                traceback.print_exc()
             
-        except Exception as e:
-            messagebox.showerror("Batch Processing Error", f"An error occurred:\n{str(e)}")
-            self.status_label.configure(text="✗ Batch processing failed")
-            import traceback
-            traceback.print_exc()
+            elapsed = time.perf_counter() - started
+            cancelled = cancel_event.is_set() and done < total_files
+            
+            def finish_batch():
+                self.hide_loading_screen()
+                self.batch_btn.configure(state="normal")
+                self.batch_cancel_event = None
+                
+                if error is not None:
+                    messagebox.showerror("Batch Processing Error", f"An error occurred:\n{str(error)}")
+                    self.status_label.configure(text="✗ Batch processing failed")
+                    return
+                
+                # Show summary
+                title = "Batch Processing Cancelled" if cancelled else "Batch Processing Complete"
+                summary_msg = f"{title}!\n\n"
+                summary_msg += f"Successfully processed: {success_count}/{total_files}\n"
+                if cancelled:
+                    summary_msg += f"Stopped after {done} files; files already written were kept\n"
+                summary_msg += f"Used {total_selections} selection areas across {len(selections)} pages\n"
+                summary_msg += f"Header/footer (80px) removed automatically\n"
+                summary_msg += f"Time: {elapsed:.1f}s ({done / elapsed if elapsed > 0 else 0:.1f} files/s)\n"
+                summary_msg += f"Output folder: {output_folder}\n"
+                
+                if failed_files:
+                    summary_msg += f"\nFailed files ({len(failed_files)}): \n"
+                    summary_msg += "\n".join(failed_files[:5])
+                    if len(failed_files) > 5:
+                        summary_msg += f"\n... and {len(failed_files) - 5} more"
+                
+                state = "cancelled" if cancelled else "complete"
+                self.status_label.configure(text=f"✓ Batch {state}: {success_count}/{total_files} successful")
+                messagebox.showinfo(title, summary_msg)
+            
+            self.after(0, finish_batch)
+        
+        thread = threading.Thread(target=batch_thread, daemon=True)
+        thread.start()
+    
+    def cancel_batch_processing(self):
+        """Stop a running batch once the files already in progress finish"""
+        if self.batch_cancel_event is not None:
+            self.batch_cancel_event.set()
+        if getattr(self, 'loading_message_label', None):
+            self.loading_message_label.configure(text="Cancelling after current files...")
+        if self.loading_cancel_btn:
+            self.loading_cancel_btn.configure(state="disabled")
     
     def export_to_excel(self):
         """Export all extracted tables to Excel with thick borders, bold detection, and merged headers"""
@@ -1927,399 +2156,81 @@ class PDFtoExcelApp(ctk.CTk):
             messagebox.showerror("Error", "No data to export! Please mark areas first.")
             return
         
-        try:
-            # Open save dialog
-            save_folder = filedialog.askdirectory(
-                title="Select Output Folder for Excel Files"
-            )
+        # Open save dialog
+        save_folder = filedialog.askdirectory(
+            title="Select Output Folder for Excel Files"
+        )
+        
+        if not save_folder:
+            return
+        
+        output_path = Path(save_folder)
+        
+        # Snapshot the previews so edits during the export do not race the workers
+        jobs = [
+            (file_name, df, output_path / (Path(file_name).stem + ".xlsx"),
+             self.file_table_layouts.get(file_name), self.file_risk_grades.get(file_name, None))
+            for file_name, df in self.file_previews.items()
+        ]
+        total_files = len(jobs)
+        
+        self.status_label.configure(text="Exporting to Excel...")
+        self.show_loading_screen(f"Exporting {total_files} files to Excel...")
+        
+        def export_thread():
+            exported = 0
+            failed_files = []
+            started = time.perf_counter()
             
-            if save_folder:
-                self.status_label.configure(text="Exporting to Excel...")
-                self.update()
-                
-                from openpyxl.styles import Border, Side, Alignment, Font, PatternFill
-                from openpyxl.utils import get_column_letter
+            try:
+                # Each workbook is tidied, styled and written by a worker process
+                for done, (file_name, excel_path, error) in enumerate(
+                        ccris_export.export_previews(jobs, workers=self.worker_count), 1):
+                    if error:
+                        failed_files.append(f"{file_name} (error: {error})")
+                    else:
+                        exported += 1
+                    
+                    elapsed = time.perf_counter() - started
+                    rate = done / elapsed if elapsed > 0 else 0
+                    message = f"Exported {done}/{total_files} • {rate:.1f} files/s"
+                    progress = int((done / total_files) * 100)
+                    self.after(0, lambda p=progress, m=message: self.update_loading_progress(p, m))
                 
-                output_path = Path(save_folder)
+                error = None
+            except Exception as e:
+                error = e
+                import traceback
+                traceback.print_exc()
+            
+            def finish_export():
+                self.hide_loading_screen()
                 
-                # Export each file preview
-                for file_name, df in self.file_previews.items():
-                    excel_name = Path(file_name).stem + ".xlsx"
-                    excel_path = output_path / excel_name
-                    
-                    # Clean dataframe before export - PRESERVE TABLE STRUCTURE
-                    df_cleaned = df.copy()
-                    
-                    # Step 1: Reset column names to numeric indices first
-                    df_cleaned.columns = range(len(df_cleaned.columns))
-                    
-                    # Step 2: DETECT TABLE BOUNDARIES with improved logic for better detection
-                    table_boundaries = []
-                    current_table = None
-                    empty_row_count = 0
-                    max_empty_gap = 3  # Allow up to 3 empty rows within a table
-                    
-                    for row_idx in range(len(df_cleaned)):
-                        row = df_cleaned.iloc[row_idx]
-                        row_has_data = False
-                        first_col = None
-                        last_col = None
-                        
-                        for col_idx in range(len(row)):
-                            cell = row.iloc[col_idx]
-                            if pd.notna(cell) and str(cell).strip():
-                                row_has_data = True
-                                if first_col is None:
-                                    first_col = col_idx
-                                last_col = col_idx
-                        
-                        if row_has_data:
-                            empty_row_count = 0  # Reset empty row counter
-                            
-                            if current_table is None:
-                                current_table = {
-                                    'start_row': row_idx,
-                                    'end_row': row_idx,
-                                    'start_col': first_col,
-                                    'end_col': last_col
-                                }
-                            else:
-                                current_table['end_row'] = row_idx
-                                current_table['start_col'] = min(current_table['start_col'], first_col)
-                                current_table['end_col'] = max(current_table['end_col'], last_col)
-                        else:
-                            empty_row_count += 1
-                            
-                            # Only end the table if we have too many consecutive empty rows
-                            if current_table is not None and empty_row_count > max_empty_gap:
-                                table_boundaries.append(current_table)
-                                current_table = None
-                                empty_row_count = 0
-                    
-                    if current_table is not None:
-                        table_boundaries.append(current_table)
-                    
-                    # Step 3: Smart cleaning - preserve table structure, clean outside tables
-                    def is_inside_table(row_idx, col_idx):
-                        """Check if cell is inside any detected table boundary"""
-                        for table in table_boundaries:
-                            if (table['start_row'] <= row_idx <= table['end_row'] and 
-                                table['start_col'] <= col_idx <= table['end_col']):
-                                return True
-                        return False
-                    
-                    # Step 4: First remove completely empty columns outside tables
-                    cols_to_keep = []
-                    for col_idx in range(len(df_cleaned.columns)):
-                        col_data = df_cleaned.iloc[:, col_idx]
-                        
-                        # Check if column intersects with any table
-                        col_in_table = any(table['start_col'] <= col_idx <= table['end_col'] for table in table_boundaries)
-                        
-                        if col_in_table:
-                            # Always keep columns that are part of tables
-                            cols_to_keep.append(col_idx)
-                        else:
-                            # For columns outside tables, check if they have any data
-                            has_data = col_data.notna().any() and any(str(cell).strip() != '' for cell in col_data if pd.notna(cell))
-                            if has_data:
-                                cols_to_keep.append(col_idx)
-                    
-                    # Create column mapping for updating table boundaries
-                    old_to_new_col = {}
-                    for new_idx, old_idx in enumerate(cols_to_keep):
-                        old_to_new_col[old_idx] = new_idx
-                    
-                    if cols_to_keep:
-                        df_cleaned = df_cleaned.iloc[:, cols_to_keep]
-                        df_cleaned.columns = range(len(df_cleaned.columns))  # Reset to 0, 1, 2, ...
-                        
-                        # Update table boundaries after column removal
-                        updated_table_boundaries = []
-                        for table in table_boundaries:
-                            # Map old column indices to new ones
-                            new_start_col = None
-                            new_end_col = None
-                            
-                            for old_col in range(table['start_col'], table['end_col'] + 1):
-                                if old_col in old_to_new_col:
-                                    new_col = old_to_new_col[old_col]
-                                    if new_start_col is None:
-                                        new_start_col = new_col
-                                    new_end_col = new_col
-                            
-                            if new_start_col is not None and new_end_col is not None:
-                                updated_table_boundaries.append({
-                                    'start_row': table['start_row'],
-                                    'end_row': table['end_row'],
-                                    'start_col': new_start_col,
-                                    'end_col': new_end_col
-                                })
-                        
-                        table_boundaries = updated_table_boundaries
-                    
-                    # Step 5: Improved table-unit shifting with fallback for missed tables
-                    # Process each table as a unit to maintain internal spacing and alignment
-                    processed_tables = set()
-                    
-                    for idx in range(len(df_cleaned)):
-                        row = df_cleaned.iloc[idx]
-                        
-                        # Skip completely empty rows
-                        if row.isna().all() or all(str(cell).strip() == '' for cell in row if pd.notna(cell)):
-                            continue
-                        
-                        # Check if this row is part of any table
-                        current_table = None
-                        for table in table_boundaries:
-                            if table['start_row'] <= idx <= table['end_row']:
-                                current_table = table
-                                break
-                        
-                        if current_table and id(current_table) not in processed_tables:
-                            # Process entire table as a unit
-                            processed_tables.add(id(current_table))
-                            
-                            # Find the minimum leading empty columns across ALL data rows in this table
-                            min_leading_empty = float('inf')
-                            table_has_data = False
-                            
-                            for table_row_idx in range(current_table['start_row'], current_table['end_row'] + 1):
-                                table_row = df_cleaned.iloc[table_row_idx]
-                                
-                                # Skip empty rows in the table
-                                if table_row.isna().all() or all(str(cell).strip() == '' for cell in table_row if pd.notna(cell)):
-                                    continue
-                                
-                                # Count leading empty cells in this row
-                                leading_empty = 0
-                                for cell in table_row:
-                                    if pd.isna(cell) or str(cell).strip() == '':
-                                        leading_empty += 1
-                                    else:
-                                        break
-                                
-                                # Only consider rows that have actual data
-                                if leading_empty < len(table_row):
-                                    min_leading_empty = min(min_leading_empty, leading_empty)
-                                    table_has_data = True
-                            
-                            # If we found consistent leading empty space, shift the entire table
-                            if table_has_data and min_leading_empty > 0 and min_leading_empty != float('inf'):
-                                for table_row_idx in range(current_table['start_row'], current_table['end_row'] + 1):
-                                    table_row = df_cleaned.iloc[table_row_idx]
-                                    
-                                    # Shift ALL rows in the table by the same amount (preserves internal structure)
-                                    row_values = table_row.tolist()
-                                    shifted = row_values[min_leading_empty:] + [None] * min_leading_empty
-                                    df_cleaned.iloc[table_row_idx] = shifted
-                        
-                        elif not current_table:
-                            # Rows OUTSIDE tables - shift individually
-                            leading_empty = 0
-                            for cell in row:
-                                if pd.isna(cell) or str(cell).strip() == '':
-                                    leading_empty += 1
-                                else:
-                                    break
-                            
-                            if leading_empty > 0 and leading_empty < len(row):
-                                row_values = row.tolist()
-                                shifted = row_values[leading_empty:] + [None] * leading_empty
-                                df_cleaned.iloc[idx] = shifted
-                    
-                    # Step 5.5: Additional pass for any remaining rows with leading empty space
-                    # This catches any rows that might have been missed by table detection
-                    # BUT only shift rows that are OUTSIDE detected tables
-                    for idx in range(len(df_cleaned)):
-                        row = df_cleaned.iloc[idx]
-                        
-                        # Skip completely empty rows
-                        if row.isna().all() or all(str(cell).strip() == '' for cell in row if pd.notna(cell)):
-                            continue
-                        
-                        # Check if this row is inside any detected table
-                        row_in_table = False
-                        for table in table_boundaries:
-                            if table['start_row'] <= idx <= table['end_row']:
-                                row_in_table = True
-                                break
-                        
-                        # Only shift if row is OUTSIDE tables
-                        if not row_in_table:
-                            # Count leading empty cells
-                            leading_empty = 0
-                            for cell in row:
-                                if pd.isna(cell) or str(cell).strip() == '':
-                                    leading_empty += 1
-                                else:
-                                    break
-                            
-                            # If row still has leading empty space, shift it
-                            if leading_empty > 0 and leading_empty < len(row):
-                                row_values = row.tolist()
-                                shifted = row_values[leading_empty:] + [None] * leading_empty
-                                df_cleaned.iloc[idx] = shifted
-                    
-                    # Step 6: Remove excessive empty rows (keep max 2 consecutive empty rows as separators)
-                    rows_to_keep = []
-                    consecutive_empty = 0
-                    
-                    for idx in range(len(df_cleaned)):
-                        row = df_cleaned.iloc[idx]
-                        is_empty = row.isna().all() or all(str(cell).strip() == '' for cell in row if pd.notna(cell))
-                        
-                        # Check if row contains header/footer text like "COMMERCIAL CONFIDENTIAL"
-                        is_header_footer_row = False
-                        for cell in row:
-                            if pd.notna(cell):
-                                cell_text = str(cell).strip().lower()
-                                if 'commercial confidential' in cell_text:
-                                    is_header_footer_row = True
-                                    break
-                        
-                        if is_header_footer_row:
-                            # Skip this row entirely
-                            continue
-                        elif is_empty:
-                            consecutive_empty += 1
-                            # Keep only first 2 consecutive empty rows
-                            if consecutive_empty <= 2:
-                                rows_to_keep.append(idx)
-                        else:
-                            consecutive_empty = 0
-                            rows_to_keep.append(idx)
-                    
-                    # Apply the filter
-                    if rows_to_keep:
-                        df_cleaned = df_cleaned.iloc[rows_to_keep].reset_index(drop=True)
-                    
-                    # Write to Excel
-                    with pd.ExcelWriter(excel_path, engine='openpyxl') as writer:
-                        df_cleaned.to_excel(writer, sheet_name="Extracted Data", index=False, header=False)
-                        
-                        # Get workbook and worksheet
-                        workbook = writer.book
-                        worksheet = writer.sheets["Extracted Data"]
-                        
-                        # Define thick border style for tables
-                        thick_border = Border(
-                            left=Side(style='medium'),
-                            right=Side(style='medium'),
-                            top=Side(style='medium'),
-                            bottom=Side(style='medium')
-                        )
-                        
-                        # Detect table boundaries (non-empty cell regions)
-                        table_ranges = []
-                        current_table = None
-                        
-                        for row_idx in range(1, len(df_cleaned) + 1):
-                            row_has_data = False
-                            first_col = None
-                            last_col = None
-                            
-                            for col_idx in range(1, len(df_cleaned.columns) + 1):
-                                cell = worksheet.cell(row_idx, col_idx)
-                                if cell.value is not None and str(cell.value).strip():
-                                    row_has_data = True
-                                    if first_col is None:
-                                        first_col = col_idx
-                                    last_col = col_idx
-                            
-                            if row_has_data:
-                                if current_table is None:
-                                    current_table = {
-                                        'start_row': row_idx,
-                                        'end_row': row_idx,
-                                        'start_col': first_col,
-                                        'end_col': last_col
-                                    }
-                                else:
-                                    current_table['end_row'] = row_idx
-                                    current_table['start_col'] = min(current_table['start_col'], first_col)
-                                    current_table['end_col'] = max(current_table['end_col'], last_col)
-                            else:
-                                if current_table is not None:
-                                    table_ranges.append(current_table)
-                                    current_table = None
-                        
-                        if current_table is not None:
-                            table_ranges.append(current_table)
-                        
-                        # Apply formatting to each table
-                        for table_idx, table_range in enumerate(table_ranges):
-                            start_row = table_range['start_row']
-                            end_row = table_range['end_row']
-                            start_col = table_range['start_col']
-                            end_col = table_range['end_col']
-                            
-                            # Apply thick borders and formatting to table cells
-                            for row_idx in range(start_row, end_row + 1):
-                                for col_idx in range(start_col, end_col + 1):
-                                    cell = worksheet.cell(row_idx, col_idx)
-                                    
-                                    # Apply thick border only to table cells
-                                    cell.border = thick_border
-                                    
-                                    # Center align
-                                    cell.alignment = Alignment(horizontal='center', vertical='center')
-                        
-                        # Auto-adjust column widths
-                        for column in worksheet.columns:
-                            max_length = 0
-                            column_letter = get_column_letter(column[0].column)
-                            for cell in column:
-                                try:
-                                    if cell.value:
-                                        max_length = max(max_length, len(str(cell.value)))
-                                except:
-                                    pass
-                            adjusted_width = min(max_length + 2, 50)
-                            worksheet.column_dimensions[column_letter].width = adjusted_width
-                        
-                        # Create Risk Grades sheet if we have risk grade for this file
-                        risk_grade = self.file_risk_grades.get(file_name, None)
-                        if risk_grade:
-                            risk_sheet = workbook.create_sheet("Risk Grades")
-                            
-                            # Header
-                            risk_sheet['A1'] = "File Name"
-                            risk_sheet['B1'] = "Risk Grade"
-                            
-                            # Data
-                            risk_sheet['A2'] = file_name
-                            risk_sheet['B2'] = risk_grade
-                            
-                            # Format header
-                            for col in ['A', 'B']:
-                                cell = risk_sheet[f'{col}1']
-                                cell.font = Font(bold=True, size=12)
-                                cell.fill = PatternFill(start_color="1f538d", end_color="1f538d", fill_type="solid")
-                                cell.alignment = Alignment(horizontal='center', vertical='center')
-                                cell.border = thick_border
-                            
-                            # Format risk grade cell
-                            risk_sheet['B2'].font = Font(bold=True, size=14, color="FF0000")
-                            risk_sheet['B2'].fill = PatternFill(start_color="FFFF00", end_color="FFFF00", fill_type="solid")
-                            risk_sheet['B2'].alignment = Alignment(horizontal='center', vertical='center')
-                            risk_sheet['B2'].border = thick_border
-                            
-                            # Adjust column widths
-                            risk_sheet.column_dimensions['A'].width = 50
-                            risk_sheet.column_dimensions['B'].width = 15
+                if error is not None:
+                    messagebox.showerror("Error", f"Failed to export data:\n{str(error)}")
+                    self.status_label.configure(text="✗ Export failed")
+                    return
                 
-                self.status_label.configure(text=f"✓ Exported {len(self.file_previews)} files")
-                messagebox.showinfo("Success", f"Exported {len(self.file_previews)} files to:\n{save_folder}")
+                self.status_label.configure(text=f"✓ Exported {exported}/{total_files} files")
+                if failed_files:
+                    summary_msg = f"Exported {exported}/{total_files} files to:\n{save_folder}\n"
+                    summary_msg += f"\nFailed files ({len(failed_files)}): \n"
+                    summary_msg += "\n".join(failed_files[:5])
+                    if len(failed_files) > 5:
+                        summary_msg += f"\n... and {len(failed_files) - 5} more"
+                    messagebox.showwarning("Export Finished With Errors", summary_msg)
+                else:
+                    messagebox.showinfo("Success", f"Exported {exported} files to:\n{save_folder}")
+            
+            self.after(0, finish_export)
         
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to export data:\n{str(e)}")
-            self.status_label.configure(text="✗ Export failed")
-            import traceback
-            traceback.print_exc()
+        thread = threading.Thread(target=export_thread, daemon=True)
+        thread.start()
     
     def update_database_file_list(self):
         """Enable/disable build button based on available data"""
+        if not self.database_tab_built:
+            return  # The buttons are set up when the tab is first opened
         try:
             # Enable build button if there is at least one preview
             if any((not df.empty) for df in self.file_previews.values()):
@@ -2346,45 +2257,22 @@ class PDFtoExcelApp(ctk.CTk):
                     self.after(0, show_info)
                     return
                 
-                print(f"🏗️  Building 7-table database from {len(all_files)} files...")
-                database_rows = []
-                successful_extractions = 0
-                failed_extractions = 0
                 total_files = len(all_files)
                 
-                for file_idx, file_name in enumerate(all_files):
-                    progress = int((file_idx / total_files) * 100)
+                def report_progress(file_idx, total, file_name):
+                    progress = int((file_idx / total) * 100)
                     self.after(0, lambda p=progress: self.update_loading_progress(p))
-                    
-                    print(f"\n📄 Processing file {file_idx + 1}/{total_files}: {file_name}")
-                    df = self.file_previews[file_name]
-                    if df.empty:
-                        failed_extractions += 1
-                        continue
-                    
-                    # Extract data from this file's DataFrame (can return multiple rows)
-                    extracted_rows = self.extract_database_row(df, file_name)
-                    
-                    if extracted_rows and isinstance(extracted_rows, list):
-                        # Multiple rows returned (multiple contributing factors)
-                        valid_rows = [row for row in extracted_rows if row and any(row.values())]
-                        if valid_rows:
-                            database_rows.extend(valid_rows)
-                            successful_extractions += 1
-                            # Debug: Show sample of extracted data
-                            sample_row = valid_rows[0]
-                            print(f"   📋 Sample data: i-SCORE={sample_row.get('i_SCORE', 'N/A')}, Risk_Grade={sample_row.get('Risk_Grade', 'N/A')}")
-                            print(f"   📋 Contributing Factor: {sample_row.get('Key_Contributing_Factor', 'N/A')[:50]}...")
-                        else:
-                            failed_extractions += 1
-                    else:
-                        failed_extractions += 1
                 
-                # Create database DataFrame
-                if database_rows:
-                    self.database_df = pd.DataFrame(database_rows)
-                else:
-                    self.database_df = pd.DataFrame()
+                # Take the dirty set now so previews changed during the build stay dirty
+                dirty, self.dirty_previews = self.dirty_previews, set()
+                try:
+                    self.database_df, successful_extractions, failed_extractions = ccris_database.build_database(
+                        self.file_previews, progress=report_progress, workers=self.worker_count,
+                        row_cache=self.database_row_cache, dirty=dirty
+                    )
+                except Exception:
+                    self.dirty_previews |= dirty
+                    raise
                 
                 def finish_build():
                     self.update_loading_progress(100)
@@ -2401,7 +2289,7 @@ class PDFtoExcelApp(ctk.CTk):
                     summary_msg = f"Multi-Table Database Build Complete!\n\n"
                     summary_msg += f"✅ Successful extractions: {successful_extractions}/{total_files} files\n"
                     summary_msg += f"❌ Failed extractions: {failed_extractions}/{total_files} files\n"
-                    summary_msg += f"📊 Total database records: {len(database_rows)}\n\n"
+                    summary_msg += f"📊 Total database records: {len(self.database_df)}\n\n"
                     summary_msg += f"Tables extracted:\n"
                     summary_msg += f"• PARTICULARS OF THE SUBJECT PROVIDED BY YOU (5 fields)\n"
                     summary_msg += f"• SUMMARY CREDIT INFORMATION (10 fields)\n"
@@ -2414,7 +2302,8 @@ class PDFtoExcelApp(ctk.CTk):
                     summary_msg += f"- Contributing factors (bullet-point separated)\n"
                     summary_msg += f"- Business interests (from shareholding table)\n"
                     summary_msg += f"- Facility records (earliest + latest 3 approved)\n"
-                    summary_msg += f"Total fields: 35 (5 + 10 + 3 + 9 + 1 + 1 + 4 + 2 tracking fields)"
+                    # Count the columns actually built (File_Name included)
+                    summary_msg += f"Total fields: {len(self.database_df.columns)}"
                     
                     self.status_label.configure(text=f"✓ 7-Table Database: {successful_extractions}/{total_files} successful")
                     messagebox.showinfo("Multi-Table Database Complete", summary_msg)
@@ -2435,1089 +2324,17 @@ class PDFtoExcelApp(ctk.CTk):
     
     def extract_database_row(self, df, file_name):
         """Extract data from PARTICULARS, SUMMARY CREDIT INFORMATION, CREDIT SCORE, SHAREHOLDING INTEREST, CCRIS ENTITY, SUBJECT STATUS, and KEY STATISTICS tables"""
-        try:
-            base_row_data = {}
-            
-            
-            # Helper function to find value in PARTICULARS table
-            def find_particulars_value(label_text):
-                """Find value from PARTICULARS OF THE SUBJECT PROVIDED BY YOU table"""
-                particulars_found = False
-                
-                for idx, row in df.iterrows():
-                    # Check if we found the PARTICULARS table header
-                    for col_idx, cell in enumerate(row):
-                        cell_str = str(cell).strip() if pd.notna(cell) else ""
-                        if "PARTICULARS OF THE SUBJECT PROVIDED BY YOU" in cell_str.upper():
-                            particulars_found = True
-                            break
-                    
-                    if particulars_found:
-                        # Look for the specific label in the rows following the header
-                        for search_idx in range(idx + 1, min(idx + 10, len(df))):  # Search next 10 rows
-                            if search_idx >= len(df):
-                                break
-                            search_row = df.iloc[search_idx]
-                            for col_idx, cell in enumerate(search_row):
-                                cell_str = str(cell).strip() if pd.notna(cell) else ""
-                                if label_text.lower() in cell_str.lower():
-                                    # Found the label, get value from next column
-                                    if col_idx + 1 < len(search_row):
-                                        value = search_row.iloc[col_idx + 1]
-                                        result = str(value).strip() if pd.notna(value) else ""
-                                        return result
-                        break
-                
-                return ""
-            
-            # Helper function to find value in SUMMARY CREDIT INFORMATION table
-            def find_summary_credit_value(label_text):
-                """Find value from SUMMARY CREDIT INFORMATION table"""
-                summary_found = False
-                
-                for idx, row in df.iterrows():
-                    # Check if we found the SUMMARY CREDIT INFORMATION table header
-                    for col_idx, cell in enumerate(row):
-                        cell_str = str(cell).strip() if pd.notna(cell) else ""
-                        if "SUMMARY CREDIT INFORMATION" in cell_str.upper():
-                            summary_found = True
-                            break
-                    
-                    if summary_found:
-                        # Look for the specific label in the rows following the header
-                        for search_idx in range(idx + 1, min(idx + 15, len(df))):  # Search next 15 rows
-                            if search_idx >= len(df):
-                                break
-                            search_row = df.iloc[search_idx]
-                            for col_idx, cell in enumerate(search_row):
-                                cell_str = str(cell).strip() if pd.notna(cell) else ""
-                                if label_text.lower() in cell_str.lower():
-                                    # Found the label, get value from next column
-                                    if col_idx + 1 < len(search_row):
-                                        value = search_row.iloc[col_idx + 1]
-                                        result = str(value).strip() if pd.notna(value) else ""
-                                        return result
-                        break
-                
-                return ""
-            
-            # Helper function to find value in CREDIT SCORE table
-            def find_credit_score_value(label_text):
-                """Find value from CREDIT SCORE table"""
-                credit_score_found = False
-                
-                for idx, row in df.iterrows():
-                    # Check if we found the CREDIT SCORE table header - more flexible matching
-                    for col_idx, cell in enumerate(row):
-                        cell_str = str(cell).strip() if pd.notna(cell) else ""
-                        if "CREDIT SCORE" in cell_str.upper() or "i-SCORE" in cell_str.upper():
-                            credit_score_found = True
-                            break
-                    
-                    if credit_score_found:
-                        # Look for the specific label in the rows following the header
-                        for search_idx in range(idx + 1, min(idx + 20, len(df))):  # Search next 20 rows
-                            if search_idx >= len(df):
-                                break
-                            search_row = df.iloc[search_idx]
-                            for col_idx, cell in enumerate(search_row):
-                                cell_str = str(cell).strip() if pd.notna(cell) else ""
-                                
-                                # Special handling for i-SCORE - look for numbers
-                                if "i-score" in label_text.lower():
-                                    if "i-score" in cell_str.lower() or re.search(r'\bi-?score\b', cell_str, re.IGNORECASE):
-                                        # Found i-SCORE label, get value from next column or same cell
-                                        if col_idx + 1 < len(search_row):
-                                            value = search_row.iloc[col_idx + 1]
-                                        else:
-                                            # Try to extract number from same cell
-                                            numbers = re.findall(r'\d+', cell_str)
-                                            value = numbers[0] if numbers else ""
-                                        result = str(value).strip() if pd.notna(value) else ""
-                                        return result
-                                
-                                # Special handling for Key Contributing Factors - look for bullet points
-                                elif "contributing" in label_text.lower():
-                                    if "contributing" in cell_str.lower() or "factor" in cell_str.lower():
-                                        # Found contributing factors, collect all text from this and following rows
-                                        factors_text = ""
-                                        # Check current cell first
-                                        if col_idx + 1 < len(search_row):
-                                            next_cell = search_row.iloc[col_idx + 1]
-                                            if pd.notna(next_cell):
-                                                factors_text += str(next_cell).strip()
-                                        
-                                        # Define section headers that indicate end of contributing factors
-                                        section_headers = [
-                                            "SHAREHOLDING INTEREST", "INTEREST IN COMPANY", 
-                                            "SUMMARY CREDIT INFORMATION", "KEY STATISTICS",
-                                            "PARTICULARS", "CREDIT REPORT", "NOTE:"
-                                        ]
-                                        
-                                        # Check following rows for more factors
-                                        for factor_idx in range(search_idx + 1, min(search_idx + 10, len(df))):
-                                            if factor_idx >= len(df):
-                                                break
-                                            factor_row = df.iloc[factor_idx]
-                                            
-                                            # Check if we've hit a new section header
-                                            row_text = " ".join([str(cell).strip() for cell in factor_row if pd.notna(cell)])
-                                            if any(header in row_text.upper() for header in section_headers):
-                                                break  # Stop collecting factors
-                                            
-                                            for factor_col_idx, factor_cell in enumerate(factor_row):
-                                                factor_str = str(factor_cell).strip() if pd.notna(factor_cell) else ""
-                                                # Look for bullet points or continuation text
-                                                if "•" in factor_str or (len(factor_str) > 10 and not any(keyword in factor_str.lower() for keyword in ["summary", "particular", "experian", "page", "note:", "shareholding"])):
-                                                    if factors_text:
-                                                        factors_text += " " + factor_str
-                                                    else:
-                                                        factors_text = factor_str
-                                        
-                                        result = factors_text.strip()
-                                        return result
-                                
-                                # Regular label matching
-                                elif label_text.lower() in cell_str.lower():
-                                    # Found the label, get value from next column
-                                    if col_idx + 1 < len(search_row):
-                                        value = search_row.iloc[col_idx + 1]
-                                        result = str(value).strip() if pd.notna(value) else ""
-                                        return result
-                        break
-                
-                return ""
-            
-            # Helper function to extract KEY STATISTICS Earliest/Latest Approved Facilities
-            def find_key_statistics_facilities():
-                """Find Earliest and Latest 3 Approved Facilities from KEY STATISTICS table"""
-                key_stats_found = False
-                earliest_facility = {"type": "-", "date": "-"}
-                latest_facilities = []
-                
-                for idx, row in df.iterrows():
-                    # Check if we found the KEY STATISTICS table header
-                    for col_idx, cell in enumerate(row):
-                        cell_str = str(cell).strip() if pd.notna(cell) else ""
-                        if "KEY STATISTICS" in cell_str.upper():
-                            key_stats_found = True
-                            break
-                    
-                    if key_stats_found:
-                        # Look for Earliest and Latest facilities in the following rows
-                        for search_idx in range(idx + 1, min(idx + 20, len(df))):
-                            if search_idx >= len(df):
-                                break
-                            search_row = df.iloc[search_idx]
-                            row_data = [str(cell).strip() if pd.notna(cell) else "" for cell in search_row]
-                            
-                            # Check for "Earliest Approved Facilites"
-                            for col_idx, cell_str in enumerate(row_data):
-                                if "Earliest Approved" in cell_str and "Facility Type" in cell_str:
-                                    # Found Earliest row, get facility type and date from next columns
-                                    if col_idx + 1 < len(row_data):
-                                        earliest_facility["type"] = row_data[col_idx + 1].strip()
-                                    if col_idx + 2 < len(row_data):
-                                        earliest_facility["date"] = row_data[col_idx + 2].strip()
-                                    break
-                                
-                                # Check for "Latest 3 Approved Facilites"
-                                elif "Latest 3 Approved" in cell_str or "Latest Approved" in cell_str:
-                                    # Found Latest 3 header row, get first facility from same row
-                                    if col_idx + 1 < len(row_data) and col_idx + 2 < len(row_data):
-                                        facility_type = row_data[col_idx + 1].strip()
-                                        facility_date = row_data[col_idx + 2].strip()
-                                        if facility_type and facility_type != "":
-                                            latest_facilities.append({"type": facility_type, "date": facility_date})
-                                    
-                                    # Continue looking for the remaining 2 facilities in next rows
-                                    for next_idx in range(search_idx + 1, min(search_idx + 5, len(df))):
-                                        if next_idx >= len(df):
-                                            break
-                                        next_row = df.iloc[next_idx]
-                                        next_row_data = [str(cell).strip() if pd.notna(cell) else "" for cell in next_row]
-                                        
-                                        # Look for rows with facility type and date (should be in first few columns after blank)
-                                        # Structure: [blank] | FACILITY TYPE | DATE
-                                        for nc_idx in range(len(next_row_data) - 1):
-                                            if next_row_data[nc_idx] and next_row_data[nc_idx + 1]:
-                                                # Check if this looks like a facility type (all caps, has words)
-                                                if len(next_row_data[nc_idx]) > 5 and next_row_data[nc_idx].isupper():
-                                                    facility_type = next_row_data[nc_idx].strip()
-                                                    facility_date = next_row_data[nc_idx + 1].strip()
-                                                    
-                                                    # Validate date format (DD-MM-YYYY)
-                                                    if re.match(r'\d{2}-\d{2}-\d{4}', facility_date):
-                                                        latest_facilities.append({"type": facility_type, "date": facility_date})
-                                                        break
-                                        
-                                        # Stop if we have 3 latest facilities
-                                        if len(latest_facilities) >= 3:
-                                            break
-                                    break
-                        
-                        # Stop after processing KEY STATISTICS section
-                        if earliest_facility["type"] != "-" or len(latest_facilities) > 0:
-                            break
-                
-                # Ensure we have exactly 3 latest facilities (pad with empty if needed)
-                while len(latest_facilities) < 3:
-                    latest_facilities.append({"type": "-", "date": "-"})
-                
-                # Only take first 3 if more were found
-                latest_facilities = latest_facilities[:3]
-                
-                if not key_stats_found:
-                    pass
-                
-                return earliest_facility, latest_facilities
-            
-            # Helper function to extract SHAREHOLDING INTEREST data
-            def find_shareholding_interests():
-                """Find all business interests from SHAREHOLDING INTEREST table"""
-                interests = []
-                shareholding_found = False
-                header_found = False
-                
-                for idx, row in df.iterrows():
-                    # Check if we found the SHAREHOLDING INTEREST table header
-                    for col_idx, cell in enumerate(row):
-                        cell_str = str(cell).strip() if pd.notna(cell) else ""
-                        if "SHAREHOLDING INTEREST" in cell_str.upper() or ("INTEREST IN COMPANY" in cell_str.upper() and "BUSINESS" in cell_str.upper()):
-                            shareholding_found = True
-                            break
-                    
-                    if shareholding_found and not header_found:
-                        # Look for the column header row (No, Name, Position, etc.)
-                        for header_idx in range(idx + 1, min(idx + 10, len(df))):
-                            if header_idx >= len(df):
-                                break
-                            header_row = df.iloc[header_idx]
-                            header_text = "".join([str(cell).strip() if pd.notna(cell) else "" for cell in header_row])
-                            
-                            # Check if this row contains the column headers
-                            if ("No" in header_text and "Name" in header_text and "Position" in header_text and 
-                                "Appointed" in header_text):
-                                header_found = True
-                                
-                                # Now look for data rows after the header
-                                for data_idx in range(header_idx + 1, min(header_idx + 50, len(df))):
-                                    if data_idx >= len(df):
-                                        break
-                                    data_row = df.iloc[data_idx]
-                                    
-                                    # Extract row data
-                                    row_data = []
-                                    for col_idx, cell in enumerate(data_row):
-                                        cell_str = str(cell).strip() if pd.notna(cell) else ""
-                                        row_data.append(cell_str)
-                                    
-                                    # Check if this is a valid data row (starts with number)
-                                    if (len(row_data) > 0 and row_data[0].isdigit() and
-                                        len([x for x in row_data if x]) >= 4):  # At least 4 non-empty columns
-                                        
-                                        # Parse according to actual table structure:
-                                        # No | Name | Position | Appointed | Business Expiry Date | Shareholding | % | Remark | Last Updated by Experian
-                                        interest_data = {
-                                            'No': row_data[0] if len(row_data) > 0 else "-",
-                                            'Name': row_data[1] if len(row_data) > 1 else "-",
-                                            'Position': row_data[2] if len(row_data) > 2 else "-",
-                                            'Appointed': row_data[3] if len(row_data) > 3 else "-",
-                                            'Business_Expiry_Date': row_data[4] if len(row_data) > 4 else "-",
-                                            'Shareholding': row_data[5] if len(row_data) > 5 else "-",
-                                            'Percentage': row_data[6] if len(row_data) > 6 else "-",
-                                            'Remark': row_data[7] if len(row_data) > 7 else "-",
-                                            'Last_Updated_by_Experian': row_data[8] if len(row_data) > 8 else "-"
-                                        }
-                                        
-                                        # Clean and format data - replace empty with "-"
-                                        for key, value in interest_data.items():
-                                            if not value or value.strip() == "" or pd.isna(value):
-                                                interest_data[key] = "-"
-                                            else:
-                                                # Clean extra spaces and newlines
-                                                clean_value = re.sub(r'\s+', ' ', str(value).strip())
-                                                interest_data[key] = clean_value
-                                        
-                                        interests.append(interest_data)
-                                break  # Found headers, processed data
-                        break  # Found shareholding table
-                
-                if not interests:
-                    # Return empty interest to maintain structure
-                    interests.append({
-                        'No': "-",
-                        'Name': "-",
-                        'Position': "-",
-                        'Appointed': "-",
-                        'Business_Expiry_Date': "-",
-                        'Shareholding': "-",
-                        'Percentage': "-",
-                        'Remark': "-",
-                        'Last_Updated_by_Experian': "-"
-                    })
-                
-                return interests
-            
-            # Helper function to extract CCRIS ENTITY data
-            def find_ccris_entity_key():
-                """Find CCRIS Entity Key from CCRIS ENTITY SELECTED BY YOU table"""
-                ccris_found = False
-                
-                for idx, row in df.iterrows():
-                    # Check if we found the CCRIS ENTITY table header
-                    for col_idx, cell in enumerate(row):
-                        cell_str = str(cell).strip() if pd.notna(cell) else ""
-                        if "CCRIS ENTITY SELECTED BY YOU" in cell_str.upper():
-                            ccris_found = True
-                            break
-                    
-                    if ccris_found:
-                        # Look for CCRIS Entity Key in the following rows
-                        for search_idx in range(idx + 1, min(idx + 20, len(df))):
-                            if search_idx >= len(df):
-                                break
-                            search_row = df.iloc[search_idx]
-                            
-                            for col_idx, cell in enumerate(search_row):
-                                cell_str = str(cell).strip() if pd.notna(cell) else ""
-                                if "CCRIS Entity Key" in cell_str:
-                                    # Found the label, get value from next column
-                                    if col_idx + 1 < len(search_row):
-                                        value = search_row.iloc[col_idx + 1]
-                                        result = str(value).strip() if pd.notna(value) else "-"
-                                        return result if result else "-"
-                        break
-                
-                return "-"
-            
-            # Helper function to extract SUMMARY CREDIT REPORT data
-            def find_summary_credit_data():
-                """Find data from SUMMARY CREDIT REPORT table with custom field naming"""
-                summary_found = False
-                result = {
-                    'A_App_No_Application': "-",
-                    'A_App_Ttl_Amnt': "-", 
-                    'B_Pend_No_Application': "-",
-                    'B_Pend_Ttl_Amnt': "-"
-                }
-                
-                for idx, row in df.iterrows():
-                    # Check if we found the SUMMARY CREDIT REPORT table header
-                    for col_idx, cell in enumerate(row):
-                        cell_str = str(cell).strip() if pd.notna(cell) else ""
-                        if "SUMMARY CREDIT REPORT" in cell_str.upper():
-                            summary_found = True
-                            break
-                    
-                    if summary_found:
-                        # Look for the specific rows in the following rows
-                        for search_idx in range(idx + 1, min(idx + 20, len(df))):
-                            if search_idx >= len(df):
-                                break
-                            search_row = df.iloc[search_idx]
-                            
-                            # Convert row to list for easier processing
-                            row_data = [str(cell).strip() if pd.notna(cell) else "" for cell in search_row]
-                            
-                            # Check for "A. Approved for past 12 months" row
-                            for col_idx, cell_str in enumerate(row_data):
-                                if "A. Approved for past 12 months" in cell_str:
-                                    # Found A row, extract No. of Applications and Total Amount
-                                    if col_idx + 1 < len(row_data):
-                                        result['A_App_No_Application'] = row_data[col_idx + 1].strip()
-                                    if col_idx + 2 < len(row_data):
-                                        result['A_App_Ttl_Amnt'] = row_data[col_idx + 2].strip()
-                                    break
-                                    
-                                elif "B. Pending" in cell_str:
-                                    # Found B row, extract No. of Applications and Total Amount  
-                                    if col_idx + 1 < len(row_data):
-                                        result['B_Pend_No_Application'] = row_data[col_idx + 1].strip()
-                                    if col_idx + 2 < len(row_data):
-                                        result['B_Pend_Ttl_Amnt'] = row_data[col_idx + 2].strip()
-                                    break
-                        break
-                
-                # Clean results - replace empty with "-"
-                for key, value in result.items():
-                    if not value or value == "":
-                        result[key] = "-"
-                
-                return result
-
-            # Helper function to extract Subject Status data
-            def find_warning_remark():
-                """Find Warning Remark from Subject Status table"""
-                subject_status_found = False
-                
-                for idx, row in df.iterrows():
-                    # Check if we found the Subject Status table header
-                    for col_idx, cell in enumerate(row):
-                        cell_str = str(cell).strip() if pd.notna(cell) else ""
-                        if "Subject Status" in cell_str:
-                            subject_status_found = True
-                            break
-                    
-                    if subject_status_found:
-                        # Look for Warning Remark in the following rows
-                        for search_idx in range(idx + 1, min(idx + 10, len(df))):
-                            if search_idx >= len(df):
-                                break
-                            search_row = df.iloc[search_idx]
-                            
-                            for col_idx, cell in enumerate(search_row):
-                                cell_str = str(cell).strip() if pd.notna(cell) else ""
-                                if "Warning Remark" in cell_str:
-                                    # Found the label, get value from next column
-                                    if col_idx + 1 < len(search_row):
-                                        value = search_row.iloc[col_idx + 1]
-                                        result = str(value).strip() if pd.notna(value) else "-"
-                                        return result if result else "-"
-                        break
-                
-                return "-"
-            
-            # Helper function to extract SUMMARY OF POTENTIAL & CURRENT LIABILITIES data
-            def find_potential_liabilities_data():
-                """Find data from SUMMARY OF POTENTIAL & CURRENT LIABILITIES table with hybrid structure"""
-                liabilities_found = False
-                result = {
-                    'AsBorr_Outstanding_RM': "-",
-                    'AsBorr_Total_Limit_RM': "-",
-                    'AsBorr_FEC_Limit_RM': "-",
-                    'Legal_Action_Taken': "-",
-                    'Special_Attention_Account': "-"
-                }
-                
-                for idx, row in df.iterrows():
-                    # Check if we found the SUMMARY OF POTENTIAL & CURRENT LIABILITIES table header
-                    for col_idx, cell in enumerate(row):
-                        cell_str = str(cell).strip() if pd.notna(cell) else ""
-                        if "SUMMARY OF POTENTIAL" in cell_str.upper() and "CURRENT LIABILITIES" in cell_str.upper():
-                            liabilities_found = True
-                            break
-                    
-                    if liabilities_found:
-                        # Look for the specific rows in the following rows
-                        for search_idx in range(idx + 1, min(idx + 30, len(df))):
-                            if search_idx >= len(df):
-                                break
-                            search_row = df.iloc[search_idx]
-                            
-                            # Convert row to list for easier processing
-                            row_data = [str(cell).strip() if pd.notna(cell) else "" for cell in search_row]
-                            
-                            # Check for "As Borrower" row (row-based data with 3 values)
-                            for col_idx, cell_str in enumerate(row_data):
-                                if "As Borrower" in cell_str:
-                                    # Found As Borrower row, extract the 3 numeric values
-                                    if col_idx + 1 < len(row_data):
-                                        result['AsBorr_Outstanding_RM'] = row_data[col_idx + 1].strip()
-                                    if col_idx + 2 < len(row_data):
-                                        result['AsBorr_Total_Limit_RM'] = row_data[col_idx + 2].strip()
-                                    if col_idx + 3 < len(row_data):
-                                        result['AsBorr_FEC_Limit_RM'] = row_data[col_idx + 3].strip()
-                                    break
-                                    
-                                elif "Legal Action Taken" in cell_str:
-                                    # Found Legal Action Taken, extract value from next column
-                                    if col_idx + 1 < len(row_data):
-                                        result['Legal_Action_Taken'] = row_data[col_idx + 1].strip()
-                                    break
-                                    
-                                elif "Special Attention Account" in cell_str:
-                                    # Found Special Attention Account, extract value from next column
-                                    if col_idx + 1 < len(row_data):
-                                        result['Special_Attention_Account'] = row_data[col_idx + 1].strip()
-                                    break
-                        break
-                
-                # Clean results - replace empty with "-"
-                for key, value in result.items():
-                    if not value or value == "":
-                        result[key] = "-"
-                
-                return result
-            
-            # Helper function to extract Legal Suits and Bankruptcy data
-            def find_legal_suits_bankruptcy_data():
-                """Find data from Legal Suits and Bankruptcy tables where totals are in headers"""
-                result = {
-                    'Legal_Suits_Defendant': "-",
-                    'Legal_Suits_Plaintiff': "-",
-                    'Bankruptcy_Action': "-"
-                }
-                
-                for idx, row in df.iterrows():
-                    for col_idx, cell in enumerate(row):
-                        cell_str = str(cell).strip() if pd.notna(cell) else ""
-                        
-                        # Check for "LEGAL SUITS - SUBJECT AS DEFENDANT Total: X"
-                        if "LEGAL SUITS" in cell_str.upper() and "SUBJECT AS DEFENDANT" in cell_str.upper() and "TOTAL" in cell_str.upper():
-                            # Extract number from "Total: 0" pattern
-                            match = re.search(r'Total:\s*(\d+)', cell_str, re.IGNORECASE)
-                            if match:
-                                result['Legal_Suits_Defendant'] = match.group(1)
-                        
-                        # Check for "LEGAL SUITS - SUBJECT AS PLAINTIFF Total: X"
-                        elif "LEGAL SUITS" in cell_str.upper() and "SUBJECT AS PLAINTIFF" in cell_str.upper() and "TOTAL" in cell_str.upper():
-                            # Extract number from "Total: 0" pattern
-                            match = re.search(r'Total:\s*(\d+)', cell_str, re.IGNORECASE)
-                            if match:
-                                result['Legal_Suits_Plaintiff'] = match.group(1)
-                        
-                        # Check for "BANKRUPTCY ACTION" header
-                        elif "BANKRUPTCY ACTION" in cell_str.upper():
-                            # Look for "Total: X" in the following rows
-                            for search_idx in range(idx + 1, min(idx + 5, len(df))):
-                                if search_idx >= len(df):
-                                    break
-                                search_row = df.iloc[search_idx]
-                                
-                                for search_col_idx, search_cell in enumerate(search_row):
-                                    search_str = str(search_cell).strip() if pd.notna(search_cell) else ""
-                                    if "Total:" in search_str or "Total :" in search_str:
-                                        # Extract number from "Total: 0" pattern
-                                        match = re.search(r'Total:\s*(\d+)', search_str, re.IGNORECASE)
-                                        if match:
-                                            result['Bankruptcy_Action'] = match.group(1)
-                                            break
-                                
-                                if result['Bankruptcy_Action'] != "-":
-                                    break
-                
-                return result
-            
-            # Helper function to extract KEY STATISTICS data
-            def find_key_statistics_data():
-                """Find data from KEY STATISTICS table"""
-                key_stats_found = False
-                key_stats_start_idx = -1
-                result = {
-                    'SF_No_of_Facilities': "-",
-                    'SF_Total_Outstanding_Balance_RM': "-",
-                    'SF_Total_Outstanding_Balance_Against_Total_Limit': "-",
-                    'SF_Highest_No_of_Installments_Arrears_Last_12_months': "-",
-                    'UF_No_of_Facilities': "-",
-                    'UF_Total_Outstanding_Balance_RM': "-",
-                    'UF_Total_Outstanding_Balance_Against_Total_Limit': "-",
-                    'UF_Highest_No_of_Installments_Arrears_Last_12_months': "-",
-                    'CC_Average_Utilisation_Last_6_months': "-",
-                    'ORC_Average_Utilisation_Last_6_months': "-",
-                    'CHC_Min_Utilisation_Last_12_months_RM': "-",
-                    'CHC_Max_Utilisation_Last_12_months_RM': "-",
-                    'NHEF_No_of_Accounts': "-",
-                    'LL_No_of_Accounts': "-",
-                    'FL_No_of_Accounts': "-"
-                }
-                
-                # Track which section we're in
-                current_section = None
-                
-                for idx, row in df.iterrows():
-                    # Check if we found the KEY STATISTICS table header
-                    for col_idx, cell in enumerate(row):
-                        cell_str = str(cell).strip() if pd.notna(cell) else ""
-                        if "KEY STATISTICS" in cell_str.upper():
-                            key_stats_found = True
-                            key_stats_start_idx = idx
-                            break
-                    
-                    if key_stats_found:
-                        row_data = [str(cell).strip() if pd.notna(cell) else "" for cell in row]
-                        
-                        # Identify section headers
-                        for col_idx, cell_str in enumerate(row_data):
-                            if "Secured Facilities" in cell_str:
-                                current_section = "SF"
-                            elif "Unsecured Facilities" in cell_str:
-                                current_section = "UF"
-                            elif cell_str == "Credit Card":
-                                current_section = "CC"
-                            elif "Other Revolving Credits" in cell_str:
-                                current_section = "ORC"
-                            elif "Charge Card" in cell_str:
-                                current_section = "CHC"
-                            elif "National Higher Educational Financing" in cell_str:
-                                current_section = "NHEF"
-                            elif "Local Lenders" in cell_str:
-                                current_section = "LL"
-                            elif "Foreign Lenders" in cell_str:
-                                current_section = "FL"
-                            
-                            # Extract data based on current section
-                            if current_section == "SF":
-                                if "No. of Facilities" in cell_str and col_idx + 1 < len(row_data):
-                                    result['SF_No_of_Facilities'] = row_data[col_idx + 1]
-                                elif "Total Outstanding Balance (RM)" in cell_str and col_idx + 1 < len(row_data):
-                                    result['SF_Total_Outstanding_Balance_RM'] = row_data[col_idx + 1]
-                                elif "Total Outstanding Balance Against Total Limit" in cell_str and col_idx + 1 < len(row_data):
-                                    result['SF_Total_Outstanding_Balance_Against_Total_Limit'] = row_data[col_idx + 1]
-                                elif "Highest No. of Installments Arrears Last 12 months" in cell_str and col_idx + 1 < len(row_data):
-                                    result['SF_Highest_No_of_Installments_Arrears_Last_12_months'] = row_data[col_idx + 1]
-                            
-                            elif current_section == "UF":
-                                if "No. of Facilities" in cell_str and col_idx + 1 < len(row_data):
-                                    result['UF_No_of_Facilities'] = row_data[col_idx + 1]
-                                elif "Total Outstanding Balance (RM)" in cell_str and col_idx + 1 < len(row_data):
-                                    result['UF_Total_Outstanding_Balance_RM'] = row_data[col_idx + 1]
-                                elif "Total Outstanding Balance Against Total Limit" in cell_str and col_idx + 1 < len(row_data):
-                                    result['UF_Total_Outstanding_Balance_Against_Total_Limit'] = row_data[col_idx + 1]
-                                elif "Highest No. of Installments Arrears Last 12 months" in cell_str and col_idx + 1 < len(row_data):
-                                    result['UF_Highest_No_of_Installments_Arrears_Last_12_months'] = row_data[col_idx + 1]
-                            
-                            elif current_section == "CC":
-                                if "Average Utilisation Last 6 months" in cell_str and col_idx + 1 < len(row_data):
-                                    result['CC_Average_Utilisation_Last_6_months'] = row_data[col_idx + 1]
-                            
-                            elif current_section == "ORC":
-                                if "Average Utilisation Last 6 months" in cell_str and col_idx + 1 < len(row_data):
-                                    result['ORC_Average_Utilisation_Last_6_months'] = row_data[col_idx + 1]
-                            
-                            elif current_section == "CHC":
-                                if "Min Utilisation Last 12 months (RM)" in cell_str and col_idx + 1 < len(row_data):
-                                    result['CHC_Min_Utilisation_Last_12_months_RM'] = row_data[col_idx + 1]
-                                elif "Max Utilisation Last 12 months (RM)" in cell_str and col_idx + 1 < len(row_data):
-                                    result['CHC_Max_Utilisation_Last_12_months_RM'] = row_data[col_idx + 1]
-                            
-                            elif current_section == "NHEF":
-                                if "No. of Accounts" in cell_str and col_idx + 1 < len(row_data):
-                                    result['NHEF_No_of_Accounts'] = row_data[col_idx + 1]
-                            
-                            elif current_section == "LL":
-                                if "No. of Accounts" in cell_str and col_idx + 1 < len(row_data):
-                                    result['LL_No_of_Accounts'] = row_data[col_idx + 1]
-                            
-                            elif current_section == "FL":
-                                if "No. of Accounts" in cell_str and col_idx + 1 < len(row_data):
-                                    result['FL_No_of_Accounts'] = row_data[col_idx + 1]
-                        
-                        # Stop after sufficient rows (typically within 40-50 rows from start)
-                        if key_stats_start_idx != -1 and idx > key_stats_start_idx + 50:
-                            break
-                
-                if not key_stats_found:
-                    pass
-                
-                # Clean results - replace empty with "-"
-                for key, value in result.items():
-                    if not value or value == "":
-                        result[key] = "-"
-                
-                return result
-            
-            # Helper function to extract TRADE / CREDIT REFERENCE data (can have multiple records)
-            def find_trade_credit_reference_data():
-                """Find all data from TRADE / CREDIT REFERENCE (CR) table - returns list of records"""
-                trade_found = False
-                trade_start_idx = -1
-                trade_records = []  # Store multiple trade/credit reference records
-                current_record = {}
-                
-                # Mapping of label patterns to result keys
-                label_mapping = {
-                    'Subject Name': 'TCR_Subject_Name',
-                    'Creditor\'s Name': 'TCR_Creditors_Name',
-                    'Creditor\'s Contact': 'TCR_Creditors_Contact',
-                    'Ref No': 'TCR_Ref_No',
-                    'Industry': 'TCR_Industry',
-                    'Solicitor\'s Name': 'TCR_Solicitors_Name',
-                    'Guarantor / Owner': 'TCR_Guarantor_Owner',
-                    'Subject ID': 'TCR_Subject_ID',
-                    'Amount Due': 'TCR_Amount_Due',
-                    'Aging Days': 'TCR_Aging_Days',
-                    'Debt Type': 'TCR_Debt_Type',
-                    'Document/Status Date': 'TCR_Document_Status_Date',
-                    'Solicitor\'s Contact': 'TCR_Solicitors_Contact',
-                    'Remark': 'TCR_Remark'
-                }
-                
-                for idx, row in df.iterrows():
-                    # Check if we found the TRADE / CREDIT REFERENCE table header
-                    for col_idx, cell in enumerate(row):
-                        cell_str = str(cell).strip() if pd.notna(cell) else ""
-                        if "TRADE / CREDIT REFERENCE" in cell_str.upper() and "(CR)" in cell_str.upper():
-                            trade_found = True
-                            trade_start_idx = idx
-                            break
-                    
-                    if trade_found:
-                        # Extract label-value pairs from the table
-                        row_data = [str(cell).strip() if pd.notna(cell) else "" for cell in row]
-                        
-                        # Check if this row starts a new record (contains 'Creditor's Name')
-                        has_creditor_name = False
-                        for col_idx, cell_str in enumerate(row_data):
-                            if cell_str == "Creditor's Name" and col_idx + 1 < len(row_data):
-                                creditor_value = row_data[col_idx + 1].strip()
-                                if creditor_value and creditor_value != "":
-                                    # Save previous record if it exists
-                                    if current_record and current_record.get('TCR_Creditors_Name', '-') != '-':
-                                        trade_records.append(current_record)
-                                    # Start new record
-                                    current_record = {key: "-" for key in label_mapping.values()}
-                                    has_creditor_name = True
-                                    break
-                        
-                        # Extract all fields in current row
-                        for col_idx, cell_str in enumerate(row_data):
-                            for label_pattern, result_key in label_mapping.items():
-                                if cell_str == label_pattern:
-                                    if col_idx + 1 < len(row_data):
-                                        value = row_data[col_idx + 1].strip()
-                                        if value and value != "":
-                                            if current_record or has_creditor_name:
-                                                if not current_record:
-                                                    current_record = {key: "-" for key in label_mapping.values()}
-                                                current_record[result_key] = value
-                                    break
-                        
-                        # Stop after finding enough data rows
-                        if trade_start_idx != -1 and idx > trade_start_idx + 30:
-                            break
-                
-                # Add last record if exists
-                if current_record and current_record.get('TCR_Creditors_Name', '-') != '-':
-                    trade_records.append(current_record)
-                
-                if not trade_found:
-                    pass
-                
-                # If no records found, return empty list (will use default "-" in row generation)
-                if not trade_records:
-                    pass
-                else:
-                    pass
-                
-                return trade_records
-            
-            # Helper function to extract NON-BANK LENDER CREDIT INFORMATION data
-            def find_nlci_data():
-                """Find data from NON-BANK LENDER CREDIT INFORMATION (NLCI) table only"""
-                nlci_found = False
-                nlci_start_idx = -1
-                nlci_end_idx = -1
-                result = {
-                    'Ttl_Limit': "-",
-                    'Ttl_Outstanding': "-",
-                    'Conduct_Highest_Value': "-"
-                }
-                
-                conduct_values = []  # Store all conduct values to find highest
-                
-                # First, find the exact boundaries of NLCI table
-                for idx, row in df.iterrows():
-                    for col_idx, cell in enumerate(row):
-                        cell_str = str(cell).strip() if pd.notna(cell) else ""
-                        # Must contain "NON-BANK LENDER CREDIT INFORMATION" and "NLCI" to be sure
-                        if "NON-BANK LENDER CREDIT INFORMATION" in cell_str.upper() and "NLCI" in cell_str.upper():
-                            nlci_found = True
-                            nlci_start_idx = idx
-                            break
-                    
-                    # Find where NLCI table ends (before WRITTEN-OFF ACCOUNT or next major section)
-                    if nlci_found and nlci_end_idx == -1:
-                        for cell in row:
-                            cell_str = str(cell).strip() if pd.notna(cell) else ""
-                            if "WRITTEN-OFF ACCOUNT" in cell_str.upper():
-                                nlci_end_idx = idx
-                                break
-                    
-                    if nlci_found and nlci_end_idx != -1:
-                        break
-                
-                if not nlci_found:
-                    return result
-                
-                # Set end boundary if not found
-                if nlci_end_idx == -1:
-                    nlci_end_idx = min(nlci_start_idx + 50, len(df))
-                
-                # Now extract data only from within NLCI table boundaries
-                for search_idx in range(nlci_start_idx + 1, nlci_end_idx):
-                    if search_idx >= len(df):
-                        break
-                    search_row = df.iloc[search_idx]
-                    
-                    # Convert row to list for easier processing
-                    row_data = [str(cell).strip() if pd.notna(cell) else "" for cell in search_row]
-                    
-                    # Check for "TOTAL" row to extract Ttl_Limit and Ttl_Outstanding
-                    # The row structure is: TOTAL  1,198.00  [empty cells]  TOTAL  675.28
-                    total_count = 0
-                    for col_idx, cell_str in enumerate(row_data):
-                        if cell_str.upper() == "TOTAL":
-                            total_count += 1
-                            
-                            # First TOTAL - get Ttl_Limit (next numeric value)
-                            if total_count == 1:
-                                for offset in range(1, min(10, len(row_data) - col_idx)):
-                                    val = row_data[col_idx + offset].replace(',', '').strip()
-                                    if val and re.match(r'^\d+\.?\d*$', val):
-                                        result['Ttl_Limit'] = row_data[col_idx + offset].strip()
-                                        break
-                            
-                            # Second TOTAL - get Ttl_Outstanding (next numeric value)
-                            elif total_count == 2:
-                                for offset in range(1, min(10, len(row_data) - col_idx)):
-                                    val = row_data[col_idx + offset].replace(',', '').strip()
-                                    if val and re.match(r'^\d+\.?\d*$', val):
-                                        result['Ttl_Outstanding'] = row_data[col_idx + offset].strip()
-                                        break
-                                break  # Found both totals, exit loop
-                    
-                    # Collect all numeric values from "Conduct of Account" columns within NLCI section
-                    # Look for rows that contain BNPL (Buy Now Pay Later) to confirm it's NLCI data
-                    is_nlci_row = any("BNPL" in str(cell).upper() for cell in search_row)
-                    
-                    if is_nlci_row or any("OUTSTANDING CREDIT" in str(cell).upper() for cell in search_row):
-                        # These appear in the right side of the table (after many columns)
-                        for col_idx, cell_str in enumerate(row_data):
-                            # Skip first few columns (No, date, capacity, etc.)
-                            if col_idx > 10:  # Conduct columns are typically after column 10
-                                val = cell_str.replace(',', '').strip()
-                                # Check if it's a small integer (conduct values are typically 0-9)
-                                if val and re.match(r'^\d+$', val):
-                                    num_val = int(val)
-                                    if 0 <= num_val <= 99:  # Reasonable range for conduct values
-                                        conduct_values.append(num_val)
-                
-                # Find highest conduct value
-                if conduct_values:
-                    highest = max(conduct_values)
-                    result['Conduct_Highest_Value'] = str(highest)
-                else:
-                    pass
-                
-                return result
-
-            # Extract base data from all tables (common to all rows)
-            base_row_data['Subject_Name'] = find_particulars_value("Name Of Subject")
-            base_row_data['IC_PP_No'] = find_particulars_value("IC / PP No") 
-            base_row_data['New_IC_No'] = find_particulars_value("New IC No")
-            base_row_data['Your_Ref_No'] = find_particulars_value("Your Ref. No")
-            base_row_data['Nationality'] = find_particulars_value("Nationality")
-            
-            # Extract SUMMARY CREDIT REPORT data with custom field naming
-            summary_credit_data = find_summary_credit_data()
-            base_row_data['A_App_No_Application'] = summary_credit_data['A_App_No_Application']
-            base_row_data['A_App_Ttl_Amnt'] = summary_credit_data['A_App_Ttl_Amnt']
-            base_row_data['B_Pend_No_Application'] = summary_credit_data['B_Pend_No_Application']
-            base_row_data['B_Pend_Ttl_Amnt'] = summary_credit_data['B_Pend_Ttl_Amnt']
-            
-            # Extract SUMMARY OF POTENTIAL & CURRENT LIABILITIES data with hybrid structure
-            potential_liabilities_data = find_potential_liabilities_data()
-            base_row_data['AsBorr_Outstanding_RM'] = potential_liabilities_data['AsBorr_Outstanding_RM']
-            base_row_data['AsBorr_Total_Limit_RM'] = potential_liabilities_data['AsBorr_Total_Limit_RM']
-            base_row_data['AsBorr_FEC_Limit_RM'] = potential_liabilities_data['AsBorr_FEC_Limit_RM']
-            base_row_data['Legal_Action_Taken'] = potential_liabilities_data['Legal_Action_Taken']
-            base_row_data['Special_Attention_Account'] = potential_liabilities_data['Special_Attention_Account']
-            
-            # Extract Legal Suits and Bankruptcy data (totals in headers)
-            legal_suits_bankruptcy_data = find_legal_suits_bankruptcy_data()
-            base_row_data['Legal_Suits_Defendant'] = legal_suits_bankruptcy_data['Legal_Suits_Defendant']
-            base_row_data['Legal_Suits_Plaintiff'] = legal_suits_bankruptcy_data['Legal_Suits_Plaintiff']
-            base_row_data['Bankruptcy_Action'] = legal_suits_bankruptcy_data['Bankruptcy_Action']
-            
-            # Extract NON-BANK LENDER CREDIT INFORMATION data
-            nlci_data = find_nlci_data()
-            base_row_data['Ttl_Limit'] = nlci_data['Ttl_Limit']
-            base_row_data['Ttl_Outstanding'] = nlci_data['Ttl_Outstanding']
-            base_row_data['Conduct_Highest_Value'] = nlci_data['Conduct_Highest_Value']
-            
-            # Extract KEY STATISTICS data
-            key_stats_data = find_key_statistics_data()
-            base_row_data['SF_No_of_Facilities'] = key_stats_data['SF_No_of_Facilities']
-            base_row_data['SF_Total_Outstanding_Balance_RM'] = key_stats_data['SF_Total_Outstanding_Balance_RM']
-            base_row_data['SF_Total_Outstanding_Balance_Against_Total_Limit'] = key_stats_data['SF_Total_Outstanding_Balance_Against_Total_Limit']
-            base_row_data['SF_Highest_No_of_Installments_Arrears_Last_12_months'] = key_stats_data['SF_Highest_No_of_Installments_Arrears_Last_12_months']
-            base_row_data['UF_No_of_Facilities'] = key_stats_data['UF_No_of_Facilities']
-            base_row_data['UF_Total_Outstanding_Balance_RM'] = key_stats_data['UF_Total_Outstanding_Balance_RM']
-            base_row_data['UF_Total_Outstanding_Balance_Against_Total_Limit'] = key_stats_data['UF_Total_Outstanding_Balance_Against_Total_Limit']
-            base_row_data['UF_Highest_No_of_Installments_Arrears_Last_12_months'] = key_stats_data['UF_Highest_No_of_Installments_Arrears_Last_12_months']
-            base_row_data['CC_Average_Utilisation_Last_6_months'] = key_stats_data['CC_Average_Utilisation_Last_6_months']
-            base_row_data['ORC_Average_Utilisation_Last_6_months'] = key_stats_data['ORC_Average_Utilisation_Last_6_months']
-            base_row_data['CHC_Min_Utilisation_Last_12_months_RM'] = key_stats_data['CHC_Min_Utilisation_Last_12_months_RM']
-            base_row_data['CHC_Max_Utilisation_Last_12_months_RM'] = key_stats_data['CHC_Max_Utilisation_Last_12_months_RM']
-            base_row_data['NHEF_No_of_Accounts'] = key_stats_data['NHEF_No_of_Accounts']
-            base_row_data['LL_No_of_Accounts'] = key_stats_data['LL_No_of_Accounts']
-            base_row_data['FL_No_of_Accounts'] = key_stats_data['FL_No_of_Accounts']
-            
-            # Extract TRADE / CREDIT REFERENCE data (can be multiple records)
-            trade_credit_records = find_trade_credit_reference_data()
-            
-            # Keep the remaining SUMMARY CREDIT INFORMATION fields (if they still exist in the PDF)
-            base_row_data['Legal_Action_Banking'] = find_summary_credit_value("Legal Action taken (from Banking)")
-            base_row_data['Existing_Facilities'] = find_summary_credit_value("Existing No. of Facility (from Banking)")
-            base_row_data['Bankruptcy_Record'] = find_summary_credit_value("Bankruptcy Record")
-            base_row_data['Legal_Suits'] = find_summary_credit_value("Legal Suits")
-            base_row_data['Trade_Credit_Reference'] = find_summary_credit_value("Trade / Credit Reference")
-            base_row_data['Total_Enquiries_12m'] = find_summary_credit_value("Total Enquiries for Last 12 months")
-            base_row_data['Total_Companies_Interest'] = find_summary_credit_value("Total Companies/Businesses Interest")
-            
-            # Extract i-SCORE and calculate Risk Grade
-            iscore_str = find_credit_score_value("i-SCORE")
-            
-            # Clean and extract numeric value from i-SCORE
-            iscore_clean = ""
-            iscore_num = 0
-            if iscore_str:
-                # Remove any non-numeric characters and extract numbers
-                numbers = re.findall(r'\d+', str(iscore_str))
-                if numbers:
-                    iscore_clean = numbers[0]  # Take first number found
-                    try:
-                        iscore_num = int(iscore_clean)
-                    except:
-                        iscore_num = 0
-                else:
-                    pass
-            
-            # Calculate risk grade
-            risk_grade = ""
-            if iscore_num > 0:
-                risk_grade_num = self.extract_risk_grade_from_score(iscore_num)
-                risk_grade = str(risk_grade_num) if risk_grade_num else ""
-            else:
-                pass
-            
-            base_row_data['i_SCORE'] = iscore_clean if iscore_clean else iscore_str
-            base_row_data['Risk_Grade'] = risk_grade
-            
-            # Extract CCRIS ENTITY data
-            base_row_data['CCRIS_Entity_Key'] = find_ccris_entity_key()
-            
-            # Extract Subject Status data
-            base_row_data['Warning_Remark'] = find_warning_remark()
-            
-            # Extract Key Contributing Factors
-            contributing_factors_raw = find_credit_score_value("Key Contributing Factors")
-            
-            # Process contributing factors
-            contributing_factors = []
-            if contributing_factors_raw and len(contributing_factors_raw.strip()) > 0:
-                clean_text = contributing_factors_raw.strip()
-                
-                if "•" in clean_text:
-                    # Split by bullet points
-                    parts = clean_text.split("•")
-                    for part in parts:
-                        cleaned_part = part.strip()
-                        if cleaned_part and len(cleaned_part) > 3:
-                            cleaned_part = re.sub(r'^[\s\-\*•]+', '', cleaned_part)
-                            cleaned_part = re.sub(r'[\s\-\*•]+$', '', cleaned_part)
-                            if cleaned_part:
-                                contributing_factors.append(cleaned_part)
-                else:
-                    # Single factor
-                    contributing_factors.append(clean_text)
-            
-            if not contributing_factors:
-                contributing_factors.append("")  # Empty factor to maintain structure
-            
-            
-            # Extract SHAREHOLDING INTEREST data
-            shareholding_interests = find_shareholding_interests()
-            
-            # Extract KEY STATISTICS Earliest/Latest Approved Facilities
-            earliest_facility, latest_facilities = find_key_statistics_facilities()
-            
-            # Determine row count: Use MAXIMUM of three tables
-            # 1. Shareholding Interests (can be multiple)
-            # 2. Trade/Credit Reference (can be multiple)
-            # 3. Latest Facilities (up to 3)
-            shareholding_count = len(shareholding_interests)
-            trade_credit_count = len(trade_credit_records)
-            latest_facilities_count = len(latest_facilities)
-            
-            max_row_count = max(shareholding_count, trade_credit_count, latest_facilities_count)
-            
-            
-            # Combine contributing factors into single string (not multiplying)
-            factors_combined = " | ".join(contributing_factors) if contributing_factors else "-"
-            
-            # Create rows based on maximum count
-            result_rows = []
-            
-            for row_idx in range(max_row_count):
-                row_data = base_row_data.copy()
-                
-                # Add contributing factor data (same for all rows)
-                row_data['Key_Contributing_Factor'] = factors_combined
-                
-                # Add shareholding interest data (cycle through if not enough)
-                if shareholding_count > 0:
-                    interest = shareholding_interests[row_idx % shareholding_count]
-                else:
-                    interest = {'No': "-", 'Name': "-", 'Position': "-", 'Appointed': "-",
-                               'Business_Expiry_Date': "-", 'Shareholding': "-", 'Percentage': "-",
-                               'Remark': "-", 'Last_Updated_by_Experian': "-"}
-                
-                row_data['No'] = interest['No']
-                row_data['Name'] = interest['Name']
-                row_data['Position'] = interest['Position']
-                row_data['Appointed'] = interest['Appointed']
-                row_data['Business_Expiry_Date'] = interest['Business_Expiry_Date']
-                row_data['Shareholding'] = interest['Shareholding']
-                row_data['Percentage'] = interest['Percentage']
-                row_data['Remark'] = interest['Remark']
-                row_data['Last_Updated_by_Experian'] = interest['Last_Updated_by_Experian']
-                
-                # Add Trade/Credit Reference data (cycle through if not enough)
-                if trade_credit_count > 0:
-                    tcr = trade_credit_records[row_idx % trade_credit_count]
-                else:
-                    tcr = {'TCR_Subject_Name': "-", 'TCR_Creditors_Name': "-", 'TCR_Creditors_Contact': "-",
-                          'TCR_Ref_No': "-", 'TCR_Industry': "-", 'TCR_Solicitors_Name': "-",
-                          'TCR_Guarantor_Owner': "-", 'TCR_Subject_ID': "-", 'TCR_Amount_Due': "-",
-                          'TCR_Aging_Days': "-", 'TCR_Debt_Type': "-", 'TCR_Document_Status_Date': "-",
-                          'TCR_Solicitors_Contact': "-", 'TCR_Remark': "-"}
-                
-                row_data['TCR_Subject_Name'] = tcr['TCR_Subject_Name']
-                row_data['TCR_Creditors_Name'] = tcr['TCR_Creditors_Name']
-                row_data['TCR_Creditors_Contact'] = tcr['TCR_Creditors_Contact']
-                row_data['TCR_Ref_No'] = tcr['TCR_Ref_No']
-                row_data['TCR_Industry'] = tcr['TCR_Industry']
-                row_data['TCR_Solicitors_Name'] = tcr['TCR_Solicitors_Name']
-                row_data['TCR_Guarantor_Owner'] = tcr['TCR_Guarantor_Owner']
-                row_data['TCR_Subject_ID'] = tcr['TCR_Subject_ID']
-                row_data['TCR_Amount_Due'] = tcr['TCR_Amount_Due']
-                row_data['TCR_Aging_Days'] = tcr['TCR_Aging_Days']
-                row_data['TCR_Debt_Type'] = tcr['TCR_Debt_Type']
-                row_data['TCR_Document_Status_Date'] = tcr['TCR_Document_Status_Date']
-                row_data['TCR_Solicitors_Contact'] = tcr['TCR_Solicitors_Contact']
-                row_data['TCR_Remark'] = tcr['TCR_Remark']
-                
-                # Add KEY STATISTICS Earliest Approved Facility (same for all rows)
-                row_data['EAF_Facility_Type'] = earliest_facility['type']
-                row_data['EAF_Date_Approved'] = earliest_facility['date']
-                
-                # Add KEY STATISTICS Latest Approved Facility (cycle through if not enough)
-                if latest_facilities_count > 0:
-                    latest_facility = latest_facilities[row_idx % latest_facilities_count]
-                else:
-                    latest_facility = {'type': "-", 'date': "-"}
-                
-                row_data['LAF_Facility_Type'] = latest_facility['type']
-                row_data['LAF_Date_Approved'] = latest_facility['date']
-                
-                result_rows.append(row_data)
-                
-            
-            return result_rows
-            
-        except Exception as e:
-            print(f"Error extracting data from {file_name}: {e}")
-            return None
+        return ccris_database.extract_database_row(df, file_name)
     
-    def update_database_preview(self, max_rows=200):
+    def update_database_preview(self):
         """Update the database preview in the Database Viewer tab with improved layout"""
+        if not self.database_tab_built:
+            return  # The tab shows the current database when it is first opened
         try:
             # Clear existing columns and rows
             for col in self.db_tree["columns"]:
                 self.db_tree.heading(col, text="")
-            self.db_tree.delete(*self.db_tree.get_children())
+            self.db_grid.clear()
             
             if self.database_df is None or self.database_df.empty:
                 return
@@ -3534,30 +2351,13 @@ class PDFtoExcelApp(ctk.CTk):
                 self.db_tree.heading(col, text=display_name, anchor='w')
                 self.db_tree.column(col, width=standard_width, minwidth=100, anchor='w')
             
-            # Add data (limit to max_rows for performance)
-            display_df = self.database_df.head(max_rows) if len(self.database_df) > max_rows else self.database_df
-            
-            for idx, row in display_df.iterrows():
-                # Format values - replace empty/NaN with "-" for consistency
-                values = []
-                for col in columns:
-                    cell_value = row[col]
-                    if pd.isna(cell_value) or cell_value == "" or str(cell_value).strip() == "":
-                        values.append("-")
-                    else:
-                        # Clean and format cell value
-                        formatted_value = str(cell_value).strip()
-                        # Limit very long values to prevent display issues
-                        if len(formatted_value) > 50:
-                            formatted_value = formatted_value[:47] + "..."
-                        values.append(formatted_value)
-                
-                self.db_tree.insert("", "end", values=values)
+            # Every record can be browsed; only the visible ones are put in the tree
+            self.db_grid.set_data(self.database_df)
         except Exception as e:
             print(f"update_database_preview error: {e}")
     
     def export_database(self):
-        """Export the built database to an Excel file named Database_experian_<datetime>.xlsx"""
+        """Export the built database as Database_experian_<datetime> in the format chosen on the Database tab"""
         try:
             if self.database_df is None or self.database_df.empty:
                 messagebox.showinfo("Info", "No database to export. Please Build Database first.")
@@ -3567,12 +2367,9 @@ class PDFtoExcelApp(ctk.CTk):
             if not folder:
                 return
             
-            now = datetime.now().strftime("%Y%m%d_%H%M%S")
-            file_name = f"Database_experian_{now}.xlsx"
-            out_path = Path(folder) / file_name
-            
-            with pd.ExcelWriter(out_path, engine="openpyxl") as writer:
-                self.database_df.to_excel(writer, sheet_name="Database", index=False)
+            label = self.db_export_format.get()
+            fmt = next(key for key, (name, _) in ccris_export.DATABASE_FORMATS.items() if name == label)
+            out_path = ccris_export.export_database(self.database_df, folder, fmt)
             
             messagebox.showinfo("Exported", f"Database exported to:\n{out_path}")
             self.status_label.configure(text=f"✓ Database exported: {out_path.name}")
@@ -3586,5 +2383,6 @@ def main():
     app.mainloop()
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # Needed for worker processes in PyInstaller builds
     main()
 
@@ -0,0 +1,53 @@
+"""build_database() must survive a worker process dying part-way through."""
+import multiprocessing
+import os
+
+import pandas as pd
+import pytest
+
+import ccris_database
+
+pytestmark = pytest.mark.skipif(
+    multiprocessing.get_start_method() != "fork",
+    reason="the workers only see the patched extractor when they are forked",
+)
+
+
+def extract_or_crash(rows, file_name):
+    # Stands in for extract_report_rows; "crash" previews kill their worker like running out of memory would
+    if file_name.startswith("crash"):
+        os._exit(1)
+    return [{"Subject_Name": rows[0][0]}]
+
+
+def previews(names):
+    return {name: pd.DataFrame([[f"subject of {name}"]]) for name in names}
+
+
+def test_worker_crash_fails_only_files_in_flight(monkeypatch):
+    monkeypatch.setattr(ccris_database, "extract_report_rows", extract_or_crash)
+    names = [f"report_{i:02d}.pdf" for i in range(40)]
+    names[3] = "crash.pdf"
+    row_cache = {}
+
+    database_df, successful, failed = ccris_database.build_database(previews(names), workers=2, row_cache=row_cache)
+
+    # Only the shard the crashed worker was running is lost; the files after it are still extracted
+    assert successful + failed == len(names)
+    assert 1 <= failed < len(names) // 2
+    assert list(database_df["File_Name"]) == [name for name in names if name in row_cache]
+    assert names[-1] in row_cache
+    assert "crash.pdf" not in row_cache  # Failures are retried on the next build, not cached
+
+
+def test_extract_files_keeps_input_order_after_crash(monkeypatch):
+    monkeypatch.setattr(ccris_database, "extract_report_rows", extract_or_crash)
+    names = [f"report_{i:02d}.pdf" for i in range(12)]
+    names[0] = "crash_first.pdf"
+    items = [(name, [(name,)]) for name in names]
+
+    results = list(ccris_database.extract_files(items, workers=3))
+
+    assert [file_name for file_name, _ in results] == names
+    assert results[0][1] is None
+    assert results[-1][1] == [{"Subject_Name": names[-1]}]
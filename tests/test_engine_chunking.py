@@ -0,0 +1,55 @@
+"""A report split into page ranges must come back exactly as if it was extracted whole."""
+import fitz
+
+import ccris_engine
+
+
+def make_report(path, pages):
+    # One ruled 3x2 table per page, each cell naming its page, row and column
+    doc = fitz.open()
+    for page_no in range(1, pages + 1):
+        page = doc.new_page(width=595, height=842)
+        for r in range(3):
+            for c in range(2):
+                rect = fitz.Rect(72 + c * 150, 150 + r * 24, 72 + (c + 1) * 150, 150 + (r + 1) * 24)
+                page.draw_rect(rect, color=(0, 0, 0), width=0.8)
+                page.insert_text((rect.x0 + 4, rect.y1 - 7), f"P{page_no} R{r + 1} C{c + 1}", fontsize=9)
+    doc.save(str(path))
+    doc.close()
+
+
+def test_chunked_report_matches_whole_file(tmp_path):
+    pdf_path = str(tmp_path / "long_report.pdf")
+    make_report(pdf_path, pages=7)
+
+    engine = ccris_engine.ExtractionEngine(workers=3, pages_per_chunk=2)
+    chunks = engine._page_chunks(ccris_engine.auto_extract_file, pdf_path)
+    assert chunks is not None and len(chunks) > 1
+
+    [(_, whole)] = ccris_engine.ExtractionEngine(workers=1).map_files(ccris_engine.auto_extract_file, [pdf_path])
+    [(_, chunked)] = engine.map_files(ccris_engine.auto_extract_file, [pdf_path])
+
+    assert whole["error"] is None and chunked["error"] is None
+    assert chunked["rows"] == whole["rows"]
+    assert chunked["layout"] == whole["layout"]
+
+    # The page ranges were stitched back in page order, not in the order the workers finished
+    first_cells = [chunked["rows"][table["row_start"]][0] for table in chunked["layout"]["tables"]]
+    assert first_cells == [f"P{page_no} R1 C1" for page_no in range(1, 8)]
+
+
+def test_chunked_and_whole_files_keep_batch_order(tmp_path):
+    paths = []
+    for name, pages in (("short.pdf", 1), ("long.pdf", 7), ("medium.pdf", 3)):
+        paths.append(str(tmp_path / name))
+        make_report(paths[-1], pages)
+
+    whole = dict(ccris_engine.ExtractionEngine(workers=1).map_files(ccris_engine.auto_extract_file, paths))
+    chunked = dict(ccris_engine.ExtractionEngine(workers=3, pages_per_chunk=2).map_files(
+        ccris_engine.auto_extract_file, paths))
+
+    assert sorted(chunked) == [0, 1, 2]
+    for idx in range(len(paths)):
+        assert chunked[idx]["path"] == paths[idx]
+        assert chunked[idx]["rows"] == whole[idx]["rows"]
+        assert chunked[idx]["layout"] == whole[idx]["layout"]
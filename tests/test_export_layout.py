@@ -0,0 +1,86 @@
+"""tidy_export_frame() must lay a preview out exactly as the old per-row export loop did.
+
+The expected values below are what that loop (Steps 1-6 of the old
+export_to_excel) produced for PREVIEW.
+"""
+import numpy as np
+import openpyxl
+import pandas as pd
+
+import ccris_export
+
+N = None
+PREVIEW = [
+    [N, N, "COMMERCIAL CONFIDENTIAL", N, N, N],
+    [N, N, "CREDIT SCORE", N, N, N],
+    ["  ", N, "i-SCORE", 712, N, N],
+    [N, N, "Risk Grade", "9", N, N],
+    [N, N, "   ", np.nan, N, N],
+    [N, N, N, N, N, N],
+    [N, N, N, "", N, N],
+    [N, N, N, N, N, N],
+    [N, N, N, N, N, N],
+    [N, N, N, "Name Of Subject", "AHMAD BIN ALI", N],
+    [N, N, N, "", N, "Remark"],
+    [N, N, N, "Nationality", "MALAYSIAN", N],
+    [N, N, N, N, N, N],
+    [N, N, N, N, N, N],
+    [N, N, N, N, N, N],
+    [N, N, N, "Commercial Confidential - page 2", N, N],
+]
+
+EXPECTED_ROWS = [
+    ["CREDIT SCORE", N, N, N],
+    ["i-SCORE", 712, N, N],
+    ["Risk Grade", "9", N, N],
+    ["   ", N, N, N],
+    [N, N, N, N],
+    ["Name Of Subject", "AHMAD BIN ALI", N, N],
+    ["", N, "Remark", N],
+    ["Nationality", "MALAYSIAN", N, N],
+    [N, N, N, N],
+    [N, N, N, N],
+]
+EXPECTED_KEPT_ROWS = [1, 2, 3, 4, 5, 9, 10, 11, 12, 13]
+EXPECTED_KEPT_COLS = [2, 3, 4, 5]
+EXPECTED_ROW_SHIFT = {9: 1, 10: 1, 11: 1, 12: 1, 13: 1, 14: 1, 15: 1}
+
+
+def cell_values(df):
+    # Missing cells compare as None whether they came out as None or NaN
+    return [[None if pd.isna(cell) else cell for cell in row] for row in df.to_numpy(dtype=object).tolist()]
+
+
+def test_tidy_matches_old_row_loop():
+    df_cleaned, kept_rows, kept_cols, row_shift = ccris_export.tidy_export_frame(pd.DataFrame(PREVIEW))
+
+    assert list(df_cleaned.columns) == list(range(len(EXPECTED_KEPT_COLS)))
+    assert cell_values(df_cleaned) == EXPECTED_ROWS
+    assert kept_rows == EXPECTED_KEPT_ROWS
+    assert kept_cols == EXPECTED_KEPT_COLS
+    assert row_shift == EXPECTED_ROW_SHIFT
+
+
+def test_tidy_leaves_the_preview_untouched():
+    df = pd.DataFrame(PREVIEW)
+    before = cell_values(df)
+
+    ccris_export.tidy_export_frame(df)
+
+    assert cell_values(df) == before
+
+
+def test_exported_workbook_has_tidied_sheet_and_risk_grade(tmp_path):
+    excel_path = tmp_path / "report.xlsx"
+
+    ccris_export.export_preview_workbook(pd.DataFrame(PREVIEW), excel_path, file_name="report.pdf", risk_grade=9)
+
+    workbook = openpyxl.load_workbook(excel_path)
+    data_sheet, risk_sheet = workbook.worksheets
+    assert risk_sheet.title == "Risk Grades"
+    assert [list(row) for row in risk_sheet.iter_rows(values_only=True)] == [["File Name", "Risk Grade"], ["report.pdf", 9]]
+
+    # Blank cells come back empty; whitespace-only text is kept as written
+    written = [list(row) for row in data_sheet.iter_rows(min_row=1, max_row=len(EXPECTED_ROWS), max_col=4, values_only=True)]
+    expected = [[None if cell == "" else cell for cell in row] for row in EXPECTED_ROWS]
+    assert written == expected
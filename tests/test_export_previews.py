@@ -0,0 +1,59 @@
+"""export_previews() must keep writing workbooks after a worker process dies."""
+import multiprocessing
+import os
+
+import pandas as pd
+import pytest
+
+import ccris_export
+
+pytestmark = pytest.mark.skipif(
+    multiprocessing.get_start_method() != "fork",
+    reason="the workers only see the patched exporter when they are forked",
+)
+
+write_workbook = ccris_export.export_preview_workbook
+
+
+def export_or_crash(df, excel_path, layout=None, file_name=None, risk_grade=None):
+    # "crash" files kill their worker the way running out of memory would
+    if file_name.startswith("crash"):
+        os._exit(1)
+    return write_workbook(df, excel_path, layout, file_name, risk_grade)
+
+
+def make_jobs(tmp_path, names):
+    df = pd.DataFrame([["Name Of Subject", "AHMAD BIN ALI"], ["i-SCORE", "712"]])
+    return [(name, df, str(tmp_path / f"{name}.xlsx"), None, None) for name in names]
+
+
+def test_worker_crash_only_fails_files_in_flight(tmp_path, monkeypatch):
+    monkeypatch.setattr(ccris_export, "export_preview_workbook", export_or_crash)
+    names = [f"report_{i:02d}" for i in range(12)]
+    names[2] = "crash"
+    jobs = make_jobs(tmp_path, names)
+    workers = 2
+
+    results = list(ccris_export.export_previews(jobs, workers=workers))
+
+    assert sorted(file_name for file_name, _, _ in results) == sorted(names)
+    failed = {file_name: error for file_name, _, error in results if error}
+    assert "crash" in failed and all(failed.values())
+    assert len(failed) <= workers  # Only what was running when the worker died
+
+    # Files queued behind the crash were written by a fresh pool
+    for file_name, _, excel_path, _, _ in jobs[3 + workers:]:
+        assert os.path.exists(excel_path), file_name
+
+
+def test_crashes_in_a_row_do_not_stop_the_export(tmp_path, monkeypatch):
+    monkeypatch.setattr(ccris_export, "export_preview_workbook", export_or_crash)
+    names = ["crash_a", "crash_b", "crash_c", "report_a", "report_b", "report_c"]
+
+    results = list(ccris_export.export_previews(make_jobs(tmp_path, names), workers=2))
+
+    errors = {file_name: error for file_name, _, error in results}
+    assert len(results) == len(names)
+    assert all(errors[name] for name in ("crash_a", "crash_b", "crash_c"))
+    # report_a may run next to crash_c and go down with it; the files after it get a fresh pool
+    assert errors["report_b"] is None and errors["report_c"] is None
@@ -0,0 +1,53 @@
+"""ExtractionEngine.map_files() must only cache results that did not fail."""
+import sqlite3
+
+import ccris_cache
+import ccris_engine
+
+
+def extract_ok(pdf_path):
+    result = ccris_engine._empty_result(pdf_path)
+    result["rows"] = [["A", "1"]]
+    return result
+
+
+def extract_failing(pdf_path):
+    # Like pdfminer on a password-protected PDF: an exception without a message
+    result = ccris_engine._empty_result(pdf_path)
+    result["error"] = ""
+    return result
+
+
+def cached_entries(cache):
+    with sqlite3.connect(cache.path) as conn:
+        return conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+
+def run(func, path, cache):
+    return [result for _, result in ccris_engine.ExtractionEngine(1).map_files(func, [str(path)], cache=cache)]
+
+
+def test_failing_file_is_not_cached(tmp_path):
+    pdf_path = tmp_path / "report.pdf"
+    pdf_path.write_bytes(b"%PDF-1.4 not really a report")
+    cache = ccris_cache.ExtractionCache(tmp_path / "cache.sqlite3")
+
+    run(extract_failing, pdf_path, cache)
+    assert cached_entries(cache) == 0
+
+    # The next run extracts again rather than replaying the failure
+    results = run(extract_failing, pdf_path, cache)
+    assert not results[0].get("cached")
+    assert cache.hits == 0
+
+
+def test_successful_file_is_cached(tmp_path):
+    pdf_path = tmp_path / "report.pdf"
+    pdf_path.write_bytes(b"%PDF-1.4 not really a report")
+    cache = ccris_cache.ExtractionCache(tmp_path / "cache.sqlite3")
+
+    run(extract_ok, pdf_path, cache)
+    assert cached_entries(cache) == 1
+
+    results = run(extract_ok, pdf_path, cache)
+    assert results[0]["cached"] and results[0]["rows"] == [["A", "1"]]
@@ -0,0 +1,69 @@
+"""ReportIndex lookups must give the same database rows as scanning the whole preview.
+
+fixtures/ccris_report_preview.json holds a preview laid out like an Experian
+CCRIS report (every section extract_database_row reads, a repeated header
+and page footers) and the rows the full-scan extract_database_row returned
+for it before sections were indexed.
+"""
+import json
+from pathlib import Path
+
+import pandas as pd
+
+import ccris_database
+
+FIXTURE = Path(__file__).parent / "fixtures" / "ccris_report_preview.json"
+
+
+def load_fixture():
+    with open(FIXTURE, encoding="utf-8") as f:
+        fixture = json.load(f)
+    return pd.DataFrame(fixture["rows"]), fixture["expected"]
+
+
+def scan_section_rows(df, name):
+    # Every row with a cell matching the section header, found the way the full scan did
+    matches = ccris_database.SECTION_MARKERS[name]
+    found = []
+    for idx, row in df.iterrows():
+        for cell in row:
+            cell_str = str(cell).strip() if pd.notna(cell) else ""
+            if cell_str and matches(cell_str, cell_str.upper()):
+                found.append(idx)
+                break
+    return found
+
+
+def test_sections_match_full_scan():
+    df, _ = load_fixture()
+    index = ccris_database.ReportIndex(ccris_database.table_payload(df))
+
+    for name in ccris_database.SECTION_MARKERS:
+        assert index.sections[name] == scan_section_rows(df, name), name
+    # The repeated KEY STATISTICS header is indexed, but lookups start at the first one
+    assert len(index.sections["key_statistics"]) == 2
+    assert index.start("key_statistics") == index.sections["key_statistics"][0]
+
+
+def test_database_rows_match_full_scan():
+    df, expected = load_fixture()
+
+    assert ccris_database.extract_database_row(df, "report.pdf") == expected
+
+
+def test_report_rows_from_payload_match_full_scan():
+    df, expected = load_fixture()
+
+    assert ccris_database.extract_report_rows(ccris_database.table_payload(df), "report.pdf") == expected
+
+
+def test_missing_sections_give_placeholders():
+    df, expected = load_fixture()
+    particulars_only = df.iloc[:7].reset_index(drop=True)
+
+    rows = ccris_database.extract_database_row(particulars_only, "report.pdf")
+    assert len(rows) == 3  # Padded to the three Latest Approved Facility slots
+    row = rows[0]
+    assert row["Subject_Name"] == expected[0]["Subject_Name"]
+    assert row["i_SCORE"] == "" and row["Risk_Grade"] == ""
+    assert row["CCRIS_Entity_Key"] == "-" and row["TCR_Creditors_Name"] == "-"